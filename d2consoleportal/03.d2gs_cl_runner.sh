@@ -8,6 +8,17 @@ chmod +x $EXPECT_CL_SCRIPT
 
 echo "Starting character list extraction for all games..."
 
+# Ако console_daemon.py върви - всички 'cl' минават през една постоянна сесия
+CONSOLE_DAEMON="/usr/local/pvpgn/tools/newconsoled2/console_daemon.py"
+CONSOLE_SOCKET="/usr/local/pvpgn/tools/newconsoled2/d2gs_console.sock"
+if [ -S "$CONSOLE_SOCKET" ]; then
+    if python3 "$CONSOLE_DAEMON" dump-cl "$ID_FILE" /usr/local/pvpgn/tools/d2consoleportal/logs/cl_output; then
+        echo "Character list extraction complete (console daemon)."
+        exit 0
+    fi
+    echo "Console daemon failed, falling back to expect per game."
+fi
+
 # Четене на всеки ред от файла с ID-та
 while IFS= read -r GAME_ID
 do
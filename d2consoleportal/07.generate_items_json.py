@@ -4,113 +4,56 @@ PvPGN item report - JSON generation only. (FINAL STABLE PYTHON CODE)
 Includes fixes for D2LIB attribute names (char_name, char_level), 
 Stash Gold (stashed_gold), Progression, and item grouping/counting.
 """
-from d2lib.files import D2SFile
-import os, glob, json
+import argparse
+import os, sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from collections import defaultdict
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator
+
+# Общите модули (манифестът, индексът герой -> акаунт, JSON writer-ът) са в newconsoled2/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "newconsoled2"))
+from char_manifest import CharManifest, scan_files
+from charsave_reader import LazyD2S
+from item_records import item_records, render_row
+from account_index import build_account_index
+from json_stream import JSONStreamWriter
+from json_shards import ShardIndex
+from config import ITEMS_WORKERS, ITEMS_JSON_FORMAT
 
 # === Configuration ===
 CHAR_DIR = "/usr/local/pvpgn/var/pvpgn/charsave"
 CHARINFO_DIR = "/usr/local/pvpgn/var/pvpgn/charinfo"
 OUTPUT_JSON = "/var/www/html/data/all_items.json" 
+# По един малък файл на герой + index.json (за charinfo.js)
+SHARD_DIR = "/var/www/html/data/items"
 
 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-# === Item Type Mapping and Detection ===
-CODE_TO_TYPE = {
-    # amulet
-    "amu": "amulet",
-    # ring
-    "rin": "ring",
-    # belt
-    "bel": "belt",
-    # charm codes 
-    "cm1": "charm_small", "cm2": "charm_large", "cm3": "charm_grand",
-    # jewelry generic
-    "jew": "jewelry",
-    # weapons / armor (examples)
-    "swd": "weapon", "swf": "weapon", "axe": "weapon",
-    "bow": "weapon", "xbow": "weapon", "stf": "weapon", "bst": "weapon",
-    # shields / armor
-    "shd": "armor", "plt": "armor", "ht": "armor",
-    # jewels / gems
-    "gem": "gem", "gld": "gold", "tkp": "token",
-    # books / tomes etc
-    "tbk": "book",
-    # other/skill items
-    "uap": "helmet",
-}
-
-def detect_type_from_code_and_name(code, name):
-    if not code: code = ""
-    if not name: name = ""
-    code = code.lower()
-    name = name.lower()
-    
-    if code in CODE_TO_TYPE: return CODE_TO_TYPE[code]
-    
-    if "ring" in name or "band" in name: return "ring"
-    if "amulet" in name or "gorget" in name or "neck" in name: return "amulet"
-    if "belt" in name: return "belt"
-    if "charm" in name or "annihilus" in name or "gheed" in name: return "charm"
-    if "helm" in name or "crown" in name or "mask" in name: return "helmet"
-    if "shield" in name: return "shield"
-    
-    for kw in ("sword","axe","mace","dagger","bow","crossbow","staff","polearm","spear","hammer"):
-        if kw in name: return "weapon"
-        
-    for kw in ("armor","plate","mail","leather","chain","robe","shield"):
-        if kw in name: return "armor"
-        
-    return "other"
-
 # === Account Finder ===
+# Един scandir обход на charinfo за целия run (вж. newconsoled2/account_index.py);
+# строи се в main(), за да не го правят и worker процесите
+ACCOUNT_INDEX: Dict[str, str] = {}
+
 def find_account_for_character(char_filename):
-    try:
-        for acc in os.listdir(CHARINFO_DIR):
-            p = os.path.join(CHARINFO_DIR, acc)
-            if not os.path.isdir(p): continue
-            try:
-                if char_filename in os.listdir(p):
-                    return acc
-            except Exception:
-                continue
-    except FileNotFoundError:
-        pass
-    return "Unknown"
-
-# === Item Grouping (за да се покаже бройката в charinfo.html) ===
-def group_and_format_list(item_list: List[str]) -> List[str]:
-    counts = defaultdict(int)
-    for item in item_list:
-        counts[item] += 1
-    
-    formatted_list = []
-    for name, count in sorted(counts.items()):
-        if count > 1:
-            formatted_list.append(f"{name} ({count})")
-        else:
-            formatted_list.append(name)
-            
-    return formatted_list
+    return ACCOUNT_INDEX.get(char_filename, "Unknown")
 
-# === GATHER DATA ===
-rows: List[Dict[str, Any]] = []
-print(f"[*] Starting item data collection from {CHAR_DIR}...")
+# === Parse one D2S (резултатът се кешира в манифеста) ===
+# Смени версията, когато се промени структурата на реда по-долу
+ITEMS_MANIFEST_VERSION = 2
 
-for path in sorted(glob.glob(os.path.join(CHAR_DIR, "*"))):
+def parse_character(path: str) -> Optional[Dict[str, Any]]:
+    # LazyD2S: заглавието и атрибутите се четат директно, d2lib декодира само .items
     try:
-        d2s = D2SFile(path)
+        d2s = LazyD2S(path)
+        all_items = list(d2s.items)
     except Exception:
         print(f"[!] Skipping unreadable file: {os.path.basename(path)}")
-        continue
+        return None
 
     char_fname = os.path.basename(path)
     
     # --- КОРЕКЦИЯ 1: Извличане на основни данни с коректните ключове ---
     char_name = getattr(d2s, "char_name", None) or char_fname # ИЗПОЛЗВАМЕ 'char_name'
-    account_name = find_account_for_character(char_fname)
     
     # Вземаме всички атрибути за извличане на Gold/Stats
     char_attributes = getattr(d2s, "attributes", {})
@@ -143,7 +86,6 @@ for path in sorted(glob.glob(os.path.join(CHAR_DIR, "*"))):
     }
     
     # --- Извличане на предмети (Items) ---
-    all_items = list(getattr(d2s, "items", []))
     stash_items = getattr(d2s, "stash", None) # Опитваме се да вземем stash
     
     if stash_items:
@@ -152,84 +94,60 @@ for path in sorted(glob.glob(os.path.join(CHAR_DIR, "*"))):
             all_items.extend(list(stash_items))
         except Exception:
             pass
-            
-    # Categorize items
-    categorized_items = defaultdict(list)
-    
-    for item in all_items:
-        # Get attributes safely
-        name = getattr(item, "name", "") or ""
-        code = getattr(item, "code", "") or ""
-        is_unique = getattr(item, "is_unique", False)
-        is_set = getattr(item, "is_set", False)
-        is_rune = getattr(item, "is_rune", False)
-        rid = getattr(item, "rune_id", None)
-        
-        # 1. Unique/Set
-        if is_unique:
-            categorized_items["unique_set"].append({"name": name, "type": "unique"})
-        elif is_set:
-            categorized_items["unique_set"].append({"name": name, "type": "set"})
-
-        # 2. Runes
-        if is_rune or (rid is not None and not name):
-            runes_name = name or (f"Rune ID {rid}" if rid is not None else "Rune (Unknown)")
-            categorized_items["runes"].append(runes_name)
-            continue
-            
-        # 3. Charms detection by code prefix (cm1/cm2/cm3)
-        code_l = code.lower()
-        if code_l.startswith("cm"):
-            if code_l.startswith("cm1"): categorized_items["charms_small"].append(name or code)
-            elif code_l.startswith("cm2"): categorized_items["charms_large"].append(name or code)
-            elif code_l.startswith("cm3"): categorized_items["charms_grand"].append(name or code)
-            else: categorized_items["charms_small"].append(name or code)
-            continue
-
-        # 4. General item type categorization (using mapping/heuristics)
-        itype = detect_type_from_code_and_name(code, name)
-
-        # Map to final category keys
-        if itype == "ring": categorized_items["rings"].append(name)
-        elif itype == "belt": categorized_items["belts"].append(name)
-        elif itype == "amulet": categorized_items["amulets"].append(name) # <-- КОРЕКЦИЯТА Е ТУК
-        elif itype == "weapon": categorized_items["weapons"].append(name)
-        elif itype in ("armor","helmet","shield"): categorized_items["armors"].append(name)
-        elif itype.startswith("charm"): categorized_items["charms_small"].append(name) # Fallback charm
-        else: categorized_items["other"].append(name)
-
-    # Append row data, ensuring all keys exist for the JSON structure
-    row_data = {
-        "account": account_name,
-        "charfile": char_fname,
-        "charname": char_name,
-        
-        # ДОБАВЯМЕ СТАТИСТИКИТЕ
-        "char_stats": stats, 
-        
-        # ГРУПИРАМЕ ПРЕДМЕТИТЕ ПО БРОЙКИ
-        "unique_set": categorized_items["unique_set"],
-        "runes": group_and_format_list(categorized_items["runes"]),
-        "rings": group_and_format_list(categorized_items["rings"]),
-        "belts": group_and_format_list(categorized_items["belts"]),
-        "amulets": group_and_format_list(categorized_items["amulets"]),
-        "charms_small": group_and_format_list(categorized_items["charms_small"]),
-        "charms_large": group_and_format_list(categorized_items["charms_large"]),
-        "charms_grand": group_and_format_list(categorized_items["charms_grand"]),
-        "weapons": group_and_format_list(categorized_items["weapons"]),
-        "armors": group_and_format_list(categorized_items["armors"]),
-        "other": group_and_format_list(categorized_items["other"]),
-    }
-    rows.append(row_data)
-
-# === Save JSON export ===
-final_json = {
-    "generated": timestamp, 
-    "rows": rows
-}
-try:
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as jf:
-        json.dump(final_json, jf, ensure_ascii=False, indent=2)
-    print(f"[+] JSON report generated successfully: {OUTPUT_JSON}")
-except Exception as e:
-    print(f"[!] Failed to write JSON file: {e}")
+
+    # Компактни ItemRecord-и (вж. newconsoled2/item_records.py); d2lib обектите се пускат веднага
+    records = item_records(all_items)
+    d2s = all_items = stash_items = None
+
+    # Row data, ensuring all keys exist for the JSON structure
+    # (категоризацията и групирането по бройки са в render_row)
+    return render_row(char_fname, char_name, stats, records)
+
+# === Parallel parse (само променените файлове) ===
+def parse_in_pool(parse, paths: List[str]) -> Iterator[Optional[Dict[str, Any]]]:
+    """executor.map запазва реда на paths, така че all_items.json е стабилен между пусканията."""
+    if ITEMS_WORKERS <= 1 or len(paths) < 2:
+        yield from map(parse, paths)
+        return
+    workers = min(ITEMS_WORKERS, len(paths))
+    chunksize = max(1, len(paths) // (workers * 4))
+    print(f"[*] Parsing {len(paths)} changed files on {workers} workers (chunksize {chunksize})...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse, paths, chunksize=chunksize)
+
+def main():
+    # --changed: пътищата идват на stdin (collector.py / change_feed.py) - без обхождане на CHAR_DIR
+    parser = argparse.ArgumentParser(description="Generate all_items.json and per-character item shards")
+    parser.add_argument("--changed", action="store_true", help="read changed charsave paths from stdin")
+    args = parser.parse_args()
+
+    # === GATHER DATA ===
+    # Парсират се само D2S файловете с променени (mtime, size, inode); акаунтът се
+    # търси всеки път, защото зависи от charinfo, а не от самия D2S файл.
+    ACCOUNT_INDEX.update(build_account_index(CHARINFO_DIR))
+    print(f"[*] Starting item data collection from {CHAR_DIR}...")
+    with CharManifest("items", version=ITEMS_MANIFEST_VERSION) as manifest:
+        if args.changed:
+            changed = [path for path in (line.strip() for line in sys.stdin)
+                       if os.path.dirname(path) == CHAR_DIR]
+            manifest.update(changed, parse_character, parse_in_pool)
+        else:
+            manifest.sync(scan_files(CHAR_DIR), parse_character, parse_in_pool)
+        print(manifest.summary())
+
+        # === Save JSON export (поточно, ред по ред; атомарно преименуване) ===
+        # + shard на всеки герой, за да не тегли charinfo.html целия all_items.json
+        try:
+            with JSONStreamWriter(OUTPUT_JSON, ITEMS_JSON_FORMAT, head={"generated": timestamp},
+                                  key="rows", ensure_ascii=False) as out, \
+                 ShardIndex(SHARD_DIR, generated=timestamp) as shards:
+                for record in manifest.records():
+                    row = {"account": find_account_for_character(record["charfile"]), **record}
+                    out.write(row)
+                    shards.add(row["charname"], row)
+            print(f"[+] JSON report generated successfully: {OUTPUT_JSON} ({out.count} characters)")
+        except Exception as e:
+            print(f"[!] Failed to write JSON file: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -7,29 +7,6 @@ async function fetchJSON(path){
   return await r.json();
 }
 
-async function fetchXML(path){
-  try {
-        const r = await fetch(path + '?_=' + Date.now());
-        if (!r.ok) throw new Error(`HTTP Error: ${r.status} ${r.statusText}`);
-        const text = await r.text();
-        const parser = new DOMParser();
-        const xmlDoc = parser.parseFromString(text, 'application/xml');
-        if (xmlDoc.getElementsByTagName('parsererror').length > 0) throw new Error('XML Syntax Error');
-        return xmlDoc;
-    } catch(e) {
-        console.error("Fetch/Parse Error for XML:", e);
-        throw e; 
-    }
-}
-
-function getXMLText(elem, tag) {
-    const child = elem.querySelector(tag);
-    if (child && child.textContent) {
-        return child.textContent.trim();
-    }
-    return "";
-}
-
 function formatExperience(exp) {
     const num = parseInt(exp);
     return isNaN(num) || num === 0 ? '-' : new Intl.NumberFormat('en-US').format(num);
@@ -47,49 +24,14 @@ function translateClass(shortName) {
 
 // --- Функции за извличане на данни (Остават същите) ---
 
+// data/ladder_index.json се строи от 08_build_ladder.py: име -> най-добър ранг
+// (типове 27-34), вместо да теглим и парсваме целия d2ladder.xml.
 async function getExperienceFromLadder(charName) {
-    let xmlDoc;
-    try {
-        xmlDoc = await fetchXML('data/d2ladder.xml');
-    } catch(e) { return null; }
-    
-    if (!xmlDoc) return null;
-    
-    const charNameLower = cleanCharName(charName); 
-    let bestRankExp = null;
-    let bestRank = Infinity;
+    const index = await fetchJSON('data/ladder_index.json');
+    if (!index || !index.chars) return null;
 
-    const ladderEntries = xmlDoc.querySelectorAll('ladder');
-    
-    for (const ladder of ladderEntries) {
-        const ladderType = getXMLText(ladder, 'type');
-        const typeId = parseInt(ladderType);
-
-        if (typeId < 27 || typeId > 34) {
-            continue; 
-        }
-
-        const charEntries = ladder.querySelectorAll('char');
-        for (const entry of charEntries) {
-            const nameElement = entry.querySelector('name');
-            
-            if (nameElement && cleanCharName(nameElement.textContent) === charNameLower) {
-                const expElement = entry.querySelector('experience');
-                const rankElement = entry.querySelector('rank');
-                
-                if (expElement && rankElement) {
-                    const currentRank = parseInt(rankElement.textContent.trim());
-                    
-                    if (currentRank < bestRank) {
-                        bestRank = currentRank;
-                        bestRankExp = formatExperience(expElement.textContent.trim());
-                    }
-                }
-            }
-        }
-    }
-    
-    return bestRankExp; 
+    const best = index.chars[cleanCharName(charName)];
+    return best ? formatExperience(best.experience) : null;
 }
 
 
@@ -103,14 +45,17 @@ function cleanCharName(name) {
     return name.toLowerCase().trim().replace(/\s+/g, '');
 }
 
-function findCharStats(charNameLower, allItemsData) {
-    if (!allItemsData || !allItemsData.rows) return null;
-    
-    const targetRow = allItemsData.rows.find(row => 
-        row.charname && cleanCharName(row.charname) === charNameLower
-    );
-    
-    return targetRow; // Връща целия обект с items и stats
+// Редът на един герой от data/items/<име>.json (07.generate_items_json.py).
+// index.json е малък и винаги пресен; shard-ът се тегли с ?v=<etag>, така че
+// браузърът го кешира, докато героят не се промени.
+async function loadCharItems(charNameLower) {
+    const index = await fetchJSON('data/items/index.json');
+    const etag = index && index.chars ? index.chars[charNameLower] : null;
+    if (!etag) return null;
+
+    const r = await fetch(`data/items/${encodeURIComponent(charNameLower)}.json?v=${etag}`);
+    if (!r.ok) return null;
+    return await r.json(); // Връща целия обект с items и stats
 }
 
 // --- НОВА ФУНКЦИЯ: Генериране на списък с предмети ---
@@ -157,7 +102,7 @@ function renderCategorizedItems(itemData) {
     html += '</div>';
     
     // Връщаме съдържанието, или съобщение, ако няма предмети
-    return itemsFound ? html : '<p style="text-align:center; color:#a0a0a0;">No classified items found in inventory/stash (based on all_items.json).</p>';
+    return itemsFound ? html : '<p style="text-align:center; color:#a0a0a0;">No classified items found in inventory/stash (based on data/items).</p>';
 }
 
 // ---------------------------------------------
@@ -171,11 +116,11 @@ async function loadCharInfo() {
     }
     
     // 1. Асинхронно зареждане на всички необходими данни
-    const [charData, ladderExp, allItemsData] = await Promise.all([
+    const [charData, ladderExp, allRowData] = await Promise.all([
         // Използваме името на героя за зареждане на charname.json
         fetchJSON(`data/${charName}.json`), 
         getExperienceFromLadder(charName),
-        fetchJSON('data/all_items.json') // Източникът на всичко
+        loadCharItems(charName) // Само shard-ът на този герой, не целия all_items.json
     ]);
 
     // 2. Обработка на основните данни
@@ -189,8 +134,7 @@ async function loadCharInfo() {
     const ci = charData.character_info;
     const ists = charData.item_stats || {};
     
-    // Извличаме целия ред от all_items.json, който съдържа items и stats
-    const allRowData = findCharStats(charName, allItemsData); 
+    // allRowData е редът на героя (items и stats) от data/items/
     const newStats = allRowData ? allRowData.char_stats || {} : {};
     const itemLists = allRowData || {}; // Използваме целия обект за списъци с предмети
     
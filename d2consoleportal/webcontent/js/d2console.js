@@ -50,13 +50,11 @@ async function loadServerUptime() {
         document.getElementById('server-uptime').textContent = 'N/A';
     }
     
-    // 2. PvPGN Uptime (от data/games.txt - XML)
+    // 2. PvPGN Uptime (от data/server.json - games.txt, парсван от server_info.py)
     try {
-        const resp = await fetch('data/games.txt'); 
-        const text = await resp.text();
-        const parser = new DOMParser();
-        const xml = parser.parseFromString(text, "text/xml");
-        const pvpgn_uptime_sec = parseInt(xml.querySelector('server > uptime').textContent);
+        const resp = await fetch('data/server.json?_=' + Date.now());
+        const server = await resp.json();
+        const pvpgn_uptime_sec = parseInt(server.uptime);
         document.getElementById('pvpgn-uptime').textContent = secondsToDhms(pvpgn_uptime_sec);
     } catch(e) {
         console.error("Error loading PvPGN Uptime:", e);
@@ -0,0 +1,218 @@
+// webstat.js - item report от data/webstat.json (finalstat/z1.weball_new.py)
+//
+// Файлът е компактен: предметите са индекси в data.names, акаунтите в data.accounts.
+// Търсенето ползва готовия индекс от генератора (data.tokens -> data.postings):
+// всяка дума от заявката е префикс-lookup (двоично търсене в сортираните думи),
+// резултатите се сечат и се пипат само редовете, чиято видимост се сменя.
+const DATA_URL = 'data/webstat.json';
+const EMPTY = '<i>—</i>';
+// Color palette per account (cycled)
+const PALETTE = ["#ffffff","#fffbe6","#f7fff2","#eef7ff","#fff0f6","#f9f5ff"];
+const WORD = /[\p{L}\p{N}_]+/gu;   // като \w в Python
+
+const table = document.getElementById('itemsTable');
+let data = null;
+let col = {};          // име на колона -> позиция в реда
+let setIds = null;     // индексите на set предметите
+let trs = [];          // ред id -> <tr>
+let visible = [];      // ред id -> показан ли е
+let sortCol = null;
+let sortDir = 1;
+
+function escapeHTML(str) {
+    return String(str).replace(/&/g, '&amp;')
+                      .replace(/</g, '&lt;')
+                      .replace(/>/g, '&gt;')
+                      .replace(/"/g, '&quot;')
+                      .replace(/'/g, '&#39;');
+}
+
+function names(ids) {
+    return ids.map(id => data.names[id]);
+}
+
+function joinSpan(ids, cls) {
+    if (!ids.length) return EMPTY;
+    return ids.map(id => cls ? `<span class='${cls}'>${escapeHTML(data.names[id])}</span>`
+                             : escapeHTML(data.names[id])).join(", ");
+}
+
+function uniqueSetCell(ids) {
+    if (!ids.length) return EMPTY;
+    return ids.map(id => `<span class='${setIds.has(id) ? 'set' : 'unique'}'>${escapeHTML(data.names[id])}</span>`).join(", ");
+}
+
+function charmsText(row) {
+    return `S:${row[col.charms_small].length}, L:${row[col.charms_large].length}, G:${row[col.charms_grand].length}`;
+}
+
+function rowHTML(row) {
+    const account = escapeHTML(data.accounts[row[col.account]]);
+    const color = PALETTE[row[col.account] % PALETTE.length];
+    return `<tr class='account-row' data-account='${account}' style='background:${color}'>` +
+        `<td>${account}</td>` +
+        `<td>${escapeHTML(row[col.charname])}</td>` +
+        `<td>${uniqueSetCell(row[col.unique_set])}</td>` +
+        `<td>${joinSpan(row[col.runes], 'rune')}</td>` +
+        `<td>${joinSpan(row[col.rings])}</td>` +
+        `<td>${joinSpan(row[col.belts])}</td>` +
+        `<td>${joinSpan(row[col.amulets])}</td>` +
+        `<td>${charmsText(row)}</td>` +
+        `<td>${joinSpan(row[col.weapons])}</td>` +
+        `<td>${joinSpan(row[col.armors])}</td>` +
+        `<td>${joinSpan(row[col.other])}</td>` +
+        `</tr>`;
+}
+
+async function loadItems() {
+    try {
+        const resp = await fetch(DATA_URL + '?_=' + Date.now());
+        if (!resp.ok) throw new Error(`HTTP Error: ${resp.status}`);
+        data = await resp.json();
+    } catch (e) {
+        table.tBodies[0].innerHTML = `<tr><td colspan="11" style="text-align:center; color:red;">
+            Error loading item data from ${DATA_URL}: ${escapeHTML(e.message)}</td></tr>`;
+        console.error("Item data load error:", e);
+        return;
+    }
+    data.columns.forEach((name, i) => { col[name] = i; });
+    setIds = new Set(data.sets);
+    document.getElementById('generated').textContent = data.generated;
+
+    // Един innerHTML за цялата таблица вместо DOM операция на клетка
+    const tbody = table.tBodies[0];
+    tbody.innerHTML = data.rows.map(rowHTML).join("");
+    trs = Array.from(tbody.rows);
+    visible = trs.map(() => true);
+}
+
+// --- search: prefix lookup в data.tokens ---
+
+function lowerBound(tokens, word) {
+    let lo = 0, hi = tokens.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (tokens[mid] < word) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+}
+
+// Редовете с дума, която започва с word
+function lookup(word) {
+    const rows = new Set();
+    for (let i = lowerBound(data.tokens, word); i < data.tokens.length && data.tokens[i].startsWith(word); i++) {
+        for (const id of data.postings[i]) rows.add(id);
+    }
+    return rows;
+}
+
+function setVisible(id, show) {
+    if (visible[id] === show) return;
+    visible[id] = show;
+    trs[id].style.display = show ? '' : 'none';
+}
+
+function filterTable() {
+    if (!data) return;
+    const words = document.getElementById('searchInput').value.toLowerCase().match(WORD);
+    if (!words) {
+        trs.forEach((_, id) => setVisible(id, true));
+        return;
+    }
+    // Сечение: всяка дума от заявката трябва да съвпадне (като префикс) в реда
+    let match = null;
+    for (const word of words) {
+        const rows = lookup(word);
+        match = match === null ? rows : new Set([...match].filter(id => rows.has(id)));
+        if (!match.size) break;
+    }
+    trs.forEach((_, id) => setVisible(id, match.has(id)));
+}
+
+function expandAll() {
+    trs.forEach((_, id) => setVisible(id, true));
+}
+function collapseAll() {
+    trs.forEach((_, id) => setVisible(id, false));
+}
+
+// --- sorting (по текста на клетката, както досега) ---
+
+function sortText(row, name) {
+    switch (name) {
+        case 'account': return data.accounts[row[col.account]];
+        case 'charname': return row[col.charname];
+        case 'charms': return charmsText(row);
+        default: {
+            const ids = row[col[name]];
+            return ids.length ? names(ids).join(", ") : "—";
+        }
+    }
+}
+
+function sortTableBy(name) {
+    if (!data) return;
+    if (sortCol === name) sortDir *= -1; else { sortDir = 1; sortCol = name; }
+    const keys = data.rows.map(row => sortText(row, name));
+    const order = trs.map((_, id) => id);
+    order.sort((a, b) => (keys[a] < keys[b] ? -1 : keys[a] > keys[b] ? 1 : 0) * sortDir);
+    const tbody = table.tBodies[0];
+    const fragment = document.createDocumentFragment();
+    for (const id of order) fragment.appendChild(trs[id]);
+    tbody.appendChild(fragment);
+}
+
+document.querySelectorAll('th[data-col]').forEach(th => {
+    th.addEventListener('click', () => sortTableBy(th.getAttribute('data-col')));
+});
+
+// --- exports: същият формат като досегашните items_export.json / items_export.csv ---
+
+function exportRows() {
+    return data.rows.map(row => {
+        const out = {
+            account: data.accounts[row[col.account]],
+            charfile: row[col.charfile],
+            charname: row[col.charname],
+            unique_set: row[col.unique_set].map(id => [data.names[id], setIds.has(id) ? 'set' : 'unique']),
+        };
+        data.columns.slice(col.unique_set + 1).forEach(name => { out[name] = names(row[col[name]]); });
+        return out;
+    });
+}
+
+// json.dumps(..., ensure_ascii=False) от стария CSV: ", " между елементите
+function pyJSON(value) {
+    return Array.isArray(value) ? "[" + value.map(pyJSON).join(", ") + "]" : JSON.stringify(value);
+}
+
+function csvField(value) {
+    const s = String(value);
+    return /[",\r\n]/.test(s) ? '"' + s.replace(/"/g, '""') + '"' : s;
+}
+
+function exportJSON() {
+    if (!data) return;
+    const s = JSON.stringify({generated: data.generated, rows: exportRows()}, null, 2);
+    downloadBlob(s, 'items_export.json', 'application/json');
+}
+function exportCSV() {
+    if (!data) return;
+    const lines = [data.columns.join(",")];
+    for (const r of exportRows()) {
+        lines.push(data.columns.map(name => csvField(
+            typeof r[name] === 'string' ? r[name] : pyJSON(r[name]))).join(","));
+    }
+    downloadBlob(lines.join("\r\n") + "\r\n", 'items_export.csv', 'text/csv');
+}
+function downloadBlob(content, filename, mime) {
+    const blob = new Blob([content], {type: mime});
+    const url = URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = filename;
+    a.click();
+    URL.revokeObjectURL(url);
+}
+
+loadItems();
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 """
-Parse cleaned game info and build JSON
-- Input: gameinfo_clean.txt
+Parse raw bnchat output and build JSON - one streaming pass, no awk/sed/tr/grep
+- Input: gameinfo_raw.txt (raw bnchat log from bnchat_collect.py gameinfo)
 - Output: gameinfo.json
+
+With --games-list: bnchat_raw.txt (bnchat_collect.py games) -> games_list.txt,
+the list of open games for bnchat_collect.py gameinfo (was 02_clear_games.sh).
 """
 
+import argparse
 import json
 import time
 import re
@@ -13,84 +17,166 @@ import os
 # ----------------------------
 # CONFIG
 # ----------------------------
-RAW_FILE = "/usr/local/pvpgn/tools/finalstat/logs/gameinfo_clean.txt"
-JSON_FILE = "/usr/local/pvpgn/tools/finalstat/logs/gameinfo.json"
+LOG_DIR = "/usr/local/pvpgn/tools/finalstat/logs"
+RAW_FILE = os.path.join(LOG_DIR, "gameinfo_raw.txt")
+JSON_FILE = os.path.join(LOG_DIR, "gameinfo.json")
+BNCHAT_RAW_FILE = os.path.join(LOG_DIR, "bnchat_raw.txt")
+GAMES_LIST = os.path.join(LOG_DIR, "games_list.txt")
 
-# ----------------------------
-# Regex patterns
-# ----------------------------
-re_name       = re.compile(r'<Info>\s*Name:\s*(.+?)\s+ID:')
-re_owner      = re.compile(r'<Info>\s*Owner:\s*(.+)')
-re_address    = re.compile(r'<Info>\s*Address:\s*(.+)')
-re_client     = re.compile(r'<Info>\s*Client:\s*(.+)')
-re_created    = re.compile(r'<Info>\s*Created:\s*(.*)')
-re_started    = re.compile(r'<Info>\s*Started:\s*(.*)')
-re_status     = re.compile(r'<Info>\s*Status:\s*(.+)')
-re_type       = re.compile(r'<Info>\s*Type:\s*(.+)')
-re_difficulty = re.compile(r'<Info>\s*Difficulty:\s*(.+)')
-re_players    = re.compile(r'<Info>\s*Players:\s*(\d+)\s*current,\s*(\d+)\s*total,\s*(\d+)\s*max')
+INFO = "<Info>"
 
 # ----------------------------
-# PARSE FILE
+# Field parsers: value after "<Info> Key:" -> {json key: value}
 # ----------------------------
-games = {}
-current_game = None
+re_name    = re.compile(r'(.+?)\s+ID:')
+re_players = re.compile(r'(\d+)\s*current,\s*(\d+)\s*total,\s*(\d+)\s*max')
+# "/games" ред: "<Info> <game> n open ..." (n = normal, p = password)
+re_game_row = re.compile(r'<Info>[ \t]+([A-Za-z0-9]+)[ \t]+[np] open')
+
+
+def text_field(key, allow_empty=False):
+    def parse(value):
+        if value or allow_empty:
+            return {key: value}
+        return None
+    return parse
+
+
+def players_field(value):
+    m = re_players.match(value)
+    if m:
+        return {
+            'Players_current': int(m.group(1)),
+            'Players_total': int(m.group(2)),
+            'Players_max': int(m.group(3)),
+        }
+    return None
 
-if not os.path.exists(RAW_FILE):
-    print(f"Error: {RAW_FILE} not found!")
-    exit(1)
 
-with open(RAW_FILE, "r", encoding="utf-8") as f:
-    for line in f:
-        line = line.strip()
-        if not line.startswith("<Info>"):
+FIELDS = {
+    'Owner': text_field('Owner'),
+    'Address': text_field('Address'),
+    'Client': text_field('Client'),
+    'Created': text_field('Created', allow_empty=True),
+    'Started': text_field('Started', allow_empty=True),
+    'Status': text_field('Status'),
+    'Type': text_field('Type'),
+    'Difficulty': text_field('Difficulty'),
+    'Players': players_field,
+}
+
+
+def info_fields(lines):
+    """
+    (key, value) for every "<Info> Key: value" line. The terminal noise ('\\r',
+    the ']' prompt, anything before the last <Info>) is dropped inline.
+    """
+    for line in lines:
+        pos = line.rfind(INFO)
+        if pos < 0:
             continue  # skip irrelevant lines
+        rest = line[pos + len(INFO):]
+        if "\r" in rest:
+            rest = rest.replace("\r", "")
+        key, sep, value = rest.lstrip().partition(":")
+        if sep:
+            yield key, value.strip()
+
 
+# ----------------------------
+# PARSE FILE
+# ----------------------------
+def parse_gameinfo(lines):
+    games = {}
+    current_game = None
+    for key, value in info_fields(lines):
         # Start of a new game block
-        if "<Info> Name:" in line:
-            m = re_name.search(line)
+        if key == 'Name':
+            m = re_name.match(value)
             if m:
-                current_game = m.group(1).strip()
-                games[current_game] = {}
+                current_game = games[m.group(1).strip()] = {}
             else:
                 current_game = None
             continue
 
-        if current_game:
-            # Match each field
-            for pattern, key in [
-                (re_owner, 'Owner'),
-                (re_address, 'Address'),
-                (re_client, 'Client'),
-                (re_created, 'Created'),
-                (re_started, 'Started'),
-                (re_status, 'Status'),
-                (re_type, 'Type'),
-                (re_difficulty, 'Difficulty'),
-                (re_players, ('Players_current', 'Players_total', 'Players_max'))
-            ]:
-                m = pattern.search(line)
-                if m:
-                    if isinstance(key, tuple):
-                        games[current_game][key[0]] = int(m.group(1))
-                        games[current_game][key[1]] = int(m.group(2))
-                        games[current_game][key[2]] = int(m.group(3))
-                    else:
-                        games[current_game][key] = m.group(1).strip()
+        if current_game is not None:
+            parse = FIELDS.get(key)
+            if parse:
+                fields = parse(value)
+                if fields:
+                    current_game.update(fields)
+    return games
 
-# ----------------------------
-# BUILD JSON
-# ----------------------------
-data = {
-    "last_updated": time.strftime("%Y-%m-%d %H:%M:%S"),
-    "games": games
-}
 
-# Write JSON atomically
-tmp_file = JSON_FILE + ".tmp"
-with open(tmp_file, "w", encoding="utf-8") as f:
-    json.dump(data, f, indent=2)
+def parse_games_list(lines):
+    names = []
+    for line in lines:
+        line = line.replace("\r", "").strip()
+        if line.startswith("]"):
+            line = line[1:].lstrip()
+        m = re_game_row.match(line)
+        if m:
+            names.append(m.group(1))
+    return names
+
+
+def write_atomic(path, text):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def load_previous(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def open_log(path):
+    if not os.path.exists(path):
+        print(f"Error: {path} not found!")
+        exit(1)
+    # bnchat пише каквото дойде от сървъра - невалидният UTF-8 не спира парсването
+    return open(path, "r", encoding="utf-8", errors="replace", newline="\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build gameinfo.json (or games_list.txt) from raw bnchat logs")
+    parser.add_argument("--games-list", action="store_true",
+                        help=f"extract open game names from {BNCHAT_RAW_FILE} into {GAMES_LIST}")
+    args = parser.parse_args()
+
+    if args.games_list:
+        with open_log(BNCHAT_RAW_FILE) as f:
+            names = parse_games_list(f)
+        write_atomic(GAMES_LIST, "".join(f"{name}\n" for name in names))
+        print(f"Game list saved to: {GAMES_LIST} ({len(names)} games)")
+        return
+
+    with open_log(RAW_FILE) as f:
+        games = parse_gameinfo(f)
+
+    # Същите игри -> файлът (и last_updated) остава; build_cache.py не пуска 06_build_html.py наново
+    previous = load_previous(JSON_FILE)
+    if isinstance(previous, dict) and previous.get("games") == games:
+        print(f"Parsed {len(games)} games, unchanged - {JSON_FILE} kept")
+        return
+
+    # ----------------------------
+    # BUILD JSON
+    # ----------------------------
+    data = {
+        "last_updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "games": games
+    }
+
+    # Write JSON atomically
+    write_atomic(JSON_FILE, json.dumps(data, indent=2))
+    print(f"Parsed {len(games)} games into {JSON_FILE}")
 
-os.replace(tmp_file, JSON_FILE)
-print(f"Parsed {len(games)} games into {JSON_FILE}")
 
+if __name__ == "__main__":
+    main()
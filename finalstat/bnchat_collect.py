@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+bnchat collection without expect and fixed sleeps
+(replaces 01_collect_games.sh and 03_collect_gameinfo.sh)
+
+bnchat runs on a pty, as under expect, and its output is read asynchronously
+line by line. A /gameinfo block ends with its "Players:" line (or an <Error>
+for a game that is already gone), so the next request goes out as soon as an
+answer is in, with at most --in-flight requests outstanding. Login and the
+end of the /games batch are confirmed by a whisper to ourselves, so the run
+takes as long as the server needs instead of 1-2 s per command.
+
+Everything bnchat prints is appended to the same raw logs as before
+(bnchat_raw.txt / gameinfo_raw.txt), so 05_build_json.py does not change.
+
+    python3 bnchat_collect.py games       # /players /games /channels /info -> bnchat_raw.txt
+    python3 bnchat_collect.py gameinfo    # /gameinfo for every game in games_list.txt
+    python3 bnchat_collect.py gameinfo --bnchat "python3 fake_bnchat.py --games 40 --rtt 0.05"
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import os
+import pty
+import shlex
+import sys
+import time
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+LOG_DIR = "/usr/local/pvpgn/tools/finalstat/logs"
+BNCHAT_RAW_FILE = os.path.join(LOG_DIR, "bnchat_raw.txt")
+GAMEINFO_RAW_FILE = os.path.join(LOG_DIR, "gameinfo_raw.txt")
+GAMES_LIST = os.path.join(LOG_DIR, "games_list.txt")
+
+BNCHAT_CMD = ["/usr/local/pvpgn/bin/bnchat", "--client=D2XP", "192.168.88.41", "6112"]
+USERNAME = "webstat"
+PASSWORD = "aman"
+
+GAMES_COMMANDS = ("/players", "/games", "/channels", "/info")
+IN_FLIGHT = 4          # /gameinfo заявки без отговор едновременно
+REQUEST_TIMEOUT = 10   # секунди за един отговор, после продължаваме без него
+LOGIN_TIMEOUT = 20     # като "set timeout 20" в expect скриптовете
+SYNC_RETRY = 1.0       # повторен whisper, докато bnchat още не приема команди
+
+
+class BnchatSession:
+    """bnchat на pty; всичко прочетено отива и в raw лога."""
+
+    def __init__(self, command, log_path, username=USERNAME, password=PASSWORD):
+        self.command = command
+        self.log_path = log_path
+        self.username = username
+        self.password = password
+        self.proc = None
+        self.master = None
+        self.log = None
+        self.partial = bytearray()     # незавършеният ред (там са "Username:"/"Password:" prompt-овете)
+        self.changed = asyncio.Event()
+        self.eof = asyncio.Event()
+        self.answers = collections.deque()   # futures на /gameinfo заявките по реда на изпращане
+        self.syncs = {}                      # token -> future
+        self.tokens = itertools.count(1)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.log = open(self.log_path, "ab")
+        self.master, slave = pty.openpty()
+        try:
+            self.proc = await asyncio.create_subprocess_exec(
+                *self.command, stdin=slave, stdout=slave, stderr=slave, start_new_session=True)
+        except OSError as e:
+            os.close(self.master)
+            raise ConnectionError(f"Cannot start {self.command[0]}: {e}")
+        finally:
+            os.close(slave)
+        loop.add_reader(self.master, self._on_readable)
+
+        deadline = time.monotonic() + LOGIN_TIMEOUT
+        await self._prompt(b"Username:", deadline)
+        self.send(self.username)
+        await self._prompt(b"Password:", deadline)
+        self.send(self.password)
+        # Вместо "sleep 1": готови сме, когато whisper до нас самите се върне
+        await self.sync(deadline - time.monotonic())
+
+    def send(self, line):
+        os.write(self.master, line.encode("utf-8") + b"\r")
+
+    # --- четене ---
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.master, 65536)
+        except OSError:   # EIO: bnchat е излязъл и pty-то е затворено
+            data = b""
+        if not data:
+            asyncio.get_running_loop().remove_reader(self.master)
+            self.eof.set()
+            self.changed.set()
+            return
+        self.log.write(data)
+        self.partial += data
+        *lines, rest = self.partial.split(b"\n")
+        self.partial = bytearray(rest)
+        for line in lines:
+            self._on_line(line.decode("utf-8", "replace"))
+        self.changed.set()
+
+    def _on_line(self, line):
+        if "\r" in line:
+            line = line.replace("\r", "")
+        # Край на /gameinfo блок: "<Info> Players: ..." или грешка ("That game does not exist")
+        pos = line.rfind("<Info>")
+        if (pos >= 0 and line[pos + 6:].lstrip().startswith("Players:")) or "<Error>" in line:
+            while self.answers:
+                answer = self.answers.popleft()
+                if not answer.done():
+                    answer.set_result(time.monotonic())
+                    break
+        if self.syncs and "/w " not in line:   # не ехото на собствената ни команда
+            for token, future in list(self.syncs.items()):
+                if token in line and not future.done():
+                    future.set_result(time.monotonic())
+
+    async def _prompt(self, prompt, deadline):
+        while prompt not in self.partial:
+            if self.eof.is_set():
+                raise ConnectionError(f"bnchat exited before '{prompt.decode()}'")
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                raise ConnectionError(f"No '{prompt.decode()}' prompt from bnchat")
+        self.partial.clear()
+
+    # --- заявки ---
+
+    async def sync(self, timeout):
+        """Whisper до себе си с уникален token; връща се, когато сървърът го препрати."""
+        token = f"sync{os.getpid()}x{next(self.tokens)}"
+        future = self.syncs[token] = asyncio.get_running_loop().create_future()
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                self.send(f"/w {self.username} {token}")
+                try:
+                    await asyncio.wait_for(asyncio.shield(future),
+                                           min(SYNC_RETRY, max(0.0, deadline - time.monotonic())))
+                    return
+                except asyncio.TimeoutError:
+                    if self.eof.is_set() or time.monotonic() >= deadline:
+                        raise ConnectionError("bnchat did not answer (login failed or server down)")
+        finally:
+            del self.syncs[token]
+
+    async def gameinfo(self, games, in_flight=IN_FLIGHT, timeout=REQUEST_TIMEOUT):
+        """/gameinfo за всички игри; следващата заявка тръгва веднага щом има свободно място."""
+        loop = asyncio.get_running_loop()
+        window = asyncio.Semaphore(in_flight)
+        latencies = []
+        missed = []
+
+        async def request(name):
+            async with window:
+                if self.eof.is_set():
+                    missed.append(name)
+                    return
+                answer = loop.create_future()
+                self.answers.append(answer)
+                sent = time.monotonic()
+                self.send(f"/gameinfo {name}")
+                try:
+                    latencies.append(await asyncio.wait_for(asyncio.shield(answer), timeout) - sent)
+                except asyncio.TimeoutError:
+                    # Изгубен отговор - късният ще освободи следващата заявка, което е безопасно
+                    if answer in self.answers:
+                        self.answers.remove(answer)
+                    missed.append(name)
+
+        await asyncio.gather(*(request(name) for name in games))
+        return latencies, missed
+
+    async def close(self):
+        if self.proc is None:
+            return
+        if self.proc.returncode is None and not self.eof.is_set():
+            try:
+                self.send("/exit")
+            except OSError:
+                pass
+        try:
+            await asyncio.wait_for(self.proc.wait(), 5)
+        except asyncio.TimeoutError:
+            self.proc.kill()
+            await self.proc.wait()
+        try:
+            await asyncio.wait_for(self.eof.wait(), 1)   # каквото е останало в pty-то
+        except asyncio.TimeoutError:
+            asyncio.get_running_loop().remove_reader(self.master)
+        os.close(self.master)
+        self.log.close()
+
+
+def read_games_list(path=GAMES_LIST):
+    if not os.path.exists(path):
+        print(f"Game list file not found: {path}")
+        sys.exit(1)
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def collect_games(command, raw_file=BNCHAT_RAW_FILE):
+    session = BnchatSession(command, raw_file)
+    started = time.monotonic()
+    try:
+        await session.start()
+        for line in GAMES_COMMANDS:
+            session.send(line)
+        # Сървърът отговаря поред - whisper-ът се връща след изхода на всички команди
+        await session.sync(LOGIN_TIMEOUT)
+    finally:
+        await session.close()
+    print(f"[BNCHAT] {', '.join(GAMES_COMMANDS)} -> {raw_file} in {time.monotonic() - started:.2f}s")
+
+
+async def collect_gameinfo(command, in_flight, timeout, games_list=GAMES_LIST, raw_file=GAMEINFO_RAW_FILE):
+    """/gameinfo за всяка игра от games_list -> raw_file; връща (latencies, missed)."""
+    games = read_games_list(games_list)
+    session = BnchatSession(command, raw_file)
+    started = time.monotonic()
+    try:
+        await session.start()
+        latencies, missed = await session.gameinfo(games, in_flight, timeout)
+    finally:
+        await session.close()
+    average = sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+    print(f"[BNCHAT] /gameinfo for {len(latencies)}/{len(games)} games in {time.monotonic() - started:.2f}s "
+          f"(avg {average:.0f} ms per answer, {in_flight} in flight)")
+    if missed:
+        print(f"[BNCHAT] No answer for: {', '.join(missed)}")
+    return latencies, missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect bnchat /games and /gameinfo output without fixed sleeps")
+    parser.add_argument("--bnchat", help=f"bnchat command line (default: {shlex.join(BNCHAT_CMD)})")
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("games", help=f"{' '.join(GAMES_COMMANDS)} -> {BNCHAT_RAW_FILE}")
+    g = sub.add_parser("gameinfo", help=f"/gameinfo for every game in {GAMES_LIST} -> {GAMEINFO_RAW_FILE}")
+    g.add_argument("--in-flight", type=int, default=IN_FLIGHT, help="max outstanding /gameinfo requests")
+    g.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="seconds to wait for one answer")
+    args = parser.parse_args()
+
+    command = shlex.split(args.bnchat) if args.bnchat else BNCHAT_CMD
+    try:
+        if args.action == "games":
+            asyncio.run(collect_games(command))
+        else:
+            asyncio.run(collect_gameinfo(command, max(1, args.in_flight), args.timeout))
+    except ConnectionError as e:
+        print(f"[BNCHAT] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
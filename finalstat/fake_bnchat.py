@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Fake bnchat (client + PvPGN server in one) for offline tests of bnchat_collect.py.
+
+Talks on stdin/stdout like bnchat on a terminal: Username:/Password: prompts,
+"<Info>"/"<Error>" lines and the "]" prompt. Answers /games, /gameinfo,
+/players, /channels, /w and /exit for N synthetic games.
+
+    python3 bnchat_collect.py gameinfo --bnchat "python3 fake_bnchat.py --games 40 --rtt 0.05"
+
+--rtt delays every answer without blocking the next command (network latency);
+--cost is the serial per-command cost (server CPU).
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+DIFFICULTIES = ("Normal", "Nightmare", "Hell")
+
+
+def synthetic_games(count):
+    games = {}
+    for n in range(1, count + 1):
+        name = f"Game{n:03d}"
+        players = n % 8 + 1
+        games[name] = [
+            f"Name: {name:<20}    ID: {100 + n:8d} (public)",
+            f"Owner: acc{n}",
+            f"Address: 10.0.{n % 250}.1:6113",
+            "Client: D2XP (version 1.14.3.71, startver 0)",
+            "Created: Sat Oct 18 10:00:00 2026",
+            "Started: Sat Oct 18 10:01:00 2026" if n % 3 else "Started: ",
+            "Status: started",
+            "Type: Diablo II Closed",
+            "Speed: unknown",
+            f"Difficulty: {DIFFICULTIES[n % 3]}",
+            "Option: none",
+            "Map: ",
+            f"Players: {players} current, {players + 1} total, 8 max",
+        ]
+    return games
+
+
+class FakeBnchat:
+    def __init__(self, games, username, password, rtt=0.0, cost=0.0):
+        self.games = games
+        self.username = username
+        self.password = password
+        self.rtt = rtt
+        self.cost = cost
+        self.queue = asyncio.Queue()
+        self.done = asyncio.Event()
+
+    def write(self, text):
+        os.write(sys.stdout.fileno(), text.encode("utf-8"))
+
+    def answer(self, lines):
+        text = "".join(f"\r{line}\n" for line in lines) + "] "
+        if self.rtt:
+            asyncio.get_running_loop().call_later(self.rtt, self.write, text)
+        else:
+            self.write(text)
+
+    def reply(self, command):
+        verb, _, arg = command.partition(" ")
+        arg = arg.strip()
+        if verb == "/gameinfo":
+            if arg in self.games:
+                return ["<Info> " + line for line in self.games[arg]]
+            return ["<Error> That game does not exist."]
+        if verb == "/games":
+            return ["<Info>  ------name------ p -status- --------type--------- count"] + [
+                f"<Info> {name:<16} n open     {'Diablo II Closed':<21} {n % 8 + 1:5d}"
+                for n, name in enumerate(self.games, 1)]
+        if verb == "/players":
+            return [f"<Info> {self.username} (D2XP)"]
+        if verb == "/channels":
+            return ["<Info> -----------name----------- users ----admin/operator----", "<Info> Diablo II                      1"]
+        if verb == "/w":
+            to, _, text = arg.partition(" ")
+            return [f"<To: {to}> {text}", f"<From: {self.username}> {text}"]
+        return ["<Error> Unknown command."]
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        lines = asyncio.Queue()
+        buffer = bytearray()
+
+        def on_stdin():
+            data = os.read(sys.stdin.fileno(), 4096)
+            if not data:
+                loop.remove_reader(sys.stdin.fileno())
+                lines.put_nowait(None)
+                return
+            buffer.extend(data)
+            while b"\n" in buffer:
+                line, _, rest = bytes(buffer).partition(b"\n")
+                buffer[:] = rest
+                lines.put_nowait(line.decode("utf-8", "replace").strip())
+
+        loop.add_reader(sys.stdin.fileno(), on_stdin)
+        self.write("Username: ")
+        user = await lines.get()
+        self.write("Password: ")
+        password = await lines.get()
+        if user != self.username or password != self.password:
+            self.write("\rLogin failed.\n")
+            return
+        await asyncio.sleep(self.rtt * 3)   # bnet logon + join на канала
+        self.answer(["Joining channel: \"Diablo II\"", "<Info> Welcome to the fake PvPGN realm"])
+
+        while True:
+            command = await lines.get()
+            if command is None or command == "/exit":
+                if self.rtt:
+                    await asyncio.sleep(self.rtt)   # нека изпратените отговори излязат
+                return
+            if not command:
+                continue
+            if self.cost:
+                await asyncio.sleep(self.cost)
+            self.answer(self.reply(command))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake bnchat for offline tests")
+    parser.add_argument("target", nargs="*", help="host/port, ignored")
+    parser.add_argument("--client", default="D2XP", help="ignored")
+    parser.add_argument("--games", type=int, default=2)
+    parser.add_argument("--username", default="webstat")
+    parser.add_argument("--password", default="aman")
+    parser.add_argument("--rtt", type=float, default=0.0, help="per-answer network delay, seconds")
+    parser.add_argument("--cost", type=float, default=0.0, help="serial per-command cost, seconds")
+    args = parser.parse_args()
+    fake = FakeBnchat(synthetic_games(args.games), args.username, args.password, args.rtt, args.cost)
+    try:
+        asyncio.run(fake.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
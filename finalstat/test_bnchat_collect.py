@@ -0,0 +1,117 @@
+"""
+Tests for bnchat_collect.py against fake_bnchat.py (no bnchat binary or realm needed).
+
+    python3 -m unittest discover -s finalstat      # or: python3 -m pytest finalstat
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bnchat_collect import BnchatSession, collect_gameinfo
+
+# 05_build_json.py не е валидно име на модул - зарежда се по път
+_spec = importlib.util.spec_from_file_location("build_json", os.path.join(HERE, "05_build_json.py"))
+build_json = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(build_json)
+
+FAKE_BNCHAT = [sys.executable, os.path.join(HERE, "fake_bnchat.py")]
+PLAYERS = "<Info> Players: 1 current, 2 total, 8 max"
+
+
+class CollectGameinfoTest(unittest.TestCase):
+    """Пълен run: fake_bnchat.py --rtt на pty, временни логове, после 05_build_json.parse_gameinfo."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.games_list = os.path.join(self.tmp.name, "games_list.txt")
+        self.raw_file = os.path.join(self.tmp.name, "gameinfo_raw.txt")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def collect(self, names, games, in_flight=4, rtt=0.02):
+        with open(self.games_list, "w", encoding="utf-8") as f:
+            f.write("".join(f"{name}\n" for name in names))
+        command = FAKE_BNCHAT + ["--games", str(games), "--rtt", str(rtt)]
+        latencies, missed = asyncio.run(collect_gameinfo(command, in_flight, 5, self.games_list, self.raw_file))
+        with open(self.raw_file, encoding="utf-8", errors="replace") as f:
+            parsed = build_json.parse_gameinfo(f)
+        return latencies, missed, parsed
+
+    def test_all_games_parsed(self):
+        names = [f"Game{n:03d}" for n in range(1, 13)]
+        latencies, missed, parsed = self.collect(names, games=12)
+        self.assertEqual(missed, [])
+        self.assertEqual(len(latencies), len(names))
+        self.assertEqual(sorted(parsed), names)
+        # Game005: n % 8 + 1 = 6 играчи, n % 3 = 2 -> Hell (виж fake_bnchat.synthetic_games)
+        self.assertEqual(parsed["Game005"]["Players_current"], 6)
+        self.assertEqual(parsed["Game005"]["Difficulty"], "Hell")
+        self.assertEqual(parsed["Game005"]["Owner"], "acc5")
+
+    def test_missing_game_answers_with_error(self):
+        # <Error> за изчезнала игра също е отговор - не чакаме timeout-а за нея
+        latencies, missed, parsed = self.collect(["Game001", "Gone", "Game002"], games=2, in_flight=1)
+        self.assertEqual(missed, [])
+        self.assertEqual(len(latencies), 3)
+        self.assertEqual(sorted(parsed), ["Game001", "Game002"])
+
+
+class GameinfoWindowTest(unittest.TestCase):
+    """BnchatSession.gameinfo без процес: send() се записва, отговорите се подават с _on_line()."""
+
+    def run_session(self, games, in_flight, timeout, script):
+        async def main():
+            session = BnchatSession(["bnchat"], os.devnull)
+            sent = []
+            session.send = sent.append
+            task = asyncio.ensure_future(session.gameinfo(games, in_flight, timeout))
+            await script(session, sent)
+            return await task, sent
+        return asyncio.run(main())
+
+    def test_in_flight_limit_and_fifo(self):
+        async def script(session, sent):
+            await asyncio.sleep(0.01)
+            # Само in_flight заявки без отговор
+            self.assertEqual(sent, ["/gameinfo g1", "/gameinfo g2"])
+            session._on_line(PLAYERS)
+            await asyncio.sleep(0.01)
+            self.assertEqual(sent, ["/gameinfo g1", "/gameinfo g2", "/gameinfo g3"])
+            # Отговорите се свързват със заявките по реда на изпращане
+            self.assertEqual(len(session.answers), 2)
+            first = session.answers[0]
+            session._on_line("<Error> That game does not exist.")
+            self.assertTrue(first.done())
+            session._on_line(PLAYERS)
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(sent), 4)
+            session._on_line("]" + PLAYERS)
+
+        (latencies, missed), sent = self.run_session(["g1", "g2", "g3", "g4"], 2, 5, script)
+        self.assertEqual(missed, [])
+        self.assertEqual(len(latencies), 4)
+
+    def test_timeout_moves_on(self):
+        async def script(session, sent):
+            await asyncio.sleep(0.01)
+            self.assertEqual(sent, ["/gameinfo g1"])
+            # g1 няма отговор - след timeout-а махаме неговия future и тръгва g2
+            await asyncio.sleep(0.15)
+            self.assertEqual(sent, ["/gameinfo g1", "/gameinfo g2"])
+            self.assertEqual(len(session.answers), 1)
+            session._on_line(PLAYERS)
+
+        (latencies, missed), sent = self.run_session(["g1", "g2"], 1, 0.1, script)
+        self.assertEqual(missed, ["g1"])
+        self.assertEqual(len(latencies), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,10 +4,15 @@
 # Requires: d2lib (pip install d2lib)
 
 from d2lib.files import D2SFile
-import os, glob, html, json, csv
+import os, sys, glob, html, json, csv
 from datetime import datetime
 from collections import defaultdict
 
+# Общите модули (индексът герой -> акаунт, класификаторът на предмети) са в newconsoled2/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "newconsoled2"))
+from account_index import build_account_index
+import item_classifier
+
 # CONFIG
 CHAR_DIR = "/usr/local/pvpgn/var/pvpgn/charsave"
 CHARINFO_DIR = "/usr/local/pvpgn/var/pvpgn/charinfo"
@@ -17,107 +22,46 @@ OUTPUT_CSV = "/var/www/html/pvpgn_items.csv"
 
 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-# Heuristic category mapping by item.code prefix or substring in name.
-# Extend as you discover more base codes.
-CATEGORY_MAP = {
-    "amu": "Amulet",
-    "ring": "Ring",
-    "rin": "Ring",
-    "bel": "Belt",
-    "belt": "Belt",
-    "cm": "Charm",     # charms often code like cm1 / cm2 / cm3 in some parsers
-    "charm": "Charm",
-    "wxp": "Weapon",   # placeholder
-    "swd": "Weapon",
-    "axe": "Weapon",
-    "axe": "Weapon",
-    "bow": "Weapon",
-    "jew": "Jewel",
-    "amu": "Amulet",
-    "tkb": "Book",
-    "tbk": "Book",
-    "orb": "Orb",
-    "shld": "Shield",
-    "shm": "Shield",
-    "hel": "Helmet",
-    "cap": "Helmet",
-    "arm": "Armor",
-    "armor": "Armor",
-    "glv": "Gloves",
-    "gth": "Gloves",
-    "boots": "Boots",
-    # add more as needed
+# Report label per item_classifier type (newconsoled2/item_classifier.py - full base code table,
+# name heuristics only for unknown codes)
+TYPE_LABEL = {
+    "weapon": "Weapon", "helmet": "Helmet", "armor": "Armor", "shield": "Shield",
+    "gloves": "Gloves", "boots": "Boots", "belt": "Belt", "ring": "Ring", "amulet": "Amulet",
+    "charm": "Charm", "charm_small": "Charm", "charm_large": "Charm", "charm_grand": "Charm",
+    "jewel": "Jewel", "rune": "Rune", "gem": "Gem", "potion": "Potion", "scroll": "Scroll",
+    "book": "Book", "ammo": "Ammo", "key": "Key", "gold": "Gold", "quest": "Quest", "ear": "Ear",
 }
 
-# Charm size mapping heuristics (you can refine)
-CHARM_SIZE_MAP = {
-    # these codes/names are heuristic; update when you find exact mapping
-    "grand": ["Annihilus", "Gheed's Fortune"], # example uniques that are small grand? adjust as needed
-    # If item.name contains "small charm" or code contains some marker, place accordingly
-}
+# helper: account owning the char - one scandir walk of charinfo per run (newconsoled2/account_index.py)
+ACCOUNT_INDEX = build_account_index(CHARINFO_DIR)
 
-# helper: find the account owning the char by scanning charinfo folder
 def find_account_for_character(char_name):
-    try:
-        for account in os.listdir(CHARINFO_DIR):
-            acc_path = os.path.join(CHARINFO_DIR, account)
-            if not os.path.isdir(acc_path):
-                continue
-            try:
-                if char_name in os.listdir(acc_path):
-                    return account
-            except Exception:
-                continue
-    except Exception:
-        pass
-    return "Unknown"
+    return ACCOUNT_INDEX.get(char_name, "Unknown")
 
-# helper: determine category using item attributes + name heuristics
-def determine_category(item):
-    # try common attributes
-    code = None
+# helper: item base code (d2lib: .code)
+def item_code(item):
     for attr in ("code", "basecode", "base_code", "base_item", "base_item_code"):
-        code = getattr(item, attr, None)
-        if code:
-            # ensure code is string
-            code = str(code).lower()
-            break
+        val = getattr(item, attr, None)
+        if val:
+            return str(val)
+    return None
 
-    name = getattr(item, "name", "")
+# helper: item name as str
+def item_name(item):
+    name = getattr(item, "name", None) or ""
     if isinstance(name, bytes):
-        try:
-            name = name.decode("utf-8", errors="ignore")
-        except Exception:
-            name = str(name)
-
-    nlower = (name or "").lower()
-
-    # check code-based mapping
-    if code:
-        for key, cat in CATEGORY_MAP.items():
-            if key in code:
-                return cat
-    # fallback: name-based mapping
-    for key, cat in CATEGORY_MAP.items():
-        if key in nlower:
-            return cat
-
-    # weapons detection from name keywords
-    WEAPON_KEYWORDS = ("sword", "axe", "dagger", "bow", "spear", "mace", "staff", "hammer", "flail", "bow")
-    ARMOR_KEYWORDS = ("armor", "mail", "plate", "robe", "helm", "cap", "shield", "glove", "gloves", "boots", "belt", "ring", "amulet", "charm")
-    for k in WEAPON_KEYWORDS:
-        if k in nlower:
-            return "Weapon"
-    for k in ARMOR_KEYWORDS:
-        if k in nlower:
-            return "Armor/Accessory"
+        name = name.decode("utf-8", errors="ignore")
+    return name
 
-    # final fallback
-    return "Misc"
+# helper: determine category - one dict lookup by base code, cached name heuristics otherwise
+def determine_category(code, name):
+    return TYPE_LABEL.get(item_classifier.item_type(code, name), "Misc")
 
 # helper: detect charm size
-def charm_size(item):
-    name = getattr(item, "name", "")
+def charm_size(code, name):
+    size = item_classifier.charm_size(code)
+    if size:
+        return size.capitalize()
     if not name:
         return None
     n = name.lower()
@@ -166,21 +110,16 @@ for filepath in sorted(glob.glob(os.path.join(CHAR_DIR, "*"))):
     # iterate items and produce a row per item for CSV/JSON
     for item in all_items:
         try:
-            it_name = getattr(item, "name", None) or ""
-            it_code = None
-            for attr in ("code", "basecode", "base_code", "base_item", "base_item_code"):
-                val = getattr(item, attr, None)
-                if val:
-                    it_code = str(val)
-                    break
+            it_name = item_name(item)
+            it_code = item_code(item)
             is_unique = bool(getattr(item, "is_unique", False))
             is_set = bool(getattr(item, "is_set", False))
-            is_rune = bool(getattr(item, "is_rune", False)) or (getattr(item, "rune_id", None) is not None)
-            rune_id = getattr(item, "rune_id", None)
-            category = determine_category(item)
+            rune_id = getattr(item, "rune_id", None) or item_classifier.rune_id(it_code)
+            is_rune = bool(getattr(item, "is_rune", False)) or (rune_id is not None)
+            category = determine_category(it_code, it_name)
             charm_sz = None
             if category == "Charm":
-                charm_sz = charm_size(item)
+                charm_sz = charm_size(it_code, it_name)
 
             rows.append({
                 "account": account_name,
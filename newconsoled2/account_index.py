@@ -0,0 +1,34 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/account_index.py ---
+"""
+Индекс герой -> акаунт от charinfo/<account>/<char>.
+
+Един os.scandir обход на run (акаунти + техните файлове) вместо
+os.listdir на всички акаунти за всеки отделен герой.
+
+    accounts = build_account_index()
+    accounts.get("mychar", "Unknown")
+"""
+import os
+
+from config import CHARINFO_DIR
+
+
+def build_account_index(charinfo_dir=CHARINFO_DIR):
+    """{име на character файл: акаунт}; при дублиране печели първият акаунт по азбучен ред."""
+    index = {}
+    try:
+        with os.scandir(charinfo_dir) as accounts:
+            account_dirs = sorted((entry.name, entry.path) for entry in accounts if entry.is_dir())
+    except FileNotFoundError:
+        print(f"[ERROR] Character info directory not found: {charinfo_dir}")
+        return index
+
+    for account, path in account_dirs:
+        try:
+            with os.scandir(path) as chars:
+                for entry in chars:
+                    index.setdefault(entry.name, account)
+        except OSError:
+            continue  # акаунтът е изтрит/недостъпен по време на обхождането
+    return index
+# --- end account_index.py ---
@@ -0,0 +1,280 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/async_console.py ---
+#!/usr/bin/env python3
+"""
+asyncio D2GS console client (без telnetlib - той е премахнат в Python 3.13).
+
+'cl <id>' заявките се pipeline-ват по една сесия: всички команди се пращат
+веднага, а отговорите се разделят по "D2GS>" prompt-а и се връщат по реда на
+изпращане. ConsolePool разпределя командите между няколко сесии.
+
+    python3 async_console.py                       # snapshot -> JSON_GAMES
+    python3 async_console.py --host 127.0.0.1 --port 8889 --compare-sync   # срещу fake_d2gs.py
+"""
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import time
+
+from config import (D2GS_HOST, D2GS_PORT, D2GS_PASS, JSON_GAMES,
+                    ASYNC_PIPELINE_DEPTH, ASYNC_POOL_SIZE)
+from console_output import (PROMPT_ANY_RE, LOGIN_FAILED_RE, parse_game_list, parse_cl_output,
+                            calculate_xp_rate, format_timings, strip_command_echo)
+
+# Telnet байтове (RFC 854) - отказваме всички опции, както прави telnetlib
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+
+
+class AsyncD2GSConsole:
+    """Една D2GS сесия с pipelining на командите."""
+
+    def __init__(self, host=D2GS_HOST, port=D2GS_PORT, password=D2GS_PASS,
+                 depth=ASYNC_PIPELINE_DEPTH):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.reader = None
+        self.writer = None
+        self.buffer = bytearray()
+        self.telnet_tail = b""     # незавършена IAC последователност от предишния chunk
+        self.pending = collections.deque()   # (command, future) по реда на изпращане
+        self.slots = asyncio.Semaphore(depth)
+        self.reader_task = None
+        self.timings = []
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def connect(self, timeout=5):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"Failed to connect to D2GS console {self.host}:{self.port}: {e}")
+
+        await self._read_until(lambda: self.buffer.find(b"Password:") != -1, timeout)
+        self.buffer.clear()
+        for attempt in (1, 2):
+            self.writer.write(self.password.encode('ascii') + b"\n")
+            await self._read_until(
+                lambda: PROMPT_ANY_RE.search(self.buffer) or LOGIN_FAILED_RE.search(self.buffer), timeout)
+            prompt = PROMPT_ANY_RE.search(self.buffer)
+            if prompt:
+                del self.buffer[:prompt.end()]
+                self.reader_task = asyncio.create_task(self._read_responses())
+                return
+            self.buffer.clear()  # втори опит
+        raise ConnectionError("Failed to login to D2GS Telnet console. Check password.")
+
+    async def close(self):
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.writer:
+            try:
+                self.writer.write(b"exit\n")
+                self.writer.close()
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self._fail_pending(ConnectionError("D2GS console session closed"))
+
+    async def run_command(self, command, timeout=7):
+        """Праща командата веднага; чака само отговора на тази команда."""
+        async with self.slots:
+            if self.reader_task is None or self.reader_task.done():
+                raise ConnectionError("D2GS console session is not connected")
+            future = asyncio.get_running_loop().create_future()
+            started = time.perf_counter()
+            self.pending.append((command, future))
+            self.writer.write(command.encode('ascii') + b"\n")
+            try:
+                raw = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                # Сесията е разсинхронизирана - следващият prompt не знаем на кого е
+                await self.close()
+                raise TimeoutError(f"No D2GS> prompt within {timeout}s after '{command}'")
+            self.timings.append((command, time.perf_counter() - started))
+            return strip_command_echo(raw.decode('ascii', 'ignore'), command)
+
+    def timing_report(self):
+        return format_timings(self.timings)
+
+    async def _read_until(self, condition, timeout):
+        """Чете (само по време на login) докато condition() стане истина."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ConnectionError("Timed out waiting for the D2GS console during login.")
+            try:
+                data = await asyncio.wait_for(self.reader.read(4096), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if not data:
+                raise ConnectionError("D2GS console closed the connection during login.")
+            self.buffer += self._filter_telnet(data)
+
+    async def _read_responses(self):
+        """Фонова задача: реже буфера по prompt-а и връща отговорите по ред."""
+        try:
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    raise ConnectionError("D2GS console closed the connection")
+                self.buffer += self._filter_telnet(data)
+                while self.pending:
+                    prompt = PROMPT_ANY_RE.search(self.buffer)
+                    if prompt is None:
+                        break
+                    response = bytes(self.buffer[:prompt.start()])
+                    del self.buffer[:prompt.end()]
+                    command, future = self.pending.popleft()
+                    if not future.done():
+                        future.set_result(response)
+        except (OSError, ConnectionError) as e:
+            self._fail_pending(e if isinstance(e, ConnectionError) else ConnectionError(str(e)))
+
+    def _fail_pending(self, error):
+        while self.pending:
+            command, future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    def _filter_telnet(self, data):
+        """Маха IAC последователностите и отговаря с WONT/DONT на всяко DO/WILL."""
+        data = self.telnet_tail + data
+        self.telnet_tail = b""
+        if IAC not in data:
+            return data
+        out = bytearray()
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte != IAC:
+                out.append(byte)
+                i += 1
+                continue
+            if i + 1 >= len(data):
+                self.telnet_tail = data[i:]
+                break
+            cmd = data[i + 1]
+            if cmd == IAC:
+                out.append(IAC)
+                i += 2
+            elif cmd in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(data):
+                    self.telnet_tail = data[i:]
+                    break
+                option = data[i + 2]
+                if cmd == DO:
+                    self.writer.write(bytes((IAC, WONT, option)))
+                elif cmd == WILL:
+                    self.writer.write(bytes((IAC, DONT, option)))
+                i += 3
+            elif cmd == SB:
+                end = data.find(bytes((IAC, SE)), i + 2)
+                if end == -1:
+                    self.telnet_tail = data[i:]
+                    break
+                i = end + 2
+            else:
+                i += 2
+        return bytes(out)
+
+
+class ConsolePool:
+    """Малък ограничен пул от сесии; всяка команда отива в най-малко натоварената."""
+
+    def __init__(self, size=ASYNC_POOL_SIZE, **session_kwargs):
+        self.sessions = [AsyncD2GSConsole(**session_kwargs) for _ in range(max(1, size))]
+
+    async def __aenter__(self):
+        try:
+            await asyncio.gather(*(session.connect() for session in self.sessions))
+        except Exception:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await asyncio.gather(*(session.close() for session in self.sessions))
+
+    async def run_command(self, command, timeout=7):
+        session = min(self.sessions, key=lambda s: len(s.pending))
+        return await session.run_command(command, timeout)
+
+    def timing_report(self):
+        return format_timings([t for session in self.sessions for t in session.timings])
+
+
+async def snapshot(console):
+    """gl + всички 'cl <id>' наведнъж; console е AsyncD2GSConsole или ConsolePool."""
+    gl_raw = await console.run_command("gl")
+    game_ids = parse_game_list(gl_raw)
+    cl_outputs = await asyncio.gather(*(console.run_command(f"cl {game_id}", timeout=10)
+                                        for game_id in game_ids))
+    return [calculate_xp_rate(parse_cl_output(raw)) for raw in cl_outputs]
+
+
+async def run_snapshot(host, port, password, sessions, depth):
+    async with ConsolePool(sessions, host=host, port=port, password=password, depth=depth) as pool:
+        started = time.perf_counter()
+        games = await snapshot(pool)
+        elapsed = time.perf_counter() - started
+        print(pool.timing_report())
+    return games, elapsed
+
+
+def sync_snapshot(host, port, password):
+    """Старият последователен път (D2GSConsole + telnetlib) - само за сравнение."""
+    from console_parser import D2GSConsole
+    with D2GSConsole(host, port, password) as console:
+        started = time.perf_counter()
+        game_ids = console.parse_game_list(console.run_command("gl"))
+        for game_id in game_ids:
+            console.run_command(f"cl {game_id}", timeout=10)
+        return len(game_ids), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio D2GS realm snapshot (gl + pipelined cl)")
+    parser.add_argument("--host", default=D2GS_HOST)
+    parser.add_argument("--port", type=int, default=D2GS_PORT)
+    parser.add_argument("--password", default=D2GS_PASS)
+    parser.add_argument("--sessions", type=int, default=ASYNC_POOL_SIZE)
+    parser.add_argument("--depth", type=int, default=ASYNC_PIPELINE_DEPTH)
+    parser.add_argument("--no-save", action="store_true", help=f"do not write {JSON_GAMES}")
+    parser.add_argument("--compare-sync", action="store_true",
+                        help="also time the sequential telnetlib sweep")
+    args = parser.parse_args()
+
+    try:
+        games, elapsed = asyncio.run(run_snapshot(args.host, args.port, args.password,
+                                                  args.sessions, args.depth))
+    except (ConnectionError, TimeoutError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"[GAMES] Snapshot of {len(games)} games in {elapsed * 1000:.1f} ms "
+          f"({args.sessions} session(s), depth {args.depth})")
+
+    if args.compare_sync:
+        count, sync_elapsed = sync_snapshot(args.host, args.port, args.password)
+        print(f"[GAMES] Sequential sweep of {count} games in {sync_elapsed * 1000:.1f} ms")
+
+    if not args.no_save:
+        with open(JSON_GAMES, 'w') as f:
+            json.dump(games, f, indent=2)
+        print(f"[GAMES] Processed {len(games)} games, saved to {JSON_GAMES}")
+
+
+if __name__ == "__main__":
+    main()
+# --- end async_console.py ---
@@ -0,0 +1,228 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/build_cache.py ---
+#!/usr/bin/env python3
+"""
+Skip-if-unchanged слой за builder-ите от 00.start.sh.
+
+Всеки builder декларира входовете и изходите си. Пресмята се content hash
+(BLAKE2) на входовете - файлове и цели директории - плюс командата; ако е
+същият като при последното успешно пускане и всички изходи съществуват,
+builder-ът НЕ се пуска и изходите остават непокътнати (вкл. mtime).
+
+    python3 build_cache.py run ladder \\
+        --in /usr/local/pvpgn/var/pvpgn/ladders/d2ladder.xml \\
+        --out /var/www/html/webladder.html \\
+        -- python3 /usr/local/pvpgn/tools/d2consoleportal/08_build_ladder.py
+
+    python3 build_cache.py status          # последните digest-и
+    python3 build_cache.py forget ladder   # следващото пускане ще build-не
+
+Файловете, подадени в командата (напр. самият .py скрипт), също влизат в digest-а,
+заедно с локалните модули, които .py скриптът импортира (modulefinder, търсене само
+в директорията на скрипта и в newconsoled2/) - промяна в ladder_stream.py,
+templates.py, item_classifier.py и т.н. също пуска builder-а наново.
+Хешът на всеки файл се кешира по (mtime_ns, size, inode), така че непроменени
+charsave-ове не се четат наново; прегенерирани, но еднакви файлове (cl_output)
+дават същия хеш. Новите хешове се записват наведнъж след хеширането - докато
+се обхождат charsave/charinfo дърветата, паралелните builder-и не чакат lock-а.
+BUILD_FORCE=1 пуска всичко.
+"""
+import argparse
+import hashlib
+import json
+import modulefinder
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from config import BUILD_CACHE_DB
+
+MODULES_DIR = os.path.dirname(os.path.abspath(__file__))   # newconsoled2/
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    target TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    built_at REAL NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    digest TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def script_modules(script):
+    """Локалните модули, които скриптът импортира (рекурсивно); stdlib не се търси."""
+    finder = modulefinder.ModuleFinder(path=[os.path.dirname(script), MODULES_DIR])
+    try:
+        finder.run_script(script)
+    except (SyntaxError, ImportError, OSError) as e:
+        print(f"[BUILD] Cannot scan imports of {script}: {e}")
+        return []
+    return sorted(module.__file__ for name, module in finder.modules.items()
+                  if name != "__main__" and module.__file__)
+
+
+class BuildCache:
+    def __init__(self, db_path=BUILD_CACHE_DB):
+        # pipeline.py пуска няколко builder-а едновременно - чакаме lock-а, вместо да падаме
+        self.conn = sqlite3.connect(str(db_path), timeout=600)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # Събират се по време на хеширането и се пишат наведнъж (_flush)
+        self.pending = []
+        self.stale = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.close()
+
+    def file_digest(self, path, st=None):
+        st = st or os.stat(path)
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        row = self.conn.execute("SELECT mtime_ns, size, ino, digest FROM file_hashes WHERE path = ?",
+                                (path,)).fetchone()
+        if row and tuple(row[:3]) == key:
+            return row[3]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.pending.append((path, *key, digest))
+        return digest
+
+    def tree_digest(self, root):
+        """Хеш на всички файлове под root (относителен път + съдържание), в нареден ред."""
+        h = hashlib.blake2b(digest_size=16)
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                try:
+                    digest = self.file_digest(path)
+                except OSError:
+                    continue  # изтрит по време на обхождането
+                seen.add(path)
+                h.update(f"{os.path.relpath(path, root)}\0{digest}\n".encode("utf-8", "surrogateescape"))
+        # Изтритите файлове под root не трябва да остават в кеша завинаги
+        prefix = root.rstrip(os.sep) + os.sep
+        stale = [(p,) for (p,) in self.conn.execute(
+            "SELECT path FROM file_hashes WHERE path >= ? AND path < ?", (prefix, prefix + "\uffff"))
+            if p not in seen]
+        self.stale.extend(stale)
+        return h.hexdigest()
+
+    def _flush(self):
+        """Една кратка write транзакция за всички нови/изтрити хешове."""
+        if self.pending or self.stale:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)", self.pending)
+                self.conn.executemany("DELETE FROM file_hashes WHERE path = ?", self.stale)
+        self.pending, self.stale = [], []
+
+    def inputs_digest(self, inputs, command=()):
+        h = hashlib.blake2b(digest_size=16)
+        h.update("\0".join(command).encode("utf-8", "surrogateescape"))
+        # Файловете от командата (скриптът) и модулите, които той импортира, също са вход
+        scripts = [arg for arg in command if os.path.isfile(arg)]
+        paths = list(inputs) + scripts
+        for script in scripts:
+            if script.endswith(".py"):
+                paths.extend(script_modules(os.path.abspath(script)))
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                kind, digest = "dir", self.tree_digest(path)
+            elif os.path.isfile(path):
+                kind, digest = "file", self.file_digest(path)
+            else:
+                kind, digest = "missing", ""
+            h.update(f"{path}\0{kind}\0{digest}\n".encode("utf-8", "surrogateescape"))
+        self._flush()
+        return h.hexdigest()
+
+    def last_digest(self, target):
+        row = self.conn.execute("SELECT digest FROM builds WHERE target = ?", (target,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, target, digest, inputs, outputs, seconds):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?)",
+                              (target, digest, json.dumps(list(inputs)), json.dumps(list(outputs)),
+                               time.time(), seconds))
+
+    def forget(self, target):
+        with self.conn:
+            return self.conn.execute("DELETE FROM builds WHERE target = ?", (target,)).rowcount
+
+    def run(self, target, inputs, outputs, command, force=False):
+        """Пуска command, освен ако входовете са същите и изходите са налице. Връща exit code."""
+        digest = self.inputs_digest(inputs, command)
+        missing = [path for path in outputs if not os.path.exists(path)]
+        if not force and not missing and digest == self.last_digest(target):
+            print(f"[BUILD] {target}: inputs unchanged, skipped")
+            return 0
+
+        reason = "forced" if force else (f"missing {missing[0]}" if missing else "inputs changed")
+        print(f"[BUILD] {target}: {reason}, running {' '.join(command)}")
+        started = time.perf_counter()
+        returncode = subprocess.call(command)
+        seconds = time.perf_counter() - started
+        if returncode == 0:
+            self.record(target, digest, inputs, outputs, seconds)
+            print(f"[BUILD] {target}: done in {seconds:.2f}s")
+        else:
+            # Неуспешен build не записва digest - следващият run ще опита отново
+            print(f"[BUILD] {target}: failed with exit code {returncode}")
+        return returncode
+
+    def status(self):
+        return self.conn.execute("SELECT target, digest, built_at, seconds FROM builds ORDER BY target").fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skip builders whose inputs have not changed")
+    sub = parser.add_subparsers(dest="action", required=True)
+    r = sub.add_parser("run", help="run COMMAND unless its inputs are unchanged")
+    r.add_argument("target")
+    r.add_argument("--in", dest="inputs", action="append", default=[], help="input file or directory")
+    r.add_argument("--out", dest="outputs", action="append", default=[], help="output that must exist")
+    r.add_argument("--force", action="store_true", help="run even if nothing changed")
+    sub.add_parser("status", help="list recorded builds")
+    f = sub.add_parser("forget", help="drop the recorded digest of a target")
+    f.add_argument("target")
+    # Всичко след "--" е командата на builder-а (с нейните си опции)
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    command = argv[split + 1:]
+
+    with BuildCache() as cache:
+        if args.action == "run":
+            if not command:
+                parser.error("run needs a command after --")
+            force = args.force or os.environ.get("BUILD_FORCE") == "1"
+            sys.exit(cache.run(args.target, args.inputs, args.outputs, command, force))
+        elif args.action == "status":
+            for target, digest, built_at, seconds in cache.status():
+                print(f"{target:<20} {digest}  {datetime.fromtimestamp(built_at):%Y-%m-%d %H:%M:%S}  {seconds:.2f}s")
+        else:
+            print(f"[BUILD] Forgot {cache.forget(args.target)} target(s)")
+
+
+if __name__ == "__main__":
+    main()
+# --- end build_cache.py ---
@@ -0,0 +1,305 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/change_feed.py ---
+#!/usr/bin/env python3
+"""
+Поток от промени в charsave/charinfo/d2ladder.xml - без пълно пресканиране.
+
+Linux inotify през ctypes (без външни пакети); ако inotify не е наличен (друга
+ОС, изчерпан fs.inotify.max_user_watches), същият интерфейс се обслужва от
+периодично stat-ване. d2dbs пише няколко файла наведнъж при logout - събитията
+се събират (debounce) и в asyncio.Queue влиза един frozenset с пътищата.
+RESCAN (None) в опашката значи "загубени са събития - сканирай всичко".
+
+    queue = asyncio.Queue()
+    feed = open_change_feed([(CHARSAVE_DIR, 1), (CHARINFO_DIR, 2)], [LADDER_XML], queue)
+    feed.start()
+    while True:
+        paths = await queue.get()   # frozenset или RESCAN
+
+    python3 change_feed.py             # печата пакетите с промени (за проверка)
+    python3 change_feed.py --polling   # същото през fallback-а
+"""
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import time
+
+from config import (CHARSAVE_DIR, CHARINFO_DIR, LADDER_XML, CHANGE_FEED, CHANGE_DEBOUNCE,
+                    CHANGE_MAX_DELAY, COLLECTOR_INTERVALS)
+from char_manifest import scan_files
+
+RESCAN = None
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Файл е готов, когато е затворен след запис или преименуван на мястото си
+FILE_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+DIR_EVENTS = FILE_EVENTS | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+
+
+class Inotify:
+    """Минимален ctypes binding: init, add_watch, rm_watch, read."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except AttributeError:
+            raise OSError("inotify is not available on this system")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise("inotify_init1")
+
+    @staticmethod
+    def _raise(call, path=""):
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{call}: {os.strerror(errno)}", path or None)
+
+    def add_watch(self, path, mask):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise("inotify_add_watch", path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._rm_watch(self.fd, wd)
+
+    def read(self):
+        """Всички налични събития като (wd, mask, name); [] ако няма нищо за четене."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Debouncer:
+    """Събира пътища, докато спрат да идват CHANGE_DEBOUNCE секунди (най-много CHANGE_MAX_DELAY)."""
+
+    def __init__(self, queue, debounce=CHANGE_DEBOUNCE, max_delay=CHANGE_MAX_DELAY):
+        self.queue = queue
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.pending = set()
+        self.rescan = False
+        self.first = self.last = 0.0
+        self.timer = None
+
+    def add(self, paths=(), rescan=False):
+        now = time.monotonic()
+        if not self.pending and not self.rescan:
+            self.first = now
+        self.pending.update(paths)
+        self.rescan = self.rescan or rescan
+        self.last = now
+        if self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.debounce, self._tick)
+
+    def _tick(self):
+        now = time.monotonic()
+        wait = min(self.last + self.debounce, self.first + self.max_delay) - now
+        if wait > 0:
+            self.timer = asyncio.get_running_loop().call_later(wait, self._tick)
+            return
+        self.timer = None
+        self.queue.put_nowait(RESCAN if self.rescan else frozenset(self.pending))
+        self.pending = set()
+        self.rescan = False
+
+    def cancel(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+class InotifyFeed:
+    kind = "inotify"
+
+    def __init__(self, trees, files, queue, debounce=CHANGE_DEBOUNCE, max_delay=CHANGE_MAX_DELAY):
+        self.trees = [(str(root), depth) for root, depth in trees]
+        self.files = {str(path) for path in files}
+        self.debouncer = Debouncer(queue, debounce, max_delay)
+        self.inotify = Inotify()
+        self.watches = {}      # wd -> (директория, оставащи нива под нея)
+        try:
+            for root, depth in self.trees:
+                self._watch_tree(root, depth)
+            # Отделните файлове (d2ladder.xml) се следят през директорията им - PvPGN ги подменя
+            for directory in {os.path.dirname(path) for path in self.files}:
+                self._watch(directory, 0)
+        except OSError:
+            self.inotify.close()
+            raise
+
+    def _watch(self, directory, depth):
+        wd = self.inotify.add_watch(directory, DIR_EVENTS)
+        self.watches[wd] = (directory, depth)
+
+    def _watch_tree(self, directory, depth):
+        """depth 1 = файловете са директно тук; depth 2 = в поддиректории (charinfo/<акаунт>/)."""
+        self._watch(directory, depth)
+        if depth > 1:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        self._watch_tree(entry.path, depth - 1)
+
+    def start(self):
+        asyncio.get_running_loop().add_reader(self.inotify.fd, self._on_readable)
+
+    def _on_readable(self):
+        changed = set()
+        rescan = False
+        for wd, mask, name in self.inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if wd not in self.watches:
+                continue
+            directory, depth = self.watches[wd]
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = rescan or depth > 0   # изтрит акаунт - кои файлове е имал, не знаем
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if depth > 1 and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Нов акаунт: следим го и взимаме файловете, създадени преди watch-а
+                    try:
+                        self._watch_tree(path, depth - 1)
+                        changed.update(p for p, _ in scan_files(path, depth - 1))
+                    except OSError:
+                        rescan = True
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    rescan = rescan or depth > 1
+                continue
+            if depth == 1 or (depth == 0 and path in self.files):
+                if mask & FILE_EVENTS:
+                    changed.add(path)
+        if changed or rescan:
+            self.debouncer.add(changed, rescan)
+
+    def close(self):
+        self.debouncer.cancel()
+        try:
+            asyncio.get_running_loop().remove_reader(self.inotify.fd)
+        except RuntimeError:
+            pass
+        self.inotify.close()
+
+
+class PollingFeed:
+    """Fallback: stat на всички файлове през interval секунди и разлика с предишния път."""
+    kind = "polling"
+
+    def __init__(self, trees, files, queue, interval=COLLECTOR_INTERVALS["chars"]):
+        self.trees = [(str(root), depth) for root, depth in trees]
+        self.files = [str(path) for path in files]
+        self.queue = queue
+        self.interval = interval
+        self.task = None
+        self.signatures = self._scan()
+
+    def _scan(self):
+        signatures = {path: (st.st_mtime_ns, st.st_size, st.st_ino)
+                      for root, depth in self.trees for path, st in scan_files(root, depth)}
+        for path in self.files:
+            try:
+                st = os.stat(path)
+                signatures[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+            except FileNotFoundError:
+                pass
+        return signatures
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(self._scan)
+            previous, self.signatures = self.signatures, current
+            changed = {path for path in previous.keys() | current.keys()
+                       if previous.get(path) != current.get(path)}
+            if changed:
+                self.queue.put_nowait(frozenset(changed))
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+
+
+def open_change_feed(trees, files, queue, mode=CHANGE_FEED):
+    """mode: auto (inotify, иначе polling) | inotify | polling."""
+    if mode != "polling":
+        try:
+            return InotifyFeed(trees, files, queue)
+        except OSError as e:
+            if mode == "inotify":
+                raise
+            print(f"[FEED] inotify unavailable ({e}), falling back to polling")
+    return PollingFeed(trees, files, queue)
+
+
+async def watch(mode):
+    queue = asyncio.Queue()
+    feed = open_change_feed([(CHARSAVE_DIR, 1), (CHARINFO_DIR, 2)], [LADDER_XML], queue, mode)
+    feed.start()
+    print(f"[FEED] Watching {CHARSAVE_DIR}, {CHARINFO_DIR}, {LADDER_XML} ({feed.kind})")
+    try:
+        while True:
+            paths = await queue.get()
+            if paths is RESCAN:
+                print("[FEED] Events lost - full rescan needed")
+            else:
+                print(f"[FEED] {len(paths)} changed: " + ", ".join(sorted(paths)))
+    finally:
+        feed.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print batches of changed charsave/charinfo/ladder files")
+    parser.add_argument("--polling", action="store_true", help="use stat polling instead of inotify")
+    args = parser.parse_args()
+    try:
+        asyncio.run(watch("polling" if args.polling else CHANGE_FEED))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
+# --- end change_feed.py ---
@@ -0,0 +1,183 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/char_manifest.py ---
+"""
+Постоянен манифест на character файловете (charinfo / charsave).
+
+За всеки път пази (mtime_ns, size, inode) и вече парсирания запис като JSON.
+При всяко пускане дървото само се stat-ва: парсират се наново само променените
+файлове, изтритите отпадат, а изходите се строят от кеша.
+
+    with CharManifest("charinfo", version=1) as manifest:
+        manifest.sync(scan_files(CHARINFO_DIR, depth=2), parse_charinfo_file)
+        for record in manifest.records():
+            ...
+
+Когато change_feed.py казва кои файлове са се сменили, manifest.update(paths, parse)
+stat-ва само тях, без обхождане на цялото дърво.
+
+Когато записът зависи и от друг файл (charinfo/<акаунт>/<герой> ->
+charsave/<герой>), companion(path) връща неговия път и неговият stat също влиза
+в ключа - промяна само в charsave-а също парсира записа наново.
+
+Смени version, когато се промени парсерът - старите записи се изхвърлят.
+"""
+import json
+import os
+import sqlite3
+
+from config import MANIFEST_DB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    scope TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    companion TEXT,
+    record TEXT,
+    PRIMARY KEY (scope, path)
+) WITHOUT ROWID;
+"""
+
+
+def scan_files(root, depth=1):
+    """(path, stat) за всички файлове depth нива под root - само scandir, без четене."""
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if depth > 1 and entry.is_dir():
+                        yield from scan_files(entry.path, depth - 1)
+                    elif depth == 1 and entry.is_file():
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue  # изтрит между scandir и stat
+    except FileNotFoundError:
+        return
+
+
+def companion_key(path):
+    """(mtime_ns, size, inode) на придружаващия файл като текст; None, ако го няма."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+
+
+class CharManifest:
+    def __init__(self, name, version=1, db_path=MANIFEST_DB, companion=None):
+        self.scope = f"{name}:v{version}"
+        self.companion = companion
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            # Записи от предишна версия на парсера не важат
+            self.conn.execute("DELETE FROM manifest WHERE scope LIKE ? AND scope != ?",
+                              (f"{name}:v%", self.scope))
+        self.stats = {"changed": 0, "cached": 0, "removed": 0}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _key(self, path, st):
+        key = [st.st_mtime_ns, st.st_size, st.st_ino, None]
+        if self.companion is not None:
+            key[3] = companion_key(self.companion(path))
+        return key
+
+    def sync(self, entries, parse, parse_map=map):
+        """
+        entries: (path, stat) двойки; parse(path) -> JSON-сериализуем запис или None.
+        parse_map(parse, paths) парсира променените файлове и връща резултатите
+        в същия ред (map по подразбиране, или executor.map за паралелно парсване).
+        Записите се четат после поточно с records().
+        """
+        # Само ключовете - самите записи не се зареждат в паметта
+        known = {
+            path: key
+            for path, *key in self.conn.execute(
+                "SELECT path, mtime_ns, size, ino, companion FROM manifest WHERE scope = ?", (self.scope,))
+        }
+        changed = {}
+        for path, st in entries:
+            key = self._key(path, st)
+            if known.pop(path, None) == key:
+                self.stats["cached"] += 1
+            else:
+                changed[path] = key
+
+        with self.conn:
+            rows = []
+            for path, record in zip(changed, parse_map(parse, list(changed))):
+                self.stats["changed"] += 1
+                # None също се кешира - нечетим файл не се пробва отново, докато не се промени
+                rows.append((self.scope, path, *changed[path], None if record is None else json.dumps(record)))
+                if len(rows) >= 500:
+                    self._store(rows)
+                    rows = []
+            self._store(rows)
+            # Каквото не видяхме при обхождането е изтрито
+            self.conn.executemany("DELETE FROM manifest WHERE scope = ? AND path = ?",
+                                  [(self.scope, path) for path in known])
+        self.stats["removed"] += len(known)
+
+    def update(self, paths, parse, parse_map=map):
+        """
+        Инкрементален вариант на sync() за пътищата от change_feed.py: stat-ват се
+        само подадените файлове - изтритите отпадат, променените се парсират.
+        """
+        changed = {}
+        removed = []
+        for path in set(paths):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                removed.append((self.scope, path))
+                continue
+            key = self._key(path, st)
+            row = self.conn.execute("SELECT mtime_ns, size, ino, companion FROM manifest "
+                                    "WHERE scope = ? AND path = ?",
+                                    (self.scope, path)).fetchone()
+            if row is not None and list(row) == key:
+                self.stats["cached"] += 1
+            else:
+                changed[path] = key
+
+        with self.conn:
+            rows = [(self.scope, path, *changed[path], None if record is None else json.dumps(record))
+                    for path, record in zip(changed, parse_map(parse, list(changed)))]
+            self._store(rows)
+            self.conn.executemany("DELETE FROM manifest WHERE scope = ? AND path = ?", removed)
+        self.stats["changed"] += len(rows)
+        self.stats["removed"] += len(removed)
+
+    def paths_named(self, name):
+        """Пътищата в манифеста с това име на файла (напр. charinfo/*/<герой> за charsave/<герой>)."""
+        return [path for (path,) in self.conn.execute(
+                    "SELECT path FROM manifest WHERE scope = ? AND path LIKE ?", (self.scope, "%" + name))
+                if os.path.basename(path) == name]
+
+    def _store(self, rows):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO manifest (scope, path, mtime_ns, size, ino, companion, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def records(self):
+        """Кешираните записи (без None) един по един, в нареден по път ред."""
+        for (record,) in self.conn.execute(
+                "SELECT record FROM manifest WHERE scope = ? AND record IS NOT NULL ORDER BY path",
+                (self.scope,)):
+            yield json.loads(record)
+
+    def summary(self):
+        return (f"[MANIFEST] {self.scope}: {self.stats['changed']} parsed, "
+                f"{self.stats['cached']} from cache, {self.stats['removed']} removed")
+# --- end char_manifest.py ---
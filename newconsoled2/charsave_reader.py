@@ -0,0 +1,515 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/charsave_reader.py ---
+#!/usr/bin/env python3
+"""
+Двоичен charinfo/charsave парсер на чист Python - заменя C помощника 07.char2json.
+
+Файловете се отварят с mmap и се четат само нужните байтове (struct.unpack_from
+и индексиране в mmap-а, без копие на целия файл):
+
+    charinfo/<акаунт>/<герой>   PvPGN t_d2charinfo_header (little-endian)
+        0x08 create_time  0x0C last_time  0x14 total_play_time
+        0x30 charname[16] 0x40 account[16]
+    charsave/<герой>            D2S заглавие
+        0x04 version  0x14 name[16]  0x24 status  0x25 progression  0x28 class  0x2B level
+        0x30 last played  0x2FD "gf" + битовите атрибути (ниво, опит, злато...)
+
+LazyD2S чете само заглавието и атрибутите; предметите се декодират от d2lib
+едва при достъп до .items (обобщенията не плащат за тях).
+
+item_stats се броят както в 07.char2json: всяко "JM" след първото (заглавието на
+списъка) е предмет, до първото "JM\\0\\0" (празен списък - трупа); компактните
+(flag 0x20 в байт 4) се прескачат. Качеството е 4-битовото поле на бит 150,
+SoJ е unique с id 122. crafted остава 0 - C switch-ът никога не го е броил.
+
+Разлика с C версията: find_itemlist() закача след всеки предмет нов възел с
+неинициализиран указател. Върху "пресен" heap това е един фантомен предмет
+(+1 total_items, понякога +1 в произволно качество); на glibc >= 2.32
+преизползваните от tcache блокове са невалидни указатели и 07.char2json пада
+със SIGSEGV. Тук се броят само истинските предмети; bench ги отчита отделно.
+
+    python3 charsave_reader.py -o /var/www/html/data/        # като 07.char2json -o
+    python3 charsave_reader.py -o DIR --changed < paths      # само героите от change_feed.py
+    python3 charsave_reader.py bench --c-tool ../d2consoleportal/archives/07.char2json
+    python3 charsave_reader.py bench-summary     # LazyD2S.summary() срещу пълния D2SFile
+"""
+import argparse
+import filecmp
+import json
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from config import CHARINFO_DIR, CHARSAVE_DIR, PORTAL_DIR
+from char_manifest import scan_files
+from json_stream import write_text_atomic
+
+CLASS_NAMES = ("Amazon", "Sorceress", "Necromancer", "Paladin", "Barbarian", "Druid", "Assassin")
+
+# PvPGN charinfo заглавие
+CHARINFO_TIMES = struct.Struct("<II4xI")   # create_time, last_time, (checksum), total_play_time
+CHARINFO_TIMES_OFFSET = 0x08
+CHARINFO_NAME = 0x30
+CHARINFO_ACCOUNT = 0x40
+
+# D2S заглавие
+D2S_MAGIC = 0xAA55AA55
+D2S_VERSION = 0x04
+D2S_NAME = 0x14
+D2S_STATUS = 0x24
+D2S_PROGRESSION = 0x25
+D2S_CLASS = 0x28
+D2S_LEVEL = 0x2B
+D2S_LAST_PLAYED = 0x30
+
+# Атрибутите ("gf"): id -> име (като в d2lib) и ширина в битове
+ATTRIBUTE_NAMES = ("strength", "energy", "dexterity", "vitality", "unused_stats", "unused_skills",
+                   "current_hp", "max_hp", "current_mana", "max_mana", "current_stamina", "max_stamina",
+                   "level", "experience", "gold", "stashed_gold")
+ATTRIBUTE_WIDTHS = (10, 10, 10, 10, 10, 8, 21, 21, 21, 21, 21, 21, 7, 32, 25, 25)
+FIXED_POINT_ATTRIBUTES = frozenset(range(6, 12))
+
+STATUS_HARDCORE = 0x04
+STATUS_DIED = 0x08
+STATUS_EXPANSION = 0x20
+STATUS_LADDER = 0x40
+
+ITEM_COMPACT = 0x20       # байт 4 от предмета: simple/compact предмет без качество
+SOJ_UNIQUE_ID = 122
+STAT_KEYS = ("total_items", "low_quality", "normal", "high_quality", "magic",
+             "set", "rare", "unique", "crafted", "soj_count")
+# качество 1..7 -> поле в item_stats (crafted = 8 попада в default-а на C switch-а)
+QUALITY_KEYS = (None, "low_quality", "normal", "high_quality", "magic", "set", "rare", "unique")
+
+EMPTY = b""
+
+
+def open_mapped(path):
+    """Read-only mmap на файла; b"" за празен файл. FileNotFoundError/OSError се пропускат нагоре."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return EMPTY
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def byte_at(buf, offset):
+    """buf[offset] или 0 извън файла (C версията чете отвъд края при къси файлове)."""
+    return buf[offset] if offset < len(buf) else 0
+
+
+def c_string(buf, offset, limit=None):
+    """NUL-терминиран низ от offset като в C printf("%s") - latin-1, без декодиращи грешки."""
+    end = buf.find(b"\0", offset, len(buf) if limit is None else offset + limit)
+    if end < 0:
+        end = len(buf) if limit is None else min(len(buf), offset + limit)
+    return bytes(buf[offset:end]).decode("latin-1")
+
+
+def read_charinfo(path):
+    """Полетата от PvPGN charinfo заглавието или None, ако файлът липсва/е празен."""
+    try:
+        buf = open_mapped(path)
+    except OSError:
+        return None
+    if not buf:
+        return None
+    try:
+        create_time = last_time = play_time = 0
+        if len(buf) >= CHARINFO_TIMES_OFFSET + CHARINFO_TIMES.size:
+            create_time, last_time, play_time = CHARINFO_TIMES.unpack_from(buf, CHARINFO_TIMES_OFFSET)
+        return {
+            "charname": c_string(buf, CHARINFO_NAME),
+            "account": c_string(buf, CHARINFO_ACCOUNT),
+            "create_time": create_time,
+            "last_time": last_time,
+            "play_time": play_time,
+        }
+    finally:
+        buf.close()
+
+
+class LazyD2S:
+    """
+    D2S файл с декодиране при нужда - за обобщения (стълбица, all_char_all_acc.json),
+    които не трябва да плащат за пълния D2SFile.
+
+    При създаване се четат само първите HEAD_SIZE байта: фиксираното заглавие
+    веднага, битовите атрибути ("gf") при първото .attributes. .items и
+    останалите секции след атрибутите зареждат d2lib.files.D2SFile едва когато
+    някой ги поиска. Имената на полетата са като в D2SFile.
+    """
+    HEADER_SIZE = 765        # фиксираното заглавие до "gf"
+    HEAD_SIZE = HEADER_SIZE + 2 + 84   # + "gf" + 16 атрибута x (9 + 32) бита + 0x1FF
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self._head = f.read(self.HEAD_SIZE)
+        head = self._head
+        if len(head) < D2S_LAST_PLAYED + 4 or struct.unpack_from("<I", head)[0] != D2S_MAGIC:
+            raise ValueError(f"{self.path}: not a D2S file")
+        self.version, = struct.unpack_from("<I", head, D2S_VERSION)
+        self.char_name = c_string(head, D2S_NAME, 16)
+        self.char_status = head[D2S_STATUS]
+        self.progression = head[D2S_PROGRESSION]
+        self.char_class_id = head[D2S_CLASS]
+        self.char_level = head[D2S_LEVEL]
+        self.last_played, = struct.unpack_from("<I", head, D2S_LAST_PLAYED)
+        self._attributes = None
+        self._full = None
+
+    @property
+    def char_class(self):
+        """None за непознат клас, както d2lib."""
+        return CLASS_NAMES[self.char_class_id] if self.char_class_id < len(CLASS_NAMES) else None
+
+    @property
+    def is_hardcore(self):
+        return bool(self.char_status & STATUS_HARDCORE)
+
+    @property
+    def is_died(self):
+        return bool(self.char_status & STATUS_DIED)
+
+    @property
+    def is_expansion(self):
+        return bool(self.char_status & STATUS_EXPANSION)
+
+    @property
+    def is_ladder(self):
+        return bool(self.char_status & STATUS_LADDER)
+
+    @property
+    def attributes(self):
+        """Секцията "gf": 9-битово id + стойност (LSB first) до 0x1FF; HP/mana/stamina са x256."""
+        if self._attributes is None:
+            head = self._head
+            if head[self.HEADER_SIZE:self.HEADER_SIZE + 2] != b"gf":
+                raise ValueError(f"{self.path}: missing attributes header")
+            data = int.from_bytes(head[self.HEADER_SIZE + 2:], "little")
+            available = (len(head) - self.HEADER_SIZE - 2) * 8
+            attributes = dict.fromkeys(ATTRIBUTE_NAMES, 0)
+            pos = 0
+            while True:
+                attr_id = (data >> pos) & 0x1FF
+                pos += 9
+                if attr_id == 0x1FF:
+                    break
+                if attr_id >= len(ATTRIBUTE_NAMES):
+                    raise ValueError(f"{self.path}: invalid attribute id {attr_id}")
+                width = ATTRIBUTE_WIDTHS[attr_id]
+                value = (data >> pos) & ((1 << width) - 1)
+                pos += width
+                if pos > available:
+                    raise ValueError(f"{self.path}: truncated attributes")
+                attributes[ATTRIBUTE_NAMES[attr_id]] = value / 256 if attr_id in FIXED_POINT_ATTRIBUTES else value
+            self._attributes = attributes
+        return self._attributes
+
+    def summary(self):
+        """Всичко, което стълбицата и all_char_all_acc.json ползват - без предметите."""
+        attributes = self.attributes
+        return {
+            "name": self.char_name,
+            "class": self.char_class,
+            "level": self.char_level,
+            "hardcore": self.is_hardcore,
+            "died": self.is_died,
+            "expansion": self.is_expansion,
+            "ladder": self.is_ladder,
+            "last_played": self.last_played,
+            "experience": attributes["experience"],
+            "gold": attributes["gold"],
+            "stashed_gold": attributes["stashed_gold"],
+        }
+
+    @property
+    def full(self):
+        """Пълният d2lib.files.D2SFile - декодира всички предмети; зарежда се веднъж."""
+        if self._full is None:
+            from d2lib.files import D2SFile
+            self._full = D2SFile(self.path)
+        return self._full
+
+    @property
+    def items(self):
+        return self.full.items
+
+    @property
+    def skills(self):
+        return self.full.skills
+
+    @property
+    def corpse_items(self):
+        return self.full.corpse_items
+
+    @property
+    def merc_items(self):
+        return self.full.merc_items
+
+    @property
+    def golem_item(self):
+        return self.full.golem_item
+
+
+def read_summary(path):
+    """LazyD2S(path).summary() или None, ако charsave липсва или не е D2S."""
+    try:
+        return LazyD2S(path).summary()
+    except (OSError, ValueError):
+        return None
+
+
+def class_name(class_id):
+    return CLASS_NAMES[class_id] if class_id < len(CLASS_NAMES) else "Unknown"
+
+
+def item_offsets(buf):
+    """Началата на предметите - find_itemlist() от 07.char2json."""
+    size = len(buf)
+    offsets = []
+    first = True
+    i = buf.find(b"JM")
+    while i >= 0:
+        if first:
+            first = False      # "JM" + брой - заглавието на списъка
+        elif i + 3 < size and buf[i + 2] == 0 and buf[i + 3] == 0:
+            break              # празен списък (трупът) - край
+        elif not byte_at(buf, i + 4) & ITEM_COMPACT:
+            offsets.append(i)
+        i = buf.find(b"JM", i + 1)
+    return offsets
+
+
+def item_stats(buf):
+    """parse_itemlist() от 07.char2json - броячите по качество + SoJ."""
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    for i in item_offsets(buf):
+        stats["total_items"] += 1
+        b13 = byte_at(buf, i + 0x13)
+        quality = (byte_at(buf, i + 0x12) >> 6) | ((b13 & 0x03) << 2)
+        if quality < len(QUALITY_KEYS) and QUALITY_KEYS[quality]:
+            stats[QUALITY_KEYS[quality]] += 1
+        # unique с картинка (пръстените винаги имат), без class-specific бит: 12-битовото id
+        if quality == 7 and b13 & 0x04 and not b13 & 0x40:
+            unique_id = (b13 >> 7) | (byte_at(buf, i + 0x14) << 1) | ((byte_at(buf, i + 0x15) & 0x07) << 9)
+            if unique_id == SOJ_UNIQUE_ID:
+                stats["soj_count"] += 1
+    return stats
+
+
+def char_record(charname, account, charsave_dir=CHARSAVE_DIR, charinfo_dir=CHARINFO_DIR):
+    """
+    {"character_info", "item_stats"} като в 07.char2json или None без charsave.
+    Името и акаунтът идват от charinfo, ако го има, иначе от пътя.
+    """
+    try:
+        buf = open_mapped(os.path.join(str(charsave_dir), charname))
+    except OSError:
+        return None
+    if not buf:
+        return None
+    try:
+        info = read_charinfo(os.path.join(str(charinfo_dir), account, charname))
+        return {
+            "character_info": {
+                "name": info["charname"] if info else charname,
+                "account_name": info["account"] if info else account,
+                "level": byte_at(buf, D2S_LEVEL),
+                "class": class_name(byte_at(buf, D2S_CLASS)),
+            },
+            "item_stats": item_stats(buf),
+        }
+    finally:
+        buf.close()
+
+
+def render_json(record):
+    """Текстът байт по байт като fprintf-ите на 07.char2json (низовете не се escape-ват)."""
+    info = record["character_info"]
+    stats = record["item_stats"]
+    lines = [
+        "{",
+        '  "character_info": {',
+        f'    "name": "{info["name"]}",',
+        f'    "account_name": "{info["account_name"]}",',
+        f'    "level": {info["level"]},',
+        f'    "class": "{info["class"]}"',
+        "  },",
+        '  "item_stats": {',
+    ]
+    lines += [f'    "{key}": {stats[key]},' for key in STAT_KEYS[:-1]]
+    lines += [f'    "{STAT_KEYS[-1]}": {stats[STAT_KEYS[-1]]}', "  }", "}"]
+    return "\n".join(lines) + "\n"
+
+
+def all_characters(charinfo_dir=CHARINFO_DIR):
+    """(герой, акаунт) за всеки charinfo/<акаунт>/<герой> - обхождането на 07.char2json."""
+    for path, _st in scan_files(str(charinfo_dir), depth=2):
+        yield os.path.basename(path), os.path.basename(os.path.dirname(path))
+
+
+def changed_characters(paths, charinfo_dir=CHARINFO_DIR, charsave_dir=CHARSAVE_DIR):
+    """(герой, акаунт) за пътищата от change_feed.py; за charsave акаунтът се търси в charinfo."""
+    charinfo_root, charsave_root = str(charinfo_dir), str(charsave_dir)
+    found = set()
+    orphans = set()
+    for path in paths:
+        if os.path.dirname(os.path.dirname(path)) == charinfo_root:
+            found.add((os.path.basename(path), os.path.basename(os.path.dirname(path))))
+        elif os.path.dirname(path) == charsave_root:
+            orphans.add(os.path.basename(path))
+    orphans -= {charname for charname, _account in found}
+    if orphans:
+        found.update(pair for pair in all_characters(charinfo_dir) if pair[0] in orphans)
+    return sorted(found)
+
+
+def export(out_dir, characters, charsave_dir=CHARSAVE_DIR, charinfo_dir=CHARINFO_DIR):
+    """<out_dir>/<герой>.json за всеки (герой, акаунт); връща броя записани."""
+    count = 0
+    for charname, account in characters:
+        record = char_record(charname, account, charsave_dir, charinfo_dir)
+        if record is None:
+            print(f"Warning: CharSave file not found at {os.path.join(str(charsave_dir), charname)}. "
+                  "Skipping character.", file=sys.stderr)
+            continue
+        write_text_atomic(os.path.join(out_dir, f"{charname}.json"), render_json(record))
+        count += 1
+    return count
+
+
+def is_phantom(c_record, py_record):
+    """C записът се различава само с фантомния предмет: +1 total_items и най-много +1 в едно качество."""
+    if c_record["character_info"] != py_record["character_info"]:
+        return False
+    extra = [c_record["item_stats"][key] - py_record["item_stats"][key] for key in STAT_KEYS]
+    return extra[0] == 1 and sorted(extra[1:])[-2:] in ([0, 0], [0, 1]) and min(extra[1:]) == 0
+
+
+def compare_outputs(c_out, py_out):
+    """Имената на <герой>.json по категории: identical / phantom / different / missing."""
+    result = {"identical": [], "phantom": [], "different": [], "missing": []}
+    for name in sorted(set(os.listdir(c_out)) | set(os.listdir(py_out))):
+        c_path, py_path = os.path.join(c_out, name), os.path.join(py_out, name)
+        if not (os.path.exists(c_path) and os.path.exists(py_path)):
+            result["missing"].append(name)
+            continue
+        if filecmp.cmp(c_path, py_path, shallow=False):
+            result["identical"].append(name)
+            continue
+        try:
+            with open(c_path, encoding="latin-1") as f:
+                c_record = json.load(f)
+            with open(py_path, encoding="latin-1") as f:
+                py_record = json.load(f)
+            phantom = is_phantom(c_record, py_record)
+        except (ValueError, KeyError):
+            phantom = False      # C версията е изписала памет извън къс файл
+        result["phantom" if phantom else "different"].append(name)
+    return result
+
+
+def bench(c_tool, repeat=3):
+    """
+    Двата инструмента върху целия корпус (C версията има твърдо зададени пътища):
+    време на пускане и сравнение на всички <герой>.json. C версията върви с
+    изключен tcache - иначе на съвременен glibc пада (виж по-горе).
+    """
+    env = dict(os.environ, GLIBC_TUNABLES="glibc.malloc.tcache_count=0")
+    work = tempfile.mkdtemp(prefix="char2json-bench.")
+    try:
+        c_out, py_out = os.path.join(work, "c"), os.path.join(work, "py")
+        timings = {"C": [], "Python": []}
+        for _ in range(repeat):
+            for directory in (c_out, py_out):
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory)
+            started = time.perf_counter()
+            proc = subprocess.run([c_tool, "-o", c_out + "/"], stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL, env=env)
+            timings["C"].append(time.perf_counter() - started)
+            if proc.returncode != 0:
+                print(f"[BENCH] {c_tool} exited with {proc.returncode}")
+            started = time.perf_counter()
+            with open(os.devnull, "w") as devnull:
+                stderr, sys.stderr = sys.stderr, devnull
+                try:
+                    export(py_out, all_characters())
+                finally:
+                    sys.stderr = stderr
+            timings["Python"].append(time.perf_counter() - started)
+
+        result = compare_outputs(c_out, py_out)
+        for tool, runs in timings.items():
+            print(f"[BENCH] {tool:<7} best {min(runs):.3f}s  avg {sum(runs) / len(runs):.3f}s  ({repeat} runs)")
+        print(f"[BENCH] {sum(map(len, result.values()))} files: "
+              + ", ".join(f"{len(names)} {kind}" for kind, names in result.items()))
+        for name in (result["different"] + result["missing"])[:20]:
+            print(f"[BENCH]   {name}")
+        return not result["different"] and not result["missing"]
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def bench_summary(charsave_dir=CHARSAVE_DIR, limit=None):
+    """LazyD2S.summary() срещу пълния d2lib D2SFile върху charsave корпуса."""
+    from d2lib.files import D2SFile
+    paths = sorted(path for path, _st in scan_files(str(charsave_dir)))[:limit]
+    timings = {}
+    for label, parse in (("LazyD2S", lambda path: LazyD2S(path).summary()), ("D2SFile", D2SFile)):
+        started = time.perf_counter()
+        failed = 0
+        for path in paths:
+            try:
+                parse(path)
+            except Exception:
+                failed += 1
+        timings[label] = time.perf_counter() - started
+        print(f"[BENCH] {label:<8} {timings[label]:.3f}s for {len(paths)} files ({failed} unreadable)")
+    if timings["LazyD2S"]:
+        print(f"[BENCH] summaries are {timings['D2SFile'] / timings['LazyD2S']:.1f}x cheaper than the full decode")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="charinfo/charsave -> <char>.json (replaces 07.char2json)")
+    parser.add_argument("-o", "--output", help="output directory for <char>.json files")
+    parser.add_argument("--changed", action="store_true",
+                        help="read changed charsave/charinfo paths from stdin (one per line) and export only those")
+    sub = parser.add_subparsers(dest="action")
+    b = sub.add_parser("bench", help="compare speed and output with the C 07.char2json")
+    b.add_argument("--c-tool", default=str(PORTAL_DIR / "archives" / "07.char2json"))
+    b.add_argument("--repeat", type=int, default=3)
+    s = sub.add_parser("bench-summary", help="compare LazyD2S summaries with the full d2lib decode")
+    s.add_argument("--limit", type=int, help="only the first N charsave files")
+    args = parser.parse_args()
+
+    if args.action == "bench":
+        sys.exit(0 if bench(args.c_tool, args.repeat) else 1)
+    if args.action == "bench-summary":
+        bench_summary(limit=args.limit)
+        return
+    if not args.output:
+        parser.error("-o OUTPUT is required")
+    if not CHARINFO_DIR.is_dir():
+        print(f"[ERROR] Character info directory not found: {CHARINFO_DIR}")
+        sys.exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+    started = time.perf_counter()
+    if args.changed:
+        paths = [line.rstrip("\n") for line in sys.stdin if line.strip()]
+        characters = changed_characters(paths)
+    else:
+        characters = all_characters()
+    count = export(args.output, characters)
+    print(f"[CHAR2JSON] {count} characters -> {args.output} ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
+# --- end charsave_reader.py ---
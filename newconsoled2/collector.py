@@ -0,0 +1,315 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/collector.py ---
+#!/usr/bin/env python3
+"""
+Постоянен колектор - заменя cron-а, който пуска 00.start.sh наново всеки път.
+
+Всеки източник си има собствен интервал (COLLECTOR_INTERVALS):
+    games   gl + всички 'cl <id>' по една топла asyncio сесия -> all_games.json,
+            games.txt -> server.json (server_info.py, само при промяна)
+    status  uptime + status -> d2gs_*.json + status_history.db
+    ladder  webladder.html + ladder_index.json, само ако d2ladder.xml се е сменил
+    chars   COLLECTOR_CHAR_BUILDERS при промяна в charsave/charinfo (change_feed.py -
+            inotify, секунди след logout), само с променените файлове
+
+D2GS сесията, отворената status_history база и последно публикуваното
+съдържание остават в паметта между обновяванията; файлове се пишат атомарно
+и само когато съдържанието им е различно.
+
+    python3 collector.py serve                     # foreground (systemd/screen)
+    python3 collector.py serve --only games,status
+    python3 collector.py once ladder               # едно обновяване и изход
+"""
+import argparse
+import asyncio
+import filecmp
+import json
+import os
+import shutil
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (D2GS_HOST, D2GS_PORT, D2GS_PASS, CONSOLE_BACKOFF_MIN, CONSOLE_BACKOFF_MAX,
+                    COLLECTOR_INTERVALS, COLLECTOR_WEB_DIR, COLLECTOR_CHAR_BUILDERS,
+                    CHARSAVE_DIR, CHARINFO_DIR, LADDER_XML, GAMES_TXT, HTML_LADDER)
+from async_console import AsyncD2GSConsole, snapshot
+from change_feed import open_change_feed, RESCAN
+from json_stream import publish, write_text_atomic
+from ladder_stream import build_ladder
+from server_info import ServerInfo
+from status_history import StatusHistory
+from status_parser import parse_output
+from status_publish import publish_status, record_history
+
+PRUNE_EVERY = 3600   # status_history.prune() веднъж на час, не на всяка проба
+
+
+class WarmConsole:
+    """
+    Една AsyncD2GSConsole, отворена между обновяванията. При загубена връзка
+    или timeout сесията се затваря и следва reconnect с експоненциален backoff.
+    """
+    def __init__(self, host=D2GS_HOST, port=D2GS_PORT, password=D2GS_PASS):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.session = None
+        self.delay = CONSOLE_BACKOFF_MIN
+        self.next_attempt = 0.0
+        self.lock = asyncio.Lock()
+
+    async def _connect(self):
+        async with self.lock:   # games и status могат да поискат сесия едновременно
+            if self.session is not None:
+                return
+            now = time.monotonic()
+            if now < self.next_attempt:
+                raise ConnectionError(
+                    f"D2GS console unavailable, next reconnect in {self.next_attempt - now:.1f}s")
+            session = AsyncD2GSConsole(self.host, self.port, self.password)
+            try:
+                await session.connect()
+            except ConnectionError:
+                self.next_attempt = time.monotonic() + self.delay
+                self.delay = min(self.delay * 2, CONSOLE_BACKOFF_MAX)
+                raise
+            self.session = session
+            self.delay = CONSOLE_BACKOFF_MIN
+            print(f"[COLLECTOR] Connected to D2GS console {self.host}:{self.port}")
+
+    async def run_command(self, command, timeout=7):
+        if self.session is None:
+            await self._connect()
+        session = self.session
+        try:
+            return await session.run_command(command, timeout)
+        except (ConnectionError, TimeoutError):
+            if self.session is session:
+                self.session = None
+                await session.close()
+            raise
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+def write_if_changed(path, text, cache):
+    """Атомарен запис, само ако text се различава от последно записаното (cache: path -> text)."""
+    if cache.get(path) == text and os.path.exists(path):
+        return False
+    write_text_atomic(path, text)
+    cache[path] = text
+    return True
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def mirror_file(src, dst):
+    """Копира src в уеб директорията, само ако е различен (както cmp -s || cp в 00.start.sh)."""
+    if file_signature(src) is None:
+        return False
+    if file_signature(dst) is not None and filecmp.cmp(src, dst, shallow=False):
+        return False
+    tmp = f"{dst}.tmp"
+    shutil.copyfile(src, tmp)
+    publish(tmp, dst)
+    return True
+
+
+class Collector:
+    def __init__(self, web_dir=COLLECTOR_WEB_DIR, ladder_html=HTML_LADDER, intervals=COLLECTOR_INTERVALS):
+        self.web_dir = str(web_dir)
+        self.ladder_html = str(ladder_html)
+        self.intervals = intervals
+        self.console = WarmConsole()
+        self.history = None
+        # sqlite връзката на status_history може да се ползва само от нишката, която я е отворила
+        self.status_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="status")
+        self.last_prune = 0.0
+        self.published = {}      # path -> последно записаното съдържание
+        self.signatures = {}     # източник -> stat подпис на входа му (d2ladder.xml)
+        self.server_info = ServerInfo(GAMES_TXT, os.path.join(self.web_dir, "server.json"))
+        self.stop = asyncio.Event()
+
+    # --- източници ---
+
+    async def collect_games(self):
+        games = await snapshot(self.console)
+        path = os.path.join(self.web_dir, "all_games.json")
+        if write_if_changed(path, json.dumps(games, indent=2), self.published):
+            print(f"[GAMES] {len(games)} games -> {path}")
+        await asyncio.to_thread(self.server_info.publish)
+
+    async def collect_status(self):
+        uptime_raw = await self.console.run_command("uptime")
+        status_raw = await self.console.run_command("status")
+        if not uptime_raw or not status_raw:
+            raise ConnectionError("Partial or no response received from server after commands.")
+        record = parse_output(status_raw, uptime_raw)
+        await asyncio.get_running_loop().run_in_executor(self.status_thread, self._publish_status, record)
+
+    def _publish_status(self, record):
+        publish_status(record["uptime"], record["status"], self.web_dir)
+        if self.history is None:
+            self.history = StatusHistory()
+        prune = time.monotonic() - self.last_prune >= PRUNE_EVERY
+        record_history(self.history, record["status"], prune=prune)
+        if prune:
+            self.last_prune = time.monotonic()
+        # Uptime на машината (досега cronfile.sh)
+        with open("/proc/uptime") as f:
+            write_text_atomic(os.path.join(self.web_dir, "server_uptime.txt"),
+                              f"{float(f.read().split()[0]):.0f}\n")
+
+    async def collect_ladder(self):
+        signature = file_signature(LADDER_XML)
+        if signature is None or signature == self.signatures.get("ladder"):
+            return
+        index = await asyncio.to_thread(
+            build_ladder, str(LADDER_XML), self.ladder_html, os.path.join(self.web_dir, "ladder_index.json"))
+        await asyncio.to_thread(mirror_file, str(LADDER_XML), os.path.join(self.web_dir, "d2ladder.xml"))
+        self.signatures["ladder"] = signature
+        print(f"[LADDER] Rebuilt ({len(index.best_by_name)} characters)")
+
+    async def collect_chars(self, changed=None):
+        """
+        changed=None - пълно обновяване; иначе пътищата от change_feed.py:
+        incremental builder-ите ги получават на stdin (--changed), останалите вървят целите.
+        """
+        for builder in COLLECTOR_CHAR_BUILDERS:
+            command = list(builder["cmd"])
+            stdin = None
+            if changed is not None and builder.get("incremental"):
+                command.append("--changed")
+                stdin = "".join(f"{path}\n" for path in sorted(changed)).encode("utf-8", "surrogateescape")
+            proc = await asyncio.create_subprocess_exec(
+                *command, stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL)
+            await proc.communicate(stdin)
+            if proc.returncode != 0:
+                raise RuntimeError(f"{' '.join(command)} exited with {proc.returncode}")
+        print(f"[CHARS] Rebuilt item/character JSON ("
+              + ("full scan" if changed is None else f"{len(changed)} changed files") + ")")
+
+    async def watch_chars(self):
+        """
+        Вместо интервал: пакети с промени от change_feed.py (inotify или stat polling).
+        d2ladder.xml е в същия feed, така че и стълбицата се обновява веднага.
+        """
+        queue = asyncio.Queue()
+        try:
+            feed = open_change_feed([(CHARSAVE_DIR, 1), (CHARINFO_DIR, 2)], [LADDER_XML], queue)
+        except OSError as e:
+            print(f"[COLLECTOR] chars: cannot watch character files: {e}")
+            return
+        feed.start()
+        print(f"[COLLECTOR] chars: watching via {feed.kind}")
+        stop = asyncio.ensure_future(self.stop.wait())
+        try:
+            await self.run_once("chars")   # пълно обновяване при старт
+            while not self.stop.is_set():
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait({get, stop}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    break
+                batches = [get.result()]
+                while not queue.empty():
+                    batches.append(queue.get_nowait())
+                if RESCAN in batches:
+                    await self.run_once("chars")
+                    continue
+                changed = frozenset().union(*batches)
+                if str(LADDER_XML) in changed:
+                    await self.run_once("ladder")
+                    changed -= {str(LADDER_XML)}
+                if changed:
+                    await self.run_once("chars", changed)
+        finally:
+            stop.cancel()
+            feed.close()
+
+    SOURCES = {
+        "games": collect_games,
+        "status": collect_status,
+        "ladder": collect_ladder,
+        "chars": collect_chars,
+    }
+
+    # --- изпълнение ---
+
+    async def run_once(self, name, *args):
+        started = time.perf_counter()
+        try:
+            await self.SOURCES[name](self, *args)
+            return True
+        except (ConnectionError, TimeoutError, OSError, RuntimeError, ValueError) as e:
+            print(f"[COLLECTOR] {name} failed after {time.perf_counter() - started:.2f}s: {e}")
+            return False
+
+    async def run_source(self, name):
+        interval = self.intervals[name]
+        while not self.stop.is_set():
+            started = time.monotonic()
+            await self.run_once(name)
+            try:
+                await asyncio.wait_for(self.stop.wait(), max(0.0, interval - (time.monotonic() - started)))
+            except asyncio.TimeoutError:
+                pass
+
+    async def serve(self, names):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop.set)
+        print("[COLLECTOR] Sources: " + ", ".join(
+            f"{name} on change" if name == "chars" else f"{name} every {self.intervals[name]}s" for name in names))
+        try:
+            await asyncio.gather(*(self.watch_chars() if name == "chars" else self.run_source(name)
+                                   for name in names))
+        finally:
+            await self.close()
+        print("[COLLECTOR] Stopped")
+
+    async def close(self):
+        await self.console.close()
+        if self.history is not None:
+            await asyncio.get_running_loop().run_in_executor(self.status_thread, self.history.close)
+        self.status_thread.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident collector with per-source refresh intervals")
+    sub = parser.add_subparsers(dest="action", required=True)
+    s = sub.add_parser("serve", help="run all (or --only) sources on their intervals")
+    s.add_argument("--only", help="comma separated sources: " + ",".join(Collector.SOURCES))
+    o = sub.add_parser("once", help="refresh one source and exit")
+    o.add_argument("source", choices=sorted(Collector.SOURCES))
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        names = args.only.split(",") if args.only else list(Collector.SOURCES)
+        unknown = [name for name in names if name not in Collector.SOURCES]
+        if unknown:
+            parser.error(f"unknown source(s): {', '.join(unknown)}")
+        asyncio.run(Collector().serve(names))
+    else:
+        async def once():
+            collector = Collector()
+            try:
+                return await collector.run_once(args.source)
+            finally:
+                await collector.close()
+        sys.exit(0 if asyncio.run(once()) else 1)
+
+
+if __name__ == "__main__":
+    main()
+# --- end collector.py ---
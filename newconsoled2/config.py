@@ -12,11 +12,71 @@ D2GS_HOST = "192.168.88.41"  # ВАШИЯ IP АДРЕС
 D2GS_PORT = 8888             # ВАШИЯ ПОРТ
 D2GS_PASS = "abcd123"        # ВАШАТА ПАРОЛА
 
+# --- CONSOLE DAEMON (една постоянна D2GS сесия за всички колектори) ---
+CONSOLE_SOCKET = BASE_DIR / "d2gs_console.sock"  # Unix socket на console_daemon.py
+CONSOLE_BACKOFF_MIN = 1.0     # секунди до първия опит за reconnect
+CONSOLE_BACKOFF_MAX = 60.0    # таван на експоненциалния backoff
+CONSOLE_KEEPALIVE = 60.0      # 'uptime' при толкова секунди без команда
+
+# --- ASYNC CONSOLE (async_console.py) ---
+ASYNC_PIPELINE_DEPTH = 64     # максимум 'cl' команди в полет по една сесия
+ASYNC_POOL_SIZE = 1           # брой паралелни сесии (ако D2GS приема няколко логина)
+
+# --- STATUS HISTORY (status_history.py) ---
+# Базата е извън logs/, защото 00.start.sh чисти logs/ при всяко пускане
+STATUS_DB = BASE_DIR / "status_history.db"
+STATUS_RETENTION = {          # секунди; дневните кофи (86400) се пазят завинаги
+    "raw": 2 * 86400,
+    60: 14 * 86400,
+    3600: 400 * 86400,
+}
+
+# --- CHARACTER MANIFEST (char_manifest.py) ---
+# (mtime, size, inode) + парсиран запис за всеки charinfo/charsave файл
+MANIFEST_DB = BASE_DIR / "char_manifest.db"
+
+# --- ITEMS (d2consoleportal/07.generate_items_json.py) ---
+ITEMS_WORKERS = os.cpu_count() or 1   # процеси за парсване на D2S файловете (1 -> последователно)
+ITEMS_JSON_FORMAT = "compact"         # compact | pretty (indent=2, старият формат) | ndjson
+
+# --- BUILD CACHE (build_cache.py) ---
+# digest на входовете при последния успешен build на всеки HTML/JSON builder
+BUILD_CACHE_DB = BASE_DIR / "build_cache.db"
+
 # PVPGN FILE LOCATIONS (Фиксирани пътища за D2S файлове)
 PVPGN_ROOT = "/usr/local/pvpgn/var/pvpgn"
 CHARINFO_DIR = Path(PVPGN_ROOT) / "charinfo"
 CHARSAVE_DIR = Path(PVPGN_ROOT) / "charsave"
 LADDER_XML = Path(PVPGN_ROOT) / "ladders/d2ladder.xml"
+GAMES_TXT = Path(PVPGN_ROOT) / "logs/games.txt"     # bntrackd изход
+
+# --- COLLECTOR (collector.py - постоянен процес вместо cron на 00.start.sh) ---
+# Секунди между обновяванията на всеки източник
+COLLECTOR_INTERVALS = {
+    "games": 10,      # gl + cl -> all_games.json, games.txt -> server.json
+    "status": 30,     # uptime + status -> d2gs_*.json, status_history
+    "ladder": 300,    # d2ladder.xml -> webladder.html, ladder_index.json (само при промяна)
+    "chars": 60,      # само ако change_feed.py падне на stat polling (иначе inotify)
+}
+# Уебът (d2console.js, charinfo.js) чете от тук, не от WEB_ROOT_DIR
+COLLECTOR_WEB_DIR = Path("/var/www/html/data")
+# games.txt, парсван веднъж при промяна (server_info.py) - за d2console.js и 06_build_html.py
+SERVER_JSON = COLLECTOR_WEB_DIR / "server.json"
+# Последните 24ч от status_history.db (status_publish.py, status_history.py export)
+JSON_STATUS_HISTORY = COLLECTOR_WEB_DIR / "d2gs_status_history.json"
+PORTAL_DIR = BASE_DIR.parent / "d2consoleportal"
+# Пускат се (последователно), когато някой charsave/charinfo файл се смени.
+# "incremental": builder-ът приема --changed и списък с пътища на stdin
+COLLECTOR_CHAR_BUILDERS = [
+    {"cmd": ["python3", str(PORTAL_DIR / "07.generate_items_json.py")], "incremental": True},
+    {"cmd": ["python3", str(BASE_DIR / "charsave_reader.py"), "-o", str(COLLECTOR_WEB_DIR) + "/"], "incremental": True},
+]
+
+# --- CHANGE FEED (change_feed.py) ---
+CHANGE_FEED = "auto"          # auto (inotify, иначе stat polling) | inotify | polling
+CHANGE_DEBOUNCE = 2.0         # секунди тишина, преди пакетът с промени да се пусне
+CHANGE_MAX_DELAY = 10.0       # но не по-късно от толкова след първото събитие
+
 
 # --- OUTPUT CONFIGURATION (Web Paths) ---
 # Директория, където ще се записват JSON файловете за уеба
@@ -28,5 +88,6 @@ WEB_ROOT_DIR.mkdir(parents=True, exist_ok=True)
 JSON_GAMES = WEB_ROOT_DIR / "all_games.json"
 JSON_STATUS = WEB_ROOT_DIR / "server_status.json"
 JSON_ALL_CHARS = WEB_ROOT_DIR / "all_char_all_acc.json"
+JSON_OUTPUT_FORMAT = "compact"  # compact | pretty (indent=2) | ndjson - виж json_stream.py
 HTML_LADDER = Path("/var/www/html/webladder.html")
 # --- end config.py ---
@@ -0,0 +1,294 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/console_daemon.py ---
+#!/usr/bin/env python3
+"""
+Long-lived D2GS console daemon.
+
+Keeps ONE authenticated telnet session to D2GS and serves `gl`, `cl <id>`,
+`status` and `uptime` to every collector over a local Unix socket, so a
+sweep no longer pays connect + password + prompt wait per command.
+
+    python3 console_daemon.py serve                 # foreground (systemd/screen)
+    python3 console_daemon.py query gl "cl 36"      # print raw outputs
+    python3 console_daemon.py dump-cl IDS_FILE DIR  # cl_<id>_raw.txt for 05.gameinfo2json_v2.py
+
+Protocol: one JSON object per line in each direction.
+    -> {"cmd": "cl 36"}
+    <- {"ok": true, "output": "..."}   or   {"ok": false, "error": "..."}
+"""
+import argparse
+import json
+import os
+import re
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from config import (CONSOLE_SOCKET, CONSOLE_BACKOFF_MIN, CONSOLE_BACKOFF_MAX,
+                    CONSOLE_KEEPALIVE)
+from console_parser import D2GSConsole
+
+# Само командите, които колекторите ползват - никакъв достъп до останалата конзола
+ALLOWED_COMMAND = re.compile(r"^(gl|status|uptime|cl \d+)$")
+
+
+class ConsoleSession:
+    """
+    Една D2GSConsole сесия, споделена между всички клиенти.
+    Командите се сериализират с lock; при загубена връзка следва reconnect
+    с експоненциален backoff (CONSOLE_BACKOFF_MIN .. CONSOLE_BACKOFF_MAX).
+    """
+    def __init__(self, console_factory=D2GSConsole):
+        self.console_factory = console_factory
+        self.console = None
+        self.lock = threading.Lock()
+        self.delay = CONSOLE_BACKOFF_MIN
+        self.next_attempt = 0.0
+        self.last_used = time.monotonic()
+
+    def _connect(self):
+        """Свързва се, ако backoff прозорецът позволява. Вика се под self.lock."""
+        now = time.monotonic()
+        if now < self.next_attempt:
+            raise ConnectionError(
+                f"D2GS console unavailable, next reconnect in {self.next_attempt - now:.1f}s")
+        try:
+            self.console = self.console_factory().__enter__()
+        except Exception as e:
+            self.console = None
+            self.next_attempt = now + self.delay
+            print(f"[DAEMON] Connect failed ({e}), retry in {self.delay:.0f}s")
+            self.delay = min(self.delay * 2, CONSOLE_BACKOFF_MAX)
+            raise ConnectionError(f"Failed to connect to D2GS console: {e}")
+        self.delay = CONSOLE_BACKOFF_MIN
+        self.next_attempt = 0.0
+        self.last_used = time.monotonic()
+        print("[DAEMON] D2GS console session established")
+
+    def _drop(self):
+        if self.console is not None:
+            try:
+                self.console.__exit__(None, None, None)
+            except Exception:
+                pass
+        self.console = None
+
+    def run(self, command):
+        """Изпълнява команда; при счупена връзка прави един reconnect и повтаря."""
+        with self.lock:
+            for attempt in (1, 2):
+                if self.console is None:
+                    self._connect()
+                try:
+                    output = self.console.run_command(command)
+                    self.last_used = time.monotonic()
+                    return output
+                except (OSError, EOFError) as e:
+                    print(f"[DAEMON] Session lost during '{command}': {e}")
+                    self._drop()
+                    if attempt == 2:
+                        raise ConnectionError(f"D2GS console session lost: {e}")
+
+    def maintain(self, stop_event):
+        """Фонов цикъл: възстановява връзката и праща keepalive при бездействие."""
+        while not stop_event.wait(1.0):
+            if time.monotonic() - self.last_used < CONSOLE_KEEPALIVE and self.console is not None:
+                continue
+            if not self.lock.acquire(blocking=False):
+                continue  # в момента някой клиент ползва сесията
+            try:
+                if self.console is None:
+                    if time.monotonic() >= self.next_attempt:
+                        self._connect()
+                else:
+                    self.console.run_command("uptime")
+                    self.last_used = time.monotonic()
+            except (ConnectionError, OSError, EOFError):
+                self._drop()
+            finally:
+                self.lock.release()
+
+    def close(self):
+        with self.lock:
+            self._drop()
+
+
+class ConsoleRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                command = json.loads(raw).get("cmd", "").strip()
+            except (ValueError, AttributeError):
+                self._reply({"ok": False, "error": "Malformed request"})
+                continue
+            if not ALLOWED_COMMAND.match(command):
+                self._reply({"ok": False, "error": f"Command not allowed: {command!r}"})
+                continue
+            try:
+                output = self.server.session.run(command)
+                self._reply({"ok": True, "output": output})
+            except ConnectionError as e:
+                self._reply({"ok": False, "error": str(e)})
+
+    def _reply(self, payload):
+        self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class ConsoleServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, session):
+        self.session = session
+        if os.path.exists(socket_path):
+            # Същата проверка като open_console(): махаме socket-а само ако никой не слуша на него
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(socket_path))
+            except ConnectionRefusedError:
+                os.unlink(socket_path)  # остатък от предишен (убит) процес
+            else:
+                raise RuntimeError(f"Another console daemon is already listening on {socket_path}")
+            finally:
+                probe.close()
+        super().__init__(str(socket_path), ConsoleRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+
+class D2GSDaemonConsole(D2GSConsole):
+    """
+    Същият интерфейс като D2GSConsole, но командите минават през демона.
+    Парсиращите методи (get_server_status, get_game_list_and_info) се наследяват.
+    """
+    def __init__(self, socket_path=CONSOLE_SOCKET):
+        super().__init__()
+        self.socket_path = str(socket_path)
+        self.sock = None
+        self.stream = None
+
+    def connect(self):
+        """Свързва се с демона; OSError (ENOENT, ECONNREFUSED, ...) се пуска нагоре."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self.stream = sock.makefile("rwb")
+
+    def __enter__(self):
+        if self.sock is None:
+            try:
+                self.connect()
+            except OSError as e:
+                raise ConnectionError(f"Failed to connect to console daemon at {self.socket_path}: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.sock:
+            self.stream.close()
+            self.sock.close()
+
+    def run_command(self, command, timeout=5):
+        started = time.perf_counter()
+        self.stream.write(json.dumps({"cmd": command}).encode("utf-8") + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Console daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise ConnectionError(reply.get("error", "Unknown daemon error"))
+        self._record_timing(command, started)
+        return reply["output"]
+
+
+def open_console():
+    """Демонът, ако върви; иначе директна telnet сесия (старото поведение)."""
+    console = D2GSDaemonConsole()
+    try:
+        console.connect()
+    except FileNotFoundError:
+        return D2GSConsole()
+    except ConnectionRefusedError as e:
+        # Socket файлът е останал от сринал се демон - никой не слуша на него
+        print(f"[DAEMON] Stale socket {CONSOLE_SOCKET} ({e}), falling back to telnet")
+        return D2GSConsole()
+    return console
+
+
+def serve():
+    session = ConsoleSession()
+    stop_event = threading.Event()
+    keeper = threading.Thread(target=session.maintain, args=(stop_event,), daemon=True)
+    try:
+        server = ConsoleServer(CONSOLE_SOCKET, session)
+    except RuntimeError as e:
+        print(f"[DAEMON] {e}, exiting")
+        sys.exit(1)
+    print(f"[DAEMON] Listening on {CONSOLE_SOCKET}")
+    # systemd/kill праща SIGTERM - излизаме чисто, за да махнем socket файла
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    keeper.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
+        session.close()
+        if os.path.exists(CONSOLE_SOCKET):
+            os.unlink(CONSOLE_SOCKET)
+
+
+def query(commands):
+    with D2GSDaemonConsole() as console:
+        for command in commands:
+            print(console.run_command(command))
+        print(console.timing_report(), file=sys.stderr)
+
+
+def dump_cl(ids_file, out_dir):
+    """Замества 03.d2gs_cl_runner.sh + 04_d2gs_get_cl.exp: една връзка за всички ID-та."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(ids_file) as f:
+        game_ids = [line.strip() for line in f if line.strip().isdigit()]
+    with D2GSDaemonConsole() as console:
+        for game_id in game_ids:
+            output = console.run_command(f"cl {game_id}")
+            with open(os.path.join(out_dir, f"cl_{game_id}_raw.txt"), "w") as f:
+                f.write(output + "\n")
+        print(console.timing_report())
+    print(f"[DAEMON] Saved cl output for {len(game_ids)} games to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="D2GS console daemon")
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("serve", help="run the daemon in the foreground")
+    q = sub.add_parser("query", help="run commands through the daemon")
+    q.add_argument("commands", nargs="+")
+    d = sub.add_parser("dump-cl", help="write cl_<id>_raw.txt for every game ID in a file")
+    d.add_argument("ids_file")
+    d.add_argument("out_dir")
+    args = parser.parse_args()
+
+    try:
+        if args.action == "serve":
+            serve()
+        elif args.action == "query":
+            query(args.commands)
+        else:
+            dump_cl(args.ids_file, args.out_dir)
+    except ConnectionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+# --- end console_daemon.py ---
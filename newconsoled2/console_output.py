@@ -0,0 +1,144 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/console_output.py ---
+"""
+Парсване на изхода от D2GS конзолата (gl / cl <id>) и framing константите.
+Без telnetlib - ползва се и от синхронния D2GSConsole, и от async_console.py.
+"""
+import re
+
+# Framing: отговорът на команда свършва САМО когато "D2GS>" е в началото на ред.
+# Един '>' в име на игра или в '+--->' таблица не е prompt.
+PROMPT = b"D2GS>"
+PROMPT_RE = re.compile(rb"(?:^|\n)D2GS> ?\Z")      # prompt в края на буфера
+PROMPT_ANY_RE = re.compile(rb"(?:^|\n)D2GS> ?")     # prompt някъде в буфера (pipelining)
+LOGIN_FAILED_RE = re.compile(rb"Wrong password|Sorry!")
+
+CL_HEADER_RE = re.compile(r'\[(.*?)\s*:\s*(.*?)\s*\]')
+
+
+def parse_game_list(gl_raw):
+    """
+    Парсира изхода на 'gl' (Game List), като изпълнява Вашата логика за заместване 
+    и филтриране (grep -w N).
+    """
+    game_ids = []
+
+    table_lines = []
+    # 1. Филтриране за редове, съдържащи 'N' и започващи с '|'
+    for line in gl_raw.splitlines():
+        if line.startswith("|") and "N" in line and not line.startswith("+-"):
+             table_lines.append(line.strip())
+
+    for line in table_lines:
+
+        # 1. & 2. Заменяме 1 или повече интервала с един '|'
+        temp_line = re.sub(r'\s+', '|', line.strip())
+
+        # 3. Премахваме дублиращите се '|'
+        temp_line = re.sub(r'\|+', '|', temp_line)
+
+        # Разделяне по "|"
+        columns = temp_line.split('|')
+
+        # ID-то се пада на 4-ти елемент (индекс 3)
+        if len(columns) > 3: 
+            game_id = columns[3].strip()
+            if game_id.isdigit():
+                game_ids.append(game_id)
+
+    return game_ids
+
+
+def parse_cl_output(raw_output):
+    """Парсира суровия изход от 'cl <ID>' командата, като игнорира празни ключове."""
+    game_info = {}
+    characters = []
+    lines = raw_output.splitlines()
+
+    # 1. Парсиране на Header Info [Key : Value]
+    for line in lines:
+        for match in CL_HEADER_RE.finditer(line):
+            key = match.group(1).strip()
+            val = match.group(2).strip()
+
+            # КОРЕКЦИЯ: ИГНОРИРАНЕ НА ПРАЗНИ КЛЮЧОВЕ
+            if key: 
+                game_info[key] = val if val else None
+
+    # 2. Парсиране на Character Table (Базирано на фиксирани индекси)
+    char_table_started = False
+    for line in lines:
+        if line.startswith("+-No"):
+            char_table_started = True
+            continue
+
+        if char_table_started and line.startswith("|"):
+            if line.startswith("+---") or line.strip() == "":
+                continue
+
+            # Фиксираните индекси
+            no = line[2:6].strip()
+            acct = line[6:22].strip()
+            charname = line[22:40].strip()
+            ip = line[40:58].strip()
+            cls = line[58:64].strip()
+            lvl = line[64:72].strip()
+            time = line[72:80].strip()
+
+            if no and acct and charname:
+                characters.append({
+                    "No": no,
+                    "AcctName": acct,
+                    "CharName": charname,
+                    "IPAddress": ip,
+                    "Class": cls,
+                    "Level": lvl,
+                    "EnterTime": time
+                })
+
+    return {
+        "GameInfo": game_info,
+        "Characters": characters
+    }
+
+
+def calculate_xp_rate(game_data):
+    """Изчислява XP Rate."""
+    game_info = game_data.get("GameInfo", {})
+    user_count_str = game_info.get("UserCount")
+
+    try:
+        user_count = int(user_count_str) if user_count_str else 0
+    except ValueError:
+        user_count = 0
+
+    if user_count >= 1:
+        xp_rate = (user_count + 1) / 2
+    else:
+        xp_rate = 1.0
+
+    game_info["UserCount"] = user_count
+    game_info["XPRateMultiplier"] = round(xp_rate, 2)
+    xp_bonus_percent = (xp_rate - 1.0) * 100
+    game_info["XPBonusPercent"] = f"+{round(xp_bonus_percent):.0f}%"
+    game_data["GameInfo"] = game_info
+    return game_data
+
+
+def format_timings(timings):
+    """Кратко резюме на латентността: timings е списък от (command, seconds)."""
+    if not timings:
+        return "[TIMING] No commands executed."
+    total = sum(seconds for _, seconds in timings)
+    slowest_cmd, slowest = max(timings, key=lambda t: t[1])
+    return (f"[TIMING] {len(timings)} commands in {total * 1000:.1f} ms "
+            f"(avg {total / len(timings) * 1000:.1f} ms, "
+            f"max {slowest * 1000:.1f} ms for '{slowest_cmd}')")
+
+
+def strip_command_echo(output, command):
+    """Маха ехото на командата (първия ред, ако го съдържа) и празните редове около изхода."""
+    first, sep, rest = output.partition("\n")
+    if command in first:
+        output = rest
+    return output.strip()
+# --- end console_output.py ---
@@ -1,26 +1,30 @@
 # --- start /home/support/git/pvpgn-webportal/newconsoled2/console_parser.py (ФИНАЛЕН) ---
 #!/usr/bin/env python3
 import json
-import re
 import telnetlib
 from datetime import datetime
 import time 
 import os
 from config import D2GS_HOST, D2GS_PORT, D2GS_PASS, JSON_STATUS, JSON_GAMES, BASE_DIR 
 from pathlib import Path
+from console_output import (PROMPT_RE, LOGIN_FAILED_RE, parse_game_list, parse_cl_output,
+                            calculate_xp_rate, format_timings, strip_command_echo)
+from status_parser import parse_output
 
 TEMP_GL_FILE = BASE_DIR / "temp_gl_raw.txt"
 
+
 class D2GSConsole:
     """
     Класа за комуникация с D2GS Telnet конзолата и парсиране на изхода.
     """
-    def __init__(self):
-        self.host = D2GS_HOST
-        self.port = D2GS_PORT
-        self.password = D2GS_PASS
+    def __init__(self, host=D2GS_HOST, port=D2GS_PORT, password=D2GS_PASS):
+        self.host = host
+        self.port = port
+        self.password = password
         self.tn = None
-    
+        self.timings = []  # (command, seconds) за всяка изпълнена команда
+
     def __enter__(self):
         # 1. Свързване
         try:
@@ -28,63 +32,53 @@ class D2GSConsole:
         except Exception as e:
             raise ConnectionError(f"Failed to connect to Telnet host: {e}")
 
-        # 2. Изчакай заглавния банер ("D2GS Console")
-        self.tn.read_until(b"Console", timeout=5)
-        
-        # 3. Изпрати паролата, след като видиш "Password:"
+        # 2. Банер ("D2GS Console") и "Password:" идват заедно - чакаме само второто
         self.tn.read_until(b"Password:", timeout=5)
-        self.tn.write(self.password.encode('ascii') + b"\n")
 
-        # !!! ПАУЗА СЛЕД ПАРОЛАТА (1.0 сек) !!!
-        time.sleep(1.0) 
-
-        # 4. Четене до крайния prompt (>)
-        output = self.tn.read_until(b">", timeout=5)
-        
-        if b"Wrong password" in output or b"Sorry!" in output:
-             # Ако логването не е минало, правим втори опит
-             self.tn.write(self.password.encode('ascii') + b"\n")
-             output = self.tn.read_until(b">", timeout=5)
-             if b"Wrong password" in output or b"Sorry!" in output:
-                  raise ConnectionError("Failed to login to D2GS Telnet console. Check password.")
-        
-        return self
+        # 3. Паролата; без пауза - чакаме prompt-а или съобщение за грешка
+        for attempt in (1, 2):
+            self.tn.write(self.password.encode('ascii') + b"\n")
+            index, _, _ = self.tn.expect([PROMPT_RE, LOGIN_FAILED_RE], timeout=5)
+            if index == 0:
+                return self
+            if index == -1:
+                raise ConnectionError("Timed out waiting for the D2GS> prompt after login.")
+            # Ако логването не е минало, правим втори опит
+        raise ConnectionError("Failed to login to D2GS Telnet console. Check password.")
 
     def __exit__(self, exc_type, exc_value, traceback):
         if self.tn:
             self.tn.write(b"exit\n")
             self.tn.close()
 
-    def run_command(self, command, timeout=5):
-        """Изпълнява команда и връща суровия изход като стринг, със sleep."""
-        # !!! ПАУЗА ПРЕДИ КОМАНДАТА (0.5 сек) !!!
-        time.sleep(0.5) 
+    def run_command(self, command, timeout=7):
+        """
+        Изпълнява команда и връща суровия изход като стринг.
+        Връща веднага щом дойде "D2GS>" prompt-ът; без sleep.
+        """
+        started = time.perf_counter()
         self.tn.write(command.encode('ascii') + b"\n")
-        
-        # Четене докато не се появи отново CLI prompt (>)
-        output = self.tn.read_until(b">", timeout=7).decode('ascii', 'ignore')
-        
-        # Премахване на ехото на командата и крайния prompt
-        output = output.replace(command, "", 1).strip()
-        if output.endswith(">"):
-             output = output[:-1].strip()
-        
-        return output
+
+        index, match, raw = self.tn.expect([PROMPT_RE], timeout=timeout)
+        if index == -1:
+            raise TimeoutError(f"No D2GS> prompt within {timeout}s after '{command}'")
+        self._record_timing(command, started)
+
+        return strip_command_echo(raw[:match.start()].decode('ascii', 'ignore'), command)
+
+    def _record_timing(self, command, started):
+        self.timings.append((command, time.perf_counter() - started))
+
+    def timing_report(self):
+        """Кратко резюме на латентността на командите в тази сесия."""
+        return format_timings(self.timings)
 
     def get_server_status(self):
         """Извлича uptime, status и записва server_status.json."""
         status_raw = self.run_command("status")
         uptime_raw = self.run_command("uptime")
 
-        status_data = {}
-        for line in status_raw.splitlines():
-            if ":" in line:
-                key, value = line.split(":", 1)
-                status_data[key.strip()] = value.strip()
-        
-        uptime_match = re.search(r"uptime (.*)", uptime_raw)
-        status_data['Uptime'] = uptime_match.group(1).strip() if uptime_match else None
-        
+        status_data = parse_output(status_raw, uptime_raw)
         status_data['LastUpdateTime'] = datetime.now().isoformat()
         
         with open(JSON_STATUS, 'w') as f:
@@ -94,36 +88,7 @@ class D2GSConsole:
         return status_data
 
     def parse_game_list(self, gl_raw):
-        """
-        Парсира изхода на 'gl' (Game List), като изпълнява Вашата логика за заместване 
-        и филтриране (grep -w N).
-        """
-        game_ids = []
-        
-        table_lines = []
-        # 1. Филтриране за редове, съдържащи 'N' и започващи с '|'
-        for line in gl_raw.splitlines():
-            if line.startswith("|") and "N" in line and not line.startswith("+-"):
-                 table_lines.append(line.strip())
-
-        for line in table_lines:
-            
-            # 1. & 2. Заменяме 1 или повече интервала с един '|'
-            temp_line = re.sub(r'\s+', '|', line.strip())
-            
-            # 3. Премахваме дублиращите се '|'
-            temp_line = re.sub(r'\|+', '|', temp_line)
-            
-            # Разделяне по "|"
-            columns = temp_line.split('|')
-
-            # ID-то се пада на 4-ти елемент (индекс 3)
-            if len(columns) > 3: 
-                game_id = columns[3].strip()
-                if game_id.isdigit():
-                    game_ids.append(game_id)
-            
-        return game_ids
+        return parse_game_list(gl_raw)
 
     def get_game_list_and_info(self):
         """Извлича Game IDs, след това извлича CL информация за всяка игра."""
@@ -158,92 +123,27 @@ class D2GSConsole:
         return all_games_data
     
     def _parse_cl_output(self, raw_output):
-        """Парсира суровия изход от 'cl <ID>' командата, като игнорира празни ключове."""
-        game_info = {}
-        characters = []
-        lines = raw_output.splitlines()
-
-        # 1. Парсиране на Header Info [Key : Value]
-        header_pattern = re.compile(r'\[(.*?)\s*:\s*(.*?)\s*\]')
-        for line in lines:
-            for match in header_pattern.finditer(line):
-                key = match.group(1).strip()
-                val = match.group(2).strip()
-                
-                # КОРЕКЦИЯ: ИГНОРИРАНЕ НА ПРАЗНИ КЛЮЧОВЕ
-                if key: 
-                    game_info[key] = val if val else None
-
-        # 2. Парсиране на Character Table (Базирано на фиксирани индекси)
-        char_table_started = False
-        for line in lines:
-            if line.startswith("+-No"):
-                char_table_started = True
-                continue
-            
-            if char_table_started and line.startswith("|"):
-                if line.startswith("+---") or line.strip() == "":
-                    continue
-                
-                # Фиксираните индекси
-                no = line[2:6].strip()
-                acct = line[6:22].strip()
-                charname = line[22:40].strip()
-                ip = line[40:58].strip()
-                cls = line[58:64].strip()
-                lvl = line[64:72].strip()
-                time = line[72:80].strip()
-                
-                if no and acct and charname:
-                    characters.append({
-                        "No": no,
-                        "AcctName": acct,
-                        "CharName": charname,
-                        "IPAddress": ip,
-                        "Class": cls,
-                        "Level": lvl,
-                        "EnterTime": time
-                    })
-        
-        return {
-            "GameInfo": game_info,
-            "Characters": characters
-        }
+        return parse_cl_output(raw_output)
 
     def _calculate_xp_rate(self, game_data):
-        """Изчислява XP Rate."""
-        game_info = game_data.get("GameInfo", {})
-        user_count_str = game_info.get("UserCount")
-        
-        try:
-            user_count = int(user_count_str) if user_count_str else 0
-        except ValueError:
-            user_count = 0
-            
-        if user_count >= 1:
-            xp_rate = (user_count + 1) / 2
-        else:
-            xp_rate = 1.0
-            
-        game_info["UserCount"] = user_count
-        game_info["XPRateMultiplier"] = round(xp_rate, 2)
-        xp_bonus_percent = (xp_rate - 1.0) * 100
-        game_info["XPBonusPercent"] = f"+{round(xp_bonus_percent):.0f}%"
-        game_data["GameInfo"] = game_info
-        return game_data
+        return calculate_xp_rate(game_data)
 
 
 def main():
-    print(f"Connecting to D2GS Console at {D2GS_HOST}:{D2GS_PORT}...")
+    # Ако console_daemon.py върви, ползваме неговата постоянна сесия (без нов login)
+    from console_daemon import open_console
+    console = open_console()
+    print(f"Connecting to D2GS Console via {type(console).__name__}...")
     try:
-        with D2GSConsole() as console:
+        with console:
             console.get_server_status()
             console.get_game_list_and_info()
+            print(console.timing_report())
 
     except ConnectionError as e:
         print(f"Error: {e}")
         print("Please ensure the D2GS server is running and the Telnet port is correct and accessible.")
-    except telnetlib.socket.timeout:
+    except (telnetlib.socket.timeout, TimeoutError):
         print(f"Error: Telnet connection timed out to {D2GS_HOST}:{D2GS_PORT}. Check network connectivity.")
     except Exception as e:
         print(f"An unexpected error occurred: {e}. If the Telnet connection fails repeatedly, it may be a network or host issue.")
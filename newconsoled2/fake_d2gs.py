@@ -0,0 +1,146 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/fake_d2gs.py ---
+#!/usr/bin/env python3
+"""
+Локален фалшив D2GS console сървър за тестове и бенчмарк без истински realm.
+
+Връща записания изход от fixtures/ (gl.txt, cl_<id>.txt, status.txt, uptime.txt)
+със същия банер, парола, ехо и "D2GS>" prompt като истинската конзола.
+
+    python3 fake_d2gs.py --port 8889                      # записаните 2 игри
+    python3 fake_d2gs.py --port 8889 --games 40 --rtt 0.02  # 40 синтетични игри, 20 ms RTT
+
+--rtt забавя всеки отговор без да блокира следващите команди (мрежова латентност);
+--cost е последователното време за обработка на команда (CPU на D2GS).
+"""
+import argparse
+import asyncio
+from pathlib import Path
+
+from config import BASE_DIR, D2GS_PASS
+
+FIXTURES_DIR = BASE_DIR / "fixtures"
+CLASSES = ("Ama", "Sor", "Nec", "Pal", "Bar", "Dru", "Ass")
+DIFFICULTIES = ("normal", "nightmare", "hell")
+
+
+def load_fixtures(fixtures_dir):
+    """Чете записания изход; ключът е командата, която го е произвела."""
+    replies = {}
+    for path in Path(fixtures_dir).glob("*.txt"):
+        command = path.stem.replace("_", " ")   # cl_36.txt -> "cl 36"
+        replies[command] = path.read_bytes().rstrip(b"\r\n")
+    return replies
+
+
+def synthetic_games(count):
+    """gl таблица + cl изход за count игри със същите колони като истинския D2GS."""
+    gl_lines = ["+-No.--GameName---------GamePass---------ID----GameVer--Type--Difficulty--"
+                "Ladder-----Users-CreateTime-Dis-+"]
+    replies = {}
+    users_total = 0
+    for n in range(1, count + 1):
+        game_id = 100 + n
+        name = f"Game{n:03d}"
+        difficulty = DIFFICULTIES[n % 3]
+        users = n % 8 + 1
+        users_total += users
+        gl_lines.append(f"| {n:03d}  {name:<34}{game_id:<6}exp      sc    {difficulty:<12}"
+                        f"ladder     {users:<6}00:37:07   N   |")
+        cl_lines = [
+            "+-GameInfo" + "-" * 72 + "+",
+            f"[GameName : {name}] [GamePass : ] [GameId : {game_id}]",
+            f"[GameVer : exp] [GameType : sc] [Difficult : {difficulty}] [Ladder : ladder]",
+            f"[UserCount : {users}] [CreateTime : 00:37:07] [Disable : N]",
+            "+-No.-AcctName--------CharName----------IPAddress---------Class-Level---EnterTime+",
+        ]
+        for u in range(1, users + 1):
+            cl_lines.append("| " + f"{u:02d}  " + f"acc{n}_{u}".ljust(16) + f"char{n}_{u}".ljust(18)
+                            + f"10.0.{n}.{u}".ljust(18) + CLASSES[u % 7].ljust(6)
+                            + str(u * 10).ljust(8) + "00:40:00 |")
+        cl_lines.append("+" + "-" * 80 + "+")
+        replies[f"cl {game_id}"] = "\r\n".join(cl_lines).encode("ascii")
+    gl_lines.append("+" + "-" * 105 + "+")
+    gl_lines.append("")
+    gl_lines.append(f"Total: {count} games running, {users_total} users in game.")
+    replies["gl"] = "\r\n".join(gl_lines).encode("ascii")
+    return replies
+
+
+class FakeD2GS:
+    def __init__(self, replies, password=D2GS_PASS, rtt=0.0, cost=0.0):
+        self.replies = replies
+        self.password = password
+        self.rtt = rtt
+        self.cost = cost
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+
+        def send(data):
+            # Всеки отговор пътува rtt секунди, но следващата команда не го чака
+            if self.rtt:
+                loop.call_later(self.rtt, writer.write, data)
+            else:
+                writer.write(data)
+
+        try:
+            writer.write(b"D2GS Console\r\nPassword: ")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.strip().decode("ascii", "ignore") == self.password:
+                    break
+                writer.write(b"Wrong password, Sorry!\r\nPassword: ")
+            send(b"\r\nD2GS> ")
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.strip().decode("ascii", "ignore")
+                if command == "exit":
+                    return
+                if self.cost:
+                    await asyncio.sleep(self.cost)
+                output = self.replies.get(command, f"Unknown command: {command}".encode("ascii"))
+                send(command.encode("ascii") + b"\r\n" + output + b"\r\nD2GS> ")
+        finally:
+            if self.rtt:
+                await asyncio.sleep(self.rtt)  # нека изпратените отговори стигнат до клиента
+            writer.close()
+
+
+async def serve(host, port, server):
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"[FAKE] D2GS console on {host}:{port} ({len(server.replies)} canned replies)")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake D2GS console for offline tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8889)
+    parser.add_argument("--password", default=D2GS_PASS)
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR))
+    parser.add_argument("--games", type=int, default=0,
+                        help="replace gl/cl fixtures with N synthetic games")
+    parser.add_argument("--rtt", type=float, default=0.0, help="per-reply network delay, seconds")
+    parser.add_argument("--cost", type=float, default=0.0, help="serial per-command cost, seconds")
+    args = parser.parse_args()
+
+    replies = load_fixtures(args.fixtures)
+    if args.games:
+        replies = {k: v for k, v in replies.items() if not (k == "gl" or k.startswith("cl "))}
+        replies.update(synthetic_games(args.games))
+
+    try:
+        asyncio.run(serve(args.host, args.port, FakeD2GS(replies, args.password, args.rtt, args.cost)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
+# --- end fake_d2gs.py ---
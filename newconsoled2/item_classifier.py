@@ -0,0 +1,171 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/item_classifier.py ---
+#!/usr/bin/env python3
+"""
+Класификатор на предмети по базовия код (weapons.txt / armor.txt / misc.txt).
+
+Досега всеки item скрипт (07, 10, z1, z2) имаше свое копие на
+detect_type_from_code_and_name() - малък CODE_TO_TYPE (повечето кодове в него
+не съществуват) и после lower() + търсене на ключови думи в името за всеки
+предмет. Ръкавици, ботуши, руни, скъпоценни камъни и т.н. падаха в "other".
+
+Тук пълната таблица с базовите кодове се разгъва веднъж при import в dict:
+    item_type("uhc", name)  -> "belt"       (O(1), без lower() при кодовете от d2lib)
+    rune_id("r30")          -> 30           (Ber)
+    charm_size("cm3")       -> "grand"
+Само за непознат код (модове, повредени записи) се гледа името - с
+lru_cache, защото едни и същи имена се повтарят хиляди пъти.
+
+Типове: weapon, helmet, armor, shield, gloves, boots, belt, ring, amulet,
+charm_small/charm_large/charm_grand, jewel, rune, gem, potion, scroll, book,
+ammo, key, gold, quest, ear, other (+ "charm" от името, без размер).
+
+    python3 item_classifier.py    # кои кодове от таблиците на d2lib липсват тук
+"""
+from functools import lru_cache
+
+NAME_CACHE_SIZE = 4096
+
+RUNE_NAMES = ("El", "Eld", "Tir", "Nef", "Eth", "Ith", "Tal", "Ral", "Ort", "Thul", "Amn",
+              "Sol", "Shael", "Dol", "Hel", "Io", "Lum", "Ko", "Fal", "Lem", "Pul", "Um",
+              "Mal", "Ist", "Gul", "Vex", "Ohm", "Lo", "Sur", "Ber", "Jah", "Cham", "Zod")
+
+# Базовите кодове по тип; редовете са normal / exceptional / elite
+BASE_ITEMS = {
+    "weapon": """
+        hax axe 2ax mpi wax lax bax btx gax gix  9ha 9ax 92a 9mp 9wa 9la 9ba 9bt 9ga 9gi
+            7ha 7ax 72a 7mp 7wa 7la 7ba 7bt 7ga 7gi
+        wnd ywn bwn gwn  9wn 9yw 9bw 9gw  7wn 7yw 7bw 7gw
+        clb scp gsc wsp spc mac mst fla whm mau gma  9cl 9sc 9qs 9ws 9sp 9ma 9mt 9fl 9wh 9m9 9gm
+            7cl 7sc 7qs 7ws 7sp 7ma 7mt 7fl 7wh 7m7 7gm
+        ssd scm sbr flc crs bsd lsd wsd 2hs clm gis bsw flb gsd
+            9ss 9sm 9sb 9fc 9cr 9bs 9ls 9wd 92h 9cm 9gs 9b9 9fb 9gd
+            7ss 7sm 7sb 7fc 7cr 7bs 7ls 7wd 72h 7cm 7gs 7b7 7fb 7gd
+        dgr dir kri bld  9dg 9di 9kr 9bl  7dg 7di 7kr 7bl
+        tkf tax bkf bal jav pil ssp glv tsp  9tk 9ta 9bk 9b8 9ja 9pi 9s9 9gl 9ts
+            7tk 7ta 7bk 7b8 7ja 7pi 7s7 7gl 7ts
+        spr tri brn spt pik  9sr 9tr 9br 9st 9p9  7sr 7tr 7br 7st 7p7
+        bar vou scy pax hal wsc  9b7 9vo 9s8 9pa 9h9 9wc  7o7 7vo 7s8 7pa 7h7 7wc
+        sst lst cst bst wst  8ss 8ls 8cs 8bs 8ws  6ss 6ls 6cs 6bs 6ws
+        sbw hbw lbw cbw sbb lbb swb lwb  8sb 8hb 8lb 8cb 8s8 8l8 8sw 8lw  6sb 6hb 6lb 6cb 6s7 6l7 6sw 6lw
+        lxb mxb hxb rxb  8lx 8mx 8hx 8rx  6lx 6mx 6hx 6rx
+        ktr wrb axf ces clw btl skr  9ar 9wb 9xf 9cs 9lw 9tw 9qr  7ar 7wb 7xf 7cs 7lw 7tw 7qr
+        ob1 ob2 ob3 ob4 ob5  ob6 ob7 ob8 ob9 oba  obb obc obd obe obf
+        am1 am2 am3 am4 am5  am6 am7 am8 am9 ama  amb amc amd ame amf
+    """,
+    "helmet": """
+        cap skp hlm fhl ghm crn msk bhm  xap xkp xlm xhl xhm xrn xsk xh9  uap ukp ulm uhl uhm urn usk uh9
+        ci0 ci1 ci2 ci3
+        ba1 ba2 ba3 ba4 ba5  ba6 ba7 ba8 ba9 baa  bab bac bad bae baf
+        dr1 dr2 dr3 dr4 dr5  dr6 dr7 dr8 dr9 dra  drb drc drd dre drf
+    """,
+    "armor": """
+        qui lea hla stu rng scl chn brs spl plt fld gth ful aar ltp
+        xui xea xla xtu xng xcl xhn xrs xpl xlt xld xth xul xar xtp
+        uui uea ula utu ung ucl uhn urs upl ult uld uth uul uar utp
+    """,
+    "shield": """
+        buc sml lrg kit tow gts bsh spk  xuc xml xrg xit xow xts xsh xpk  uuc uml urg uit uow uts ush upk
+        ne1 ne2 ne3 ne4 ne5  ne6 ne7 ne8 ne9 nea  neb nec ned nee nef neg
+        pa1 pa2 pa3 pa4 pa5  pa6 pa7 pa8 pa9 paa  pab pac pad pae paf
+    """,
+    "gloves": "lgl vgl mgl tgl hgl  xlg xvg xmg xtg xhg  ulg uvg umg utg uhg",
+    "boots": "lbt vbt mbt tbt hbt  xlb xvb xmb xtb xhb  ulb uvb umb utb uhb",
+    "belt": "lbl vbl mbl tbl hbl  zlb zvb zmb ztb zhb  ulc uvc umc utc uhc",
+    "ring": "rin",
+    "amulet": "amu vip",
+    "charm_small": "cm1",
+    "charm_large": "cm2",
+    "charm_grand": "cm3",
+    "jewel": "jew",
+    "rune": " ".join(f"r{rid:02d}" for rid in range(1, len(RUNE_NAMES) + 1)),
+    "gem": """
+        gcv gfv gsv gzv gpv  gcy gfy gsy gly gpy  gcb gfb gsb glb gpb
+        gcg gfg gsg glg gpg  gcr gfr gsr glr gpr  gcw gfw gsw glw gpw  skc skf sku skl skz
+    """,
+    "potion": """
+        hp1 hp2 hp3 hp4 hp5 hpf hpo  mp1 mp2 mp3 mp4 mp5 mpf mpo  rvs rvl vps yps wms elx
+        rps rpl bps bpl  gps gpm gpl ops opm opl
+    """,
+    "scroll": "tsc isc 0sc",
+    "book": "tbk ibk",
+    "ammo": "aqv cqv",
+    "key": "key",
+    "gold": "gld",
+    "quest": """
+        leg hdm hfh hst msf g33 d33 qf1 qf2
+        bks bkd ass bbb box tr1 tr2 xyz j34 g34 ice mss luv qbr qey qhr hrb
+        dhn bey mbr pk1 pk2 pk3 toa tes ceh bet fed std
+    """,
+    "ear": "ear",
+    "other": "tch",
+}
+
+CODE_TYPE = {code: itype for itype, codes in BASE_ITEMS.items() for code in codes.split()}
+RUNE_IDS = {f"r{rid:02d}": rid for rid in range(1, len(RUNE_NAMES) + 1)}
+CHARM_SIZES = {"cm1": "small", "cm2": "large", "cm3": "grand"}
+
+
+def code_type(code):
+    """Типът по базовия код или None за непознат код."""
+    if not code:
+        return None
+    itype = CODE_TYPE.get(code)
+    if itype is None:
+        itype = CODE_TYPE.get(code.strip().lower())
+    return itype
+
+
+def rune_id(code):
+    """1 (El) .. 33 (Zod) или None."""
+    return RUNE_IDS.get(code) if code else None
+
+
+def charm_size(code):
+    """small / large / grand по cm1/cm2/cm3 или None."""
+    return CHARM_SIZES.get(code[:3].lower()) if code else None
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def type_from_name(name):
+    """Досегашната евристика по името - само за кодове извън таблицата."""
+    name = name.lower()
+    if "ring" in name or "band" in name: return "ring"
+    if "amulet" in name or "gorget" in name or "neck" in name: return "amulet"
+    if "belt" in name: return "belt"
+    if "charm" in name or "annihilus" in name or "gheed" in name: return "charm"
+    if "helm" in name or "crown" in name or "mask" in name: return "helmet"
+    if "shield" in name: return "shield"
+
+    for kw in ("sword","axe","mace","dagger","bow","crossbow","staff","polearm","spear","hammer"):
+        if kw in name: return "weapon"
+
+    for kw in ("armor","plate","mail","leather","chain","robe","shield"):
+        if kw in name: return "armor"
+
+    return "other"
+
+
+def item_type(code, name=""):
+    """Заместител на detect_type_from_code_and_name(code, name)."""
+    return code_type(code) or type_from_name(name or "")
+
+
+def coverage():
+    """(код, таблица) за кодовете от таблиците на d2lib, които липсват тук - за проверка при нова версия."""
+    import json
+    import os
+    import d2lib
+    data_dir = os.path.join(os.path.dirname(d2lib.__file__), "items_data")
+    missing = []
+    for table in ("weapons", "armors", "shields", "misc"):
+        with open(os.path.join(data_dir, f"{table}.json"), encoding="utf-8") as f:
+            missing.extend((code, table) for code in json.load(f) if code not in CODE_TYPE)
+    return missing
+
+
+if __name__ == "__main__":
+    missing = coverage()
+    for code, table in missing:
+        print(f"[CLASSIFIER] {code} ({table}.json) is not in BASE_ITEMS")
+    print(f"[CLASSIFIER] {len(CODE_TYPE)} base codes, {len(missing)} d2lib codes missing")
+# --- end item_classifier.py ---
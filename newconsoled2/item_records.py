@@ -0,0 +1,111 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/item_records.py ---
+"""
+Компактни записи за item pipeline-а (07.generate_items_json.py, 10.charitemstat.py).
+
+d2lib Item обектите (по няколко десетки атрибута всеки) се превръщат веднага в
+ItemRecord с __slots__ - само code, име, качество и rune id, като низовете се
+интернират (хиляди "El Rune" в паметта са един обект). Веднага след това
+D2SFile се пуска; категоризацията и групирането вървят върху записите, а
+JSON редът (с 11-те списъка) се строи едва в render_row().
+
+    records = item_records(d2s.items)
+    d2s = None
+    row = render_row(charfile, charname, stats, records)
+
+Типът на предмета идва от item_classifier.py (таблицата с базовите кодове).
+"""
+import sys
+from collections import Counter
+
+from item_classifier import item_type, rune_id as code_rune_id, charm_size
+
+QUALITY_OTHER = 0
+QUALITY_UNIQUE = 1
+QUALITY_SET = 2
+
+# Редът на ключовете в реда на all_items.json
+CATEGORIES = ("runes", "rings", "belts", "amulets", "charms_small", "charms_large", "charms_grand",
+              "weapons", "armors", "other")
+# item_classifier.item_type() -> категория; всичко останало е "other"
+TYPE_CATEGORY = {"ring": "rings", "belt": "belts", "amulet": "amulets", "weapon": "weapons",
+                 "armor": "armors", "helmet": "armors", "shield": "armors", "gloves": "armors",
+                 "boots": "armors", "charm": "charms_small"}
+CHARM_CATEGORY = {"small": "charms_small", "large": "charms_large", "grand": "charms_grand"}
+
+
+def intern_text(value):
+    return sys.intern(value) if value else ""
+
+
+class ItemRecord:
+    __slots__ = ("code", "name", "quality", "is_rune", "rune_id")
+
+    def __init__(self, code, name, quality=QUALITY_OTHER, is_rune=False, rune_id=None):
+        self.code = intern_text(code)
+        self.name = intern_text(name)
+        self.quality = quality
+        self.is_rune = is_rune
+        self.rune_id = rune_id
+
+    @classmethod
+    def from_item(cls, item):
+        """Само полетата, които категоризацията ползва - d2lib обектът може да се освободи."""
+        if getattr(item, "is_unique", False):
+            quality = QUALITY_UNIQUE
+        elif getattr(item, "is_set", False):
+            quality = QUALITY_SET
+        else:
+            quality = QUALITY_OTHER
+        code = getattr(item, "code", "") or ""
+        rune_id = getattr(item, "rune_id", None)
+        if rune_id is None:
+            rune_id = code_rune_id(code)   # d2lib не дава rune_id - r01..r33 по кода
+        is_rune = bool(getattr(item, "is_rune", False)) or rune_id is not None
+        return cls(code, getattr(item, "name", "") or "", quality, is_rune, rune_id)
+
+    def __repr__(self):
+        return f"ItemRecord({self.code!r}, {self.name!r}, {self.quality}, {self.is_rune}, {self.rune_id})"
+
+
+def item_records(items):
+    return [ItemRecord.from_item(item) for item in items or ()]
+
+
+def categorize(record, detect_type=item_type):
+    """(категория, име в списъка) - същите правила като досегашния цикъл в 07/10."""
+    name, code = record.name, record.code
+    if record.is_rune:
+        if not name:
+            name = f"Rune ID {record.rune_id}" if record.rune_id is not None else "Rune (Unknown)"
+        return "runes", name
+    if code[:2].lower() == "cm":
+        return CHARM_CATEGORY.get(charm_size(code), "charms_small"), name or code
+    return TYPE_CATEGORY.get(detect_type(code, name), "other"), name
+
+
+def group_names(counts):
+    """Counter(име -> брой) -> ["Име (3)", "Друго"], сортирано по име."""
+    return [f"{name} ({count})" if count > 1 else name for name, count in sorted(counts.items())]
+
+
+def render_row(charfile, charname, stats, records, detect_type=item_type):
+    """JSON редът на героя - строи се от записите едва тук."""
+    unique_set = []
+    counts = {category: Counter() for category in CATEGORIES}
+    for record in records:
+        if record.quality == QUALITY_UNIQUE:
+            unique_set.append({"name": record.name, "type": "unique"})
+        elif record.quality == QUALITY_SET:
+            unique_set.append({"name": record.name, "type": "set"})
+        category, name = categorize(record, detect_type)
+        counts[category][name] += 1
+    row = {
+        "charfile": charfile,
+        "charname": charname,
+        "char_stats": stats,
+        "unique_set": unique_set,
+    }
+    for category in CATEGORIES:
+        row[category] = group_names(counts[category])
+    return row
+# --- end item_records.py ---
@@ -0,0 +1,80 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/json_shards.py ---
+"""
+Малки JSON файлове по един на герой + index.json с ETag за всеки.
+
+    <shard_dir>/<име>.json    редът на един герой (compact)
+    <shard_dir>/index.json    {"generated": ..., "chars": {"<име>": "<etag>"}}
+
+Страницата тегли index.json (няколко KB) и после само своя shard като
+"<име>.json?v=<etag>" - URL-ът се сменя само когато съдържанието се смени,
+така че браузърът/проксито кешират нормално. Непроменените shard-ове не се
+презаписват, а тези на изтрити герои се махат.
+"""
+import hashlib
+import json
+import os
+import re
+
+from json_stream import write_text_atomic
+
+INDEX_NAME = "index.json"
+# Имената в D2 са букви, '-' и '_'; всичко друго не става за име на файл в URL
+SAFE_NAME_RE = re.compile(r"^[a-z0-9_\-]+$")
+
+
+def shard_key(name):
+    """Същото нормализиране като cleanCharName() в charinfo.js."""
+    return re.sub(r"\s+", "", (name or "").lower())
+
+
+class ShardIndex:
+    def __init__(self, shard_dir, generated=None, ensure_ascii=False):
+        self.shard_dir = str(shard_dir)
+        self.generated = generated
+        self.ensure_ascii = ensure_ascii
+        self.index_path = os.path.join(self.shard_dir, INDEX_NAME)
+        self.previous = {}
+        self.chars = {}
+        self.written = 0
+
+    def __enter__(self):
+        os.makedirs(self.shard_dir, exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.previous = json.load(f).get("chars", {})
+        except (OSError, ValueError):
+            self.previous = {}
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+
+    def add(self, name, record):
+        key = shard_key(name)
+        if not SAFE_NAME_RE.match(key) or f"{key}.json" == INDEX_NAME:
+            print(f"[SHARDS] Skipping character with unsafe name: {name!r}")
+            return
+        if key in self.chars:
+            return  # първият (по път) печели, както findCharStats() в charinfo.js
+        text = json.dumps(record, separators=(",", ":"), ensure_ascii=self.ensure_ascii)
+        etag = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        path = os.path.join(self.shard_dir, f"{key}.json")
+        if self.previous.get(key) != etag or not os.path.exists(path):
+            write_text_atomic(path, text)
+            self.written += 1
+        self.chars[key] = etag
+
+    def finish(self):
+        payload = {"generated": self.generated, "chars": self.chars}
+        write_text_atomic(self.index_path, json.dumps(payload, separators=(",", ":")))
+        removed = 0
+        for key in set(self.previous) - set(self.chars):
+            try:
+                os.unlink(os.path.join(self.shard_dir, f"{key}.json"))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        print(f"[SHARDS] {len(self.chars)} characters indexed, {self.written} shards written, "
+              f"{removed} removed -> {self.index_path}")
+# --- end json_shards.py ---
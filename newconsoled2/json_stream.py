@@ -0,0 +1,127 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/json_stream.py ---
+"""
+Поточно (streaming) записване на големи JSON файлове.
+
+Всеки запис се сериализира и пише веднага, затова паметта не расте с броя
+герои. Пише се във временен файл в същата директория, който накрая се
+преименува с os.replace - уебът никога не вижда наполовина записан файл.
+
+    with JSONStreamWriter(path, head={"generated": ts}, key="rows") as out:
+        for row in rows:
+            out.write(row)
+
+Формати:
+    compact  {"generated": ..., "rows": [...]} (или само [...] без key) без отстъпи
+    pretty   същото с indent=2 (както старите json.dump(..., indent=2))
+    ndjson   по един запис на ред; head не се записва
+"""
+import json
+import os
+import tempfile
+
+FORMATS = ("compact", "pretty", "ndjson")
+
+
+def publish(tmp_path, path):
+    """Прави временния файл четим за уеб сървъра и го слага на мястото на path."""
+    # mkstemp създава 0600 - уеб сървърът трябва да може да чете
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp_path, 0o666 & ~umask)
+    os.replace(tmp_path, path)
+
+
+def write_text_atomic(path, text):
+    """Малък файл наведнъж - същото temp + os.replace, без streaming."""
+    directory, name = os.path.split(str(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory or ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        publish(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class JSONStreamWriter:
+    def __init__(self, path, fmt="compact", head=None, key=None, ensure_ascii=True):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown JSON format: {fmt} (expected one of {', '.join(FORMATS)})")
+        self.path = str(path)
+        self.fmt = fmt
+        self.head = head or {}
+        self.key = key
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self.file = None
+        self.tmp_path = None
+        self.discarded = False
+
+    def __enter__(self):
+        directory, name = os.path.split(self.path)
+        fd, self.tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory or ".")
+        self.file = os.fdopen(fd, "w", encoding="utf-8")
+        self.file.write(self._opening())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None and not self.discarded:
+                self.file.write(self._closing())
+                self.file.close()
+                publish(self.tmp_path, self.path)
+                return
+        except BaseException:
+            self._cleanup()
+            raise
+        self._cleanup()
+
+    def discard(self):
+        """Не записва нищо - старият файл (ако има) остава непокътнат."""
+        self.discarded = True
+
+    def write(self, record):
+        if self.fmt == "ndjson":
+            self.file.write(self._dumps(record) + "\n")
+        else:
+            sep = "," if self.count else ""
+            if self.fmt == "pretty":
+                indent = "    " if self.key else "  "
+                body = self._dumps(record).replace("\n", "\n" + indent)
+                self.file.write(f"{sep}\n{indent}{body}")
+            else:
+                self.file.write(sep + self._dumps(record))
+        self.count += 1
+
+    def _dumps(self, value):
+        if self.fmt == "pretty":
+            return json.dumps(value, indent=2, ensure_ascii=self.ensure_ascii)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=self.ensure_ascii)
+
+    def _opening(self):
+        if self.fmt == "ndjson":
+            return ""
+        if not self.key:
+            return "["
+        if self.fmt == "pretty":
+            fields = "".join(f"\n  {json.dumps(k)}: {self._dumps(v)}," for k, v in self.head.items())
+            return "{" + fields + f"\n  {json.dumps(self.key)}: ["
+        fields = "".join(f"{json.dumps(k)}:{self._dumps(v)}," for k, v in self.head.items())
+        return "{" + fields + f"{json.dumps(self.key)}:["
+
+    def _closing(self):
+        if self.fmt == "ndjson":
+            return ""
+        if self.fmt == "pretty":
+            end = ("\n  " if self.key else "\n") if self.count else ""
+            return end + ("]\n}" if self.key else "]")
+        return "]}" if self.key else "]"
+
+    def _cleanup(self):
+        if self.file and not self.file.closed:
+            self.file.close()
+        if self.tmp_path and os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+# --- end json_stream.py ---
@@ -0,0 +1,161 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/ladder_stream.py ---
+"""
+Поточен (iterparse) builder на webladder.html от d2ladder.xml.
+
+ET.iterparse чете XML-а парче по парче; всеки <char> се обработва и веднага
+се изчиства, затова паметта е постоянна, а времето - линейно спрямо размера
+на стълбицата. Редовете (LADDER_ROW от templates.py) се пишат с writelines в
+буфериран временен файл, който накрая атомарно заменя HTML файла; стиловете
+са в общия css/reports.css.
+
+Използва се от d2consoleportal/06_build_ladder.py, 08_build_ladder.py,
+finalstat/07_build_ladder.py и collector.py.
+"""
+import heapq
+import itertools
+import json
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from json_stream import write_text_atomic
+from templates import Template, PageWriter, page_head, install_stylesheet, PAGE_END
+
+LADDER_TYPES = range(27, 35)   # само типове 27-34 (както досега)
+
+LADDER_TITLE = "DarkPsy Ladder"
+LADDER_HTML_HEAD = page_head(LADDER_TITLE, "ladder") + f"<h1>{LADDER_TITLE}</h1>\n"
+
+TABLE_HEAD = ("<table><tr><th>Rank</th><th>Name</th><th>Level</th><th>Experience</th>"
+              "<th>Class</th><th>Prefix</th><th>Status</th></tr>")
+ROW_FIELDS = ("rank", "name", "level", "experience", "class", "prefix", "status")
+LADDER_ROW = Template("<tr>" + "".join(f"<td>{{{field}}}</td>" for field in ROW_FIELDS) + "</tr>")
+INDEX_TOP_N = 100
+
+
+def iter_ladder_events(xml_file, types=LADDER_TYPES):
+    """
+    Обхожда d2ladder.xml поточно и връща събития само за ladder типовете в types:
+        ("ladder", type, None)   - началото на таблица (след <type>)
+        ("char", type, fields)   - един <char> като {tag: текст}
+        ("end", type, None)      - </ladder>
+    <type> трябва да е преди <char> елементите (така пише PvPGN).
+    """
+    depth = 0
+    root = ladder = None
+    ladder_type = None
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            if depth == 0:
+                root = elem
+            elif depth == 1 and elem.tag == "ladder":
+                ladder, ladder_type = elem, None
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 2 and ladder is not None:
+            if elem.tag == "type":
+                try:
+                    ladder_type = int((elem.text or "").strip())
+                except ValueError:
+                    ladder_type = None
+                if ladder_type in types:
+                    yield "ladder", ladder_type, None
+            elif elem.tag == "char":
+                if ladder_type in types:
+                    yield "char", ladder_type, {child.tag: (child.text or "").strip() for child in elem}
+                ladder.clear()  # обработеният <char> (и всичко преди него) вече не трябва
+        elif depth == 1 and elem is ladder:
+            if ladder_type in types:
+                yield "end", ladder_type, None
+            root.clear()
+            ladder = None
+
+
+def build_ladder_html(xml_file, html_file, on_char=None, head=LADDER_HTML_HEAD):
+    """
+    Пише webladder.html ред по ред; on_char(type, fields) се вика за всеки
+    показан <char> (напр. за ladder_index.json в същия обход). Връща броя редове.
+    """
+    rows = 0
+
+    def chunks():
+        nonlocal rows
+        yield head
+        for event, ladder_type, fields in iter_ladder_events(xml_file):
+            if event == "char":
+                yield LADDER_ROW.render(fields)
+                rows += 1
+                if on_char:
+                    on_char(ladder_type, fields)
+            elif event == "ladder":
+                yield TABLE_HEAD
+            else:
+                yield "</table>"
+        yield PAGE_END
+
+    with PageWriter(html_file) as out:
+        out.writelines(chunks())
+    install_stylesheet(html_file)
+    return rows
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def index_key(name):
+    """Същото нормализиране като cleanCharName() в charinfo.js."""
+    return re.sub(r"\s+", "", name.lower())
+
+
+class LadderIndex:
+    """
+    ladder_index.json за charinfo.js: име (малки букви, без интервали) -> най-добър
+    ранг + top-N за всеки тип. add() е on_char callback за build_ladder_html.
+    """
+    def __init__(self, top_n=INDEX_TOP_N):
+        self.top_n = top_n
+        self.best_by_name = {}
+        self.top_by_type = {}   # тип -> max-heap по ранг с най-много top_n елемента
+        # Уникален tiebreak при равен ранг (напр. 0 за липсващ <rank>) - иначе heapq сравнява dict-ове;
+        # отрицателен, за да се изхвърля последно видяният, а не първият
+        self.order = itertools.count()
+
+    def add(self, ladder_type, fields):
+        entry = {"rank": to_int(fields.get("rank", "")), "name": fields.get("name", ""),
+                 "level": to_int(fields.get("level", "")), "experience": to_int(fields.get("experience", "")),
+                 "class": fields.get("class", ""), "type": ladder_type}
+        top = self.top_by_type.setdefault(ladder_type, [])
+        heapq.heappush(top, (-entry["rank"], -next(self.order), entry))
+        if len(top) > self.top_n:
+            heapq.heappop(top)
+        key = index_key(entry["name"])
+        best = self.best_by_name.get(key)
+        if best is None or entry["rank"] < best["rank"]:
+            self.best_by_name[key] = entry
+
+    def payload(self):
+        return {
+            "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "chars": {key: {k: v for k, v in entry.items() if k != "name"}
+                      for key, entry in self.best_by_name.items()},
+            "top": {t: [entry for _, _, entry in sorted(top, reverse=True)]
+                    for t, top in self.top_by_type.items()},
+        }
+
+    def write(self, index_file):
+        write_text_atomic(index_file, json.dumps(self.payload(), separators=(",", ":"), ensure_ascii=False))
+
+
+def build_ladder(xml_file, html_file, index_file):
+    """webladder.html + ladder_index.json в един поточен обход. Връща LadderIndex."""
+    index = LadderIndex()
+    build_ladder_html(xml_file, html_file, on_char=index.add)
+    index.write(index_file)
+    return index
+# --- end ladder_stream.py ---
@@ -0,0 +1,196 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/pipeline.py ---
+#!/usr/bin/env python3
+"""
+Паралелен runner за етапите на 00.start.sh.
+
+Етапите и зависимостите им са описани в JSON граф (d2consoleportal/pipeline.json,
+finalstat/pipeline.json). Всеки етап тръгва веднага щом всички от "after" са
+минали успешно, до "workers" етапа едновременно - пълното обновяване трае
+колкото критичния път, а не сумата от всички етапи плюс sleep-овете.
+
+    python3 pipeline.py /usr/local/pvpgn/tools/d2consoleportal/pipeline.json
+    python3 pipeline.py PIPELINE.json --jobs 2     # друг лимит на workers
+    python3 pipeline.py PIPELINE.json --dry-run    # само реда на етапите
+
+    {
+      "name": "d2consoleportal",
+      "workers": 4,
+      "lock": "/usr/local/pvpgn/tools/d2consoleportal/.pipeline.lock",
+      "report": "/usr/local/pvpgn/tools/d2consoleportal/pipeline_last_run.json",
+      "stages": {
+        "clean":  {"run": "rm -f logs/*"},
+        "gl":     {"run": "./01.d2gs_get_gl.exp", "after": ["clean"], "timeout": 60}
+      }
+    }
+
+"run" се изпълнява с bash в директорията на JSON файла (или "cwd").
+Ако етап падне, зависимите от него се пропускат, а независимите продължават.
+"after_any" е само подредба: етапът чака изброените да свършат, но тръгва и
+когато те са паднали/пропуснати (напр. status след cl - и двата ползват
+конзолата, но status трябва да се пусне винаги, както в стария 00.start.sh).
+Lock файлът (flock) не позволява два припокриващи се run-а - вторият излиза веднага.
+Времето и exit code на всеки етап се записват в "report".
+"""
+import argparse
+import fcntl
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from json_stream import write_text_atomic
+
+DEFAULT_WORKERS = 4
+
+
+def load_pipeline(path):
+    """Чете графа и проверява зависимостите (непознати етапи, цикли)."""
+    with open(path, encoding="utf-8") as f:
+        pipeline = json.load(f)
+    stages = pipeline.get("stages") or {}
+    for name, stage in stages.items():
+        if not stage.get("run"):
+            raise ValueError(f"Stage {name!r} has no 'run' command")
+        for dep in dependencies(stage):
+            if dep not in stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+    topo_order(stages)
+    pipeline.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    pipeline.setdefault("cwd", os.path.dirname(os.path.abspath(path)))
+    return pipeline
+
+
+def dependencies(stage):
+    """Всички етапи, които трябва да са свършили преди този ("after" + "after_any")."""
+    return stage.get("after", []) + stage.get("after_any", [])
+
+
+def topo_order(stages):
+    """Етапите в ред, в който могат да се пуснат последователно (Kahn); ValueError при цикъл."""
+    pending = {name: set(dependencies(stage)) for name, stage in stages.items()}
+    order = []
+    while pending:
+        ready = sorted(name for name, deps in pending.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {', '.join(sorted(pending))}")
+        for name in ready:
+            del pending[name]
+            order.append(name)
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return order
+
+
+def run_stage(name, stage, cwd):
+    """Пуска един етап; изходът се събира и печата наведнъж, за да не се смесва с другите."""
+    started = time.time()
+    t0 = time.perf_counter()
+    # Собствена process group - при timeout се убиват и expect/bnchat децата, не само bash
+    proc = subprocess.Popen(stage["run"], shell=True, executable="/bin/bash", cwd=stage.get("cwd", cwd),
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True)
+    try:
+        output, _ = proc.communicate(timeout=stage.get("timeout"))
+        status = "ok" if proc.returncode == 0 else "failed"
+        returncode = proc.returncode
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        output, _ = proc.communicate()
+        status, returncode = "timeout", None
+    seconds = time.perf_counter() - t0
+    text = output.decode("utf-8", "replace").rstrip()
+    print(f"[PIPELINE] ==> {name} ({status}, {seconds:.2f}s)" + (f"\n{text}" if text else ""), flush=True)
+    return {"status": status, "returncode": returncode,
+            "started": datetime.fromtimestamp(started).strftime("%Y-%m-%d %H:%M:%S"),
+            "seconds": round(seconds, 3)}
+
+
+def run_pipeline(pipeline, workers):
+    stages = pipeline["stages"]
+    results = {}
+    waiting = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while waiting or running:
+            for name, stage in list(waiting.items()):
+                deps = stage.get("after", [])
+                if any(results.get(dep, {}).get("status") not in (None, "ok") for dep in deps):
+                    # Някоя зависимост падна - етапът (и неговите зависими) не се пуска
+                    del waiting[name]
+                    results[name] = {"status": "skipped", "returncode": None, "started": None, "seconds": 0}
+                    print(f"[PIPELINE] ==> {name} (skipped, dependency failed)", flush=True)
+                elif all(dep in results for dep in dependencies(stage)):
+                    del waiting[name]
+                    running[pool.submit(run_stage, name, stage, pipeline["cwd"])] = name
+            if not running:
+                continue  # пропуснатите може да са отключили още пропускания
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def critical_path(stages, results):
+    """Най-дългата верига по реалните времена - долната граница за целия run."""
+    finish = {}
+    for name in topo_order(stages):
+        start = max((finish[dep] for dep in dependencies(stages[name])), default=0.0)
+        finish[name] = start + results[name]["seconds"]
+    return max(finish.values(), default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a pipeline stage graph in parallel")
+    parser.add_argument("pipeline", help="pipeline JSON file")
+    parser.add_argument("--jobs", type=int, help="max concurrent stages (default: 'workers' from the file)")
+    parser.add_argument("--dry-run", action="store_true", help="print the stage order and exit")
+    args = parser.parse_args()
+
+    pipeline = load_pipeline(args.pipeline)
+    name = pipeline["name"]
+    if args.dry_run:
+        for stage in topo_order(pipeline["stages"]):
+            after = pipeline["stages"][stage].get("after", [])
+            after_any = pipeline["stages"][stage].get("after_any", [])
+            print(f"{stage:<16} after: {', '.join(after) or '-'}"
+                  + (f"  after_any: {', '.join(after_any)}" if after_any else ""))
+        return
+
+    lock_path = pipeline.get("lock") or os.path.join(pipeline["cwd"], ".pipeline.lock")
+    lock_file = open(lock_path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print(f"[PIPELINE] {name}: previous run still holds {lock_path}, exiting")
+        return
+
+    workers = args.jobs or pipeline.get("workers", DEFAULT_WORKERS)
+    started = datetime.now()
+    t0 = time.perf_counter()
+    print(f"[PIPELINE] {name}: {len(pipeline['stages'])} stages, {workers} workers")
+    results = run_pipeline(pipeline, workers)
+    seconds = time.perf_counter() - t0
+    failed = sorted(stage for stage, result in results.items() if result["status"] != "ok")
+
+    report = {
+        "pipeline": name,
+        "started": started.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": round(seconds, 3),
+        "critical_path_seconds": round(critical_path(pipeline["stages"], results), 3),
+        "serial_seconds": round(sum(result["seconds"] for result in results.values()), 3),
+        "failed": failed,
+        "stages": {stage: results[stage] for stage in topo_order(pipeline["stages"])},
+    }
+    if pipeline.get("report"):
+        write_text_atomic(pipeline["report"], json.dumps(report, indent=2))
+    print(f"[PIPELINE] {name}: done in {seconds:.2f}s (critical path {report['critical_path_seconds']:.2f}s, "
+          f"serial {report['serial_seconds']:.2f}s)" + (f", failed: {', '.join(failed)}" if failed else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
+# --- end pipeline.py ---
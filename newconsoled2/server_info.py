@@ -0,0 +1,145 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/server_info.py ---
+#!/usr/bin/env python3
+"""
+bntrackd games.txt -> server.json (статусът на PvPGN сървъра за уеба).
+
+games.txt е един <server> блок с плоски тагове (users, games, uptime, ...).
+Досега 06_build_html.py го увиваше в <root> и го парсваше с ElementTree при
+всеки run, 00.start.sh/collector.py го копираха в уеб директорията, а
+d2console.js/index.js го DOM-парсваха в браузъра само заради uptime.
+
+Тук файлът се чете само ако (mtime, size) са други от последния път и
+резултатът се публикува като малък server.json:
+
+    {"generated": "...", "users": 1, "games": 1, "total_games": 15,
+     "logins": 28, "uptime": 44160, "source": [mtime_ns, size]}
+
+"source" е подписът на games.txt, от който е построен - следващият процес
+(cron run, 06_build_html.py) вижда, че няма промяна, без да отваря games.txt.
+collector.py държи ServerInfo в паметта между обновяванията.
+
+    python3 server_info.py              # games.txt -> server.json, само при промяна
+    python3 server_info.py --force      # парсва и записва наново
+"""
+import argparse
+import html
+import json
+import os
+import re
+import time
+
+from json_stream import write_text_atomic
+
+# Полетата в server.json (всички са цели числа)
+SERVER_FIELDS = ("users", "games", "total_games", "logins", "uptime")
+
+re_server = re.compile(r"<server>(.*?)</server>", re.S)
+re_tag = re.compile(r"<(\w+)>([^<]*)</\1>")
+
+
+def source_signature(path):
+    """(mtime_ns, size) на games.txt или None, ако го няма."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def parse_games_txt(text):
+    """Таговете на първия <server> блок -> {таг: текст}; None, ако блок няма."""
+    m = re_server.search(text)
+    if m is None:
+        return None
+    return {tag: html.unescape(value.strip()) for tag, value in re_tag.findall(m.group(1))}
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize(fields, signature):
+    record = {"generated": time.strftime("%Y-%m-%d %H:%M:%S")}
+    for field in SERVER_FIELDS:
+        record[field] = to_int(fields.get(field))
+    record["source"] = list(signature)
+    return record
+
+
+class ServerInfo:
+    """
+    games.txt -> запис за server.json, кеширан по (mtime, size).
+    read() парсва само при променен подпис; publish() пише server.json само тогава.
+    """
+
+    def __init__(self, games_txt, server_json):
+        self.games_txt = str(games_txt)
+        self.server_json = str(server_json)
+        self.signature = None
+        self.record = None
+
+    def _load_published(self):
+        """Вече публикуваният server.json, ако е от същия games.txt."""
+        try:
+            with open(self.server_json, encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return record if isinstance(record, dict) else None
+
+    def read(self, force=False):
+        """(запис, changed) - changed е True, ако games.txt е парсван наново."""
+        signature = source_signature(self.games_txt)
+        if signature is None:
+            return None, False
+        if not force and signature == self.signature:
+            return self.record, False
+        if not force and self.record is None:
+            published = self._load_published()
+            if published is not None and published.get("source") == list(signature):
+                self.signature, self.record = signature, published
+                return published, False
+
+        with open(self.games_txt, encoding="utf-8", errors="replace") as f:
+            fields = parse_games_txt(f.read())
+        if fields is None:
+            print(f"[SERVER] No <server> block in {self.games_txt}")
+            return None, False
+        self.signature, self.record = signature, normalize(fields, signature)
+        return self.record, True
+
+    def publish(self, force=False):
+        """Пише server.json при промяна; връща записа (или None без games.txt)."""
+        record, changed = self.read(force)
+        if changed or (record is not None and not os.path.exists(self.server_json)):
+            write_text_atomic(self.server_json, json.dumps(record, indent=2) + "\n")
+            print(f"[SERVER] {record['users']} users, {record['games']} games -> {self.server_json}")
+        return record
+
+
+def load_server(games_txt, server_json):
+    """Текущият запис за HTML builder-ите - обновява server.json, ако games.txt е по-нов."""
+    return ServerInfo(games_txt, server_json).publish()
+
+
+def main():
+    from config import GAMES_TXT, SERVER_JSON
+
+    parser = argparse.ArgumentParser(description="Publish bntrackd games.txt as server.json")
+    parser.add_argument("--in", dest="games_txt", default=str(GAMES_TXT), help="bntrackd games.txt")
+    parser.add_argument("--out", dest="server_json", default=str(SERVER_JSON), help="server.json for the web")
+    parser.add_argument("--force", action="store_true", help="parse and write even if games.txt is unchanged")
+    args = parser.parse_args()
+
+    record = ServerInfo(args.games_txt, args.server_json).publish(args.force)
+    if record is None:
+        print(f"[SERVER] No server data in {args.games_txt}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
+# --- end server_info.py ---
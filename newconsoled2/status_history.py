@@ -0,0 +1,191 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/status_history.py ---
+#!/usr/bin/env python3
+"""
+Времеви ред на D2GS status пробите (SQLite, извън logs/).
+
+Всяка проба от 08.d2gs_time_ands_status_json.py се добавя в `samples`
+и веднага се натрупва (upsert) в 1-минутни, 1-часови и 1-дневни кофи в `rollups`.
+Старите сурови проби и минутни/часови кофи се изтриват според STATUS_RETENTION,
+така че "последните 24 часа потребители" е индексиран SELECT, а не четене на логове.
+
+    python3 status_history.py query users_in_game --hours 24
+    python3 status_history.py export      # -> config.JSON_STATUS_HISTORY (d2gs_status_history.json)
+    python3 status_history.py prune
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from config import STATUS_DB, STATUS_RETENTION, JSON_STATUS_HISTORY
+from json_stream import write_text_atomic
+
+# Метрика -> път в записа на status_parser.parse_output()["status"]
+METRICS = {
+    "running_games": ("current_activity", "running_games"),
+    "users_in_game": ("current_activity", "users_in_game"),
+    "kernel_cpu_percent": ("resource_usage", "kernel_cpu_percent"),
+    "user_cpu_percent": ("resource_usage", "user_cpu_percent"),
+    "physical_memory_mb": ("resource_usage", "physical_memory", "used_mb"),
+    "virtual_memory_mb": ("resource_usage", "virtual_memory", "used_mb"),
+    "d2cs_recv_rate": ("network_statistics", "rates_kbytes_sec", "d2cs", "current_recv"),
+    "d2cs_send_rate": ("network_statistics", "rates_kbytes_sec", "d2cs", "current_send"),
+    "d2dbs_recv_rate": ("network_statistics", "rates_kbytes_sec", "d2dbs", "current_recv"),
+    "d2dbs_send_rate": ("network_statistics", "rates_kbytes_sec", "d2dbs", "current_send"),
+}
+RESOLUTIONS = (60, 3600, 86400)   # 1m, 1h, 1d кофи
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS samples (
+    ts INTEGER PRIMARY KEY,
+    {", ".join(f"{name} REAL" for name in METRICS)}
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    total REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (resolution, metric, bucket)
+) WITHOUT ROWID;
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (resolution, metric, bucket, n, total, min, max) VALUES (?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (resolution, metric, bucket) DO UPDATE SET
+    n = n + 1,
+    total = total + excluded.total,
+    min = MIN(min, excluded.min),
+    max = MAX(max, excluded.max)
+"""
+
+
+def extract_metrics(status):
+    """Плоските стойности от status записа; липсващите са None."""
+    values = {}
+    for name, path in METRICS.items():
+        value = status
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        values[name] = value
+    return values
+
+
+class StatusHistory:
+    def __init__(self, db_path=STATUS_DB):
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, status, ts=None):
+        """Добавя една проба и я натрупва във всички кофи (една транзакция)."""
+        ts = int(ts if ts is not None else time.time())
+        values = extract_metrics(status)
+        with self.conn:
+            if self.conn.execute("SELECT 1 FROM samples WHERE ts = ?", (ts,)).fetchone():
+                return False  # същата секунда вече е записана - не натрупваме двойно
+            self.conn.execute(
+                f"INSERT INTO samples (ts, {', '.join(METRICS)}) VALUES (?{', ?' * len(METRICS)})",
+                (ts, *values.values()))
+            self.conn.executemany(UPSERT_ROLLUP, [
+                (resolution, name, ts - ts % resolution, value, value, value)
+                for resolution in RESOLUTIONS
+                for name, value in values.items() if value is not None
+            ])
+        return True
+
+    def prune(self, now=None):
+        """Трие суровите проби и кофите, по-стари от STATUS_RETENTION."""
+        now = int(now if now is not None else time.time())
+        with self.conn:
+            deleted = self.conn.execute("DELETE FROM samples WHERE ts < ?",
+                                        (now - STATUS_RETENTION["raw"],)).rowcount
+            for resolution in RESOLUTIONS:
+                keep = STATUS_RETENTION.get(resolution)
+                if keep:
+                    deleted += self.conn.execute(
+                        "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                        (resolution, now - keep)).rowcount
+        return deleted
+
+    def query(self, metric, since, until=None, resolution=None):
+        """[(bucket_ts, avg, min, max), ...] за metric в [since, until]."""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        until = int(until if until is not None else time.time())
+        resolution = resolution or pick_resolution(until - since)
+        rows = self.conn.execute(
+            "SELECT bucket, total / n, min, max FROM rollups "
+            "WHERE resolution = ? AND metric = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+            (resolution, metric, since - since % resolution, until))
+        return [(bucket, round(avg, 2), low, high) for bucket, avg, low, high in rows]
+
+    def export(self, path, hours=24, now=None):
+        """JSON за уеба: всички метрики за последните hours часа."""
+        now = int(now if now is not None else time.time())
+        since = now - hours * 3600
+        resolution = pick_resolution(now - since)
+        payload = {
+            "generated": datetime.now().isoformat(),
+            "resolution_seconds": resolution,
+            "columns": ["ts", "avg", "min", "max"],
+            "metrics": {name: self.query(name, since, now, resolution) for name in METRICS},
+        }
+        write_text_atomic(path, json.dumps(payload, separators=(',', ':')))
+        return payload
+
+
+def pick_resolution(span):
+    """Най-финият размер на кофа, който все още пази разумен брой точки."""
+    if span <= 86400:
+        return 60
+    if span <= 60 * 86400:
+        return 3600
+    return 86400
+
+
+def main():
+    parser = argparse.ArgumentParser(description="D2GS status time series")
+    sub = parser.add_subparsers(dest="action", required=True)
+    q = sub.add_parser("query", help="print buckets for one metric")
+    q.add_argument("metric", choices=sorted(METRICS))
+    q.add_argument("--hours", type=float, default=24)
+    q.add_argument("--resolution", type=int, choices=RESOLUTIONS)
+    e = sub.add_parser("export", help="write the last N hours of every metric as JSON")
+    e.add_argument("--out", default=str(JSON_STATUS_HISTORY))
+    e.add_argument("--hours", type=float, default=24)
+    sub.add_parser("prune", help="drop samples and buckets past their retention")
+    args = parser.parse_args()
+
+    with StatusHistory() as history:
+        if args.action == "query":
+            since = int(time.time() - args.hours * 3600)
+            for bucket, avg, low, high in history.query(args.metric, since, resolution=args.resolution):
+                print(f"{datetime.fromtimestamp(bucket):%Y-%m-%d %H:%M}  avg {avg:>10}  min {low:>10}  max {high:>10}")
+        elif args.action == "export":
+            history.export(args.out, args.hours)
+            print(f"[HISTORY] Saved last {args.hours:g}h to {args.out}")
+        else:
+            print(f"[HISTORY] Pruned {history.prune()} rows")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+# --- end status_history.py ---
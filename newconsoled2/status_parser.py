@@ -0,0 +1,132 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/status_parser.py ---
+"""
+Единен парсер за изхода на D2GS 'status' и 'uptime'.
+
+Един compiled-once регулярен израз минава по текста веднъж (finditer по редове)
+и всеки ред се разпределя към полето си чрез речник - вместо десетки отделни
+re.search върху целия status_raw. Резултатът съдържа всички полета, включително
+мрежовата статистика (RecvPkts... / RecvRate... таблиците).
+"""
+import re
+
+LINE_RE = re.compile(r"""
+    ^[ \t]*(?:
+        Connetion[ \t]+to[ \t]+(?P<conn>D2CS|D2DBS)[ \t]*(?P<conn_state>[^\r\n]*?)
+      | (?P<table>RecvPkts|RecvRate)\b[^\r\n]*
+      | (?P<row>D2CS|D2DBS)[ \t]+(?P<c1>[\d.]+)[ \t]+(?P<c2>[\d.]+)[ \t]+(?P<c3>[\d.]+)[ \t]+(?P<c4>[\d.]+)
+      | The[ \t]+game[ \t]+server[ \t]+started[ \t]+at[ \t]+(?P<started>[^\r\n]*?)
+      | Now[ \t]+it[ \t]+is[ \t]+(?P<now>[^\r\n]*?)
+      | [^\r\n:]*?\buptime[ \t]+(?P<uptime>\d[^\r\n]*?)
+      | (?P<key>[A-Za-z][A-Za-z ]*?)[ \t]*:[ \t]*(?P<value>[^\r\n]*?)
+    )[ \t]*\r?$
+""", re.MULTILINE | re.VERBOSE)
+
+MEMORY_RE = re.compile(r"(\d+(?:\.\d+)?)MB/\s*(\d+(?:\.\d+)?)MB")
+DURATION_RE = re.compile(r"(\d+)\s*(day|hour|minute|second)s?")
+UNIT_SECONDS = {"day": 86400, "hour": 3600, "minute": 60, "second": 1}
+
+
+def _int(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def _percent(value):
+    try:
+        return float(value.replace('%', '').strip())
+    except ValueError:
+        return 0.0
+
+
+def _memory(value):
+    match = MEMORY_RE.search(value)
+    if match:
+        return {"used_mb": float(match.group(1)), "total_mb": float(match.group(2))}
+    return {"used_mb": 0.0, "total_mb": 0.0}
+
+
+# "Ключ: стойност" редове -> (секция, поле, конвертор)
+STATUS_FIELDS = {
+    "Setting maximum game": ("game_limits", "max_games_set", _int),
+    "Current maximum game": ("game_limits", "max_games_current", _int),
+    "Maximum prefer users": ("game_limits", "max_prefer_users", _int),
+    "Maximum game life": ("game_limits", "max_game_life_seconds", _int),
+    "Current running game": ("current_activity", "running_games", _int),
+    "Current users in game": ("current_activity", "users_in_game", _int),
+    "Physical memory usage": ("resource_usage", "physical_memory", _memory),
+    "Virtual memory usage": ("resource_usage", "virtual_memory", _memory),
+    "Kernel CPU usage": ("resource_usage", "kernel_cpu_percent", _percent),
+    "User CPU usage": ("resource_usage", "user_cpu_percent", _percent),
+}
+
+# Колоните на двете мрежови таблици
+NET_TABLES = {
+    "RecvPkts": ("total_transfer", ("recv_pkts", "recv_bytes", "send_pkts", "send_bytes"), int),
+    "RecvRate": ("rates_kbytes_sec", ("current_recv", "peak_recv", "current_send", "peak_send"), float),
+}
+
+
+def empty_status():
+    """Структурата със стойностите по подразбиране, когато ред липсва в изхода."""
+    return {
+        "game_limits": {"max_games_set": 0, "max_games_current": 0,
+                        "max_prefer_users": 0, "max_game_life_seconds": 0},
+        "current_activity": {"running_games": 0, "users_in_game": 0},
+        "service_connections": {"d2cs": "Status Unknown", "d2dbs": "Status Unknown"},
+        "resource_usage": {"physical_memory": {"used_mb": 0.0, "total_mb": 0.0},
+                           "virtual_memory": {"used_mb": 0.0, "total_mb": 0.0},
+                           "kernel_cpu_percent": 0.0, "user_cpu_percent": 0.0},
+        "network_statistics": {"total_transfer": {}, "rates_kbytes_sec": {}},
+        "other": {},
+    }
+
+
+def parse_uptime_duration(duration):
+    """'1 days 2 hours 3 minutes 4 seconds' -> 93784"""
+    return sum(int(n) * UNIT_SECONDS[unit] for n, unit in DURATION_RE.findall(duration))
+
+
+def parse_output(status_raw="", uptime_raw=""):
+    """
+    Парсира 'status' и 'uptime' изхода в един запис:
+        {"uptime": {...}, "status": {game_limits, current_activity, service_connections,
+                                     resource_usage, network_statistics, other}}
+    """
+    status = empty_status()
+    uptime = {}
+    table = None
+
+    for text in (status_raw, uptime_raw):
+        for m in LINE_RE.finditer(text):
+            if m.group("row"):
+                if table:
+                    section, columns, convert = table
+                    try:
+                        values = [convert(m.group(g)) for g in ("c1", "c2", "c3", "c4")]
+                    except ValueError:
+                        continue
+                    status["network_statistics"][section][m.group("row").lower()] = dict(zip(columns, values))
+            elif m.group("table"):
+                table = NET_TABLES[m.group("table")]
+            elif m.group("conn"):
+                status["service_connections"][m.group("conn").lower()] = m.group("conn_state") or "Status Unknown"
+            elif m.group("key") is not None:
+                key, value = m.group("key").strip(), m.group("value")
+                field = STATUS_FIELDS.get(key)
+                if field:
+                    section, name, convert = field
+                    status[section][name] = convert(value)
+                else:
+                    status["other"][key] = value
+            elif m.group("started") is not None:
+                uptime["server_start_time"] = m.group("started")
+            elif m.group("now") is not None:
+                uptime["current_time"] = m.group("now")
+            elif m.group("uptime") is not None:
+                uptime["uptime_duration"] = m.group("uptime")
+                uptime["uptime_total_seconds"] = parse_uptime_duration(m.group("uptime"))
+
+    return {"uptime": uptime, "status": status}
+# --- end status_parser.py ---
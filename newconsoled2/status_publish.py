@@ -0,0 +1,53 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/status_publish.py ---
+"""
+Записва парсирания uptime/status (status_parser.parse_output) за уеба.
+
+    d2gs_uptime.txt          секунди, за d2console.js
+    d2gs_uptime_data.json    record["uptime"]
+    d2gs_status_data.json    record["status"]
+    d2gs_status_latest.json  форматът на стария d2gs_json_parser_v2.py (за d2gs_status.js)
+    d2gs_status_history.json последните 24ч от status_history.db
+
+Всеки файл се пише атомарно (temp + os.replace). Ползва се от
+d2consoleportal/08.d2gs_time_ands_status_json.py и collector.py.
+"""
+import json
+import os
+import sqlite3
+
+from config import JSON_STATUS_HISTORY
+from json_stream import write_text_atomic
+
+
+def write_file(web_dir, file_name, text, label):
+    file_path = os.path.join(web_dir, file_name)
+    try:
+        write_text_atomic(file_path, text)
+        print(f"[SUCCESS] {label} saved to: {file_path}")
+    except OSError as e:
+        print(f"[ERROR] Could not write {label}: {e}")
+
+
+def publish_status(uptime_data, status_data, web_dir):
+    os.makedirs(web_dir, exist_ok=True)
+    # Uptime в секунди; '0', ако стойността липсва
+    write_file(web_dir, "d2gs_uptime.txt", str(uptime_data.get("uptime_total_seconds", 0)), "Uptime TXT (seconds)")
+    write_file(web_dir, "d2gs_uptime_data.json", json.dumps(uptime_data, indent=4), "Uptime JSON")
+    write_file(web_dir, "d2gs_status_data.json", json.dumps(status_data, indent=4), "Status JSON")
+
+    # Форматът на стария d2gs_json_parser_v2.py: {"status", "message", "data": {"uptime", "status"}}
+    latest = {"status": "success", "message": "", "data": {"uptime": uptime_data, "status": status_data}}
+    write_file(web_dir, "d2gs_status_latest.json", json.dumps(latest, indent=4), "Status latest JSON")
+
+
+def record_history(history, status_data, out_path=JSON_STATUS_HISTORY, prune=True):
+    """Пробата отива във времевия ред; уебът чете последните 24ч от един JSON."""
+    try:
+        history.record(status_data)
+        if prune:
+            history.prune()
+        history.export(str(out_path))
+        print("[SUCCESS] Status sample added to history")
+    except (sqlite3.Error, OSError) as e:
+        print(f"[ERROR] Could not update status history: {e}")
+# --- end status_publish.py ---
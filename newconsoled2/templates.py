@@ -0,0 +1,136 @@
+# --- start /home/support/git/pvpgn-webportal/newconsoled2/templates.py ---
+"""
+Общ HTML слой за report builder-ите (06_build_html.py, ladder_stream.py,
+char_parser.py) и статичните страници (z1.weball_new.py -> webstat.html).
+
+Template("<tr><td>{name}</td><td>{experience:,}</td></tr>") се компилира
+веднъж (при import на модула, който го дефинира) до една lambda, която само
+съединява литералите и стойностите - без str.format парсване на всеки ред:
+
+    {field}         html.escape(str(стойност)); липсващо поле -> ""
+    {field:spec}    format(стойност, spec), после escape
+    {field!s}       готов HTML, без escape
+
+Редовете (row макроси) се пишат с writelines от генератор в буфериран
+временен файл, който накрая атомарно заменя страницата (PageWriter), затова
+времето и паметта са линейни спрямо броя редове.
+
+CSS-ът е общ: d2consoleportal/webcontent/css/reports.css. Страниците само го
+свързват (page_head), а install_stylesheet() го слага до тях веднъж - не се
+вгражда по 2-3 KB във всеки HTML файл. install_static() прави същото за всеки
+файл от webcontent/ (напр. webstat.html + js/webstat.js).
+"""
+import html
+import os
+import tempfile
+from string import Formatter
+
+from json_stream import publish, write_text_atomic
+
+BUFFER_SIZE = 1 << 16
+STYLESHEET = "css/reports.css"   # относително към HTML страницата
+# Статичните файлове (CSS, страници, JS) - install_static() ги слага в уеб директорията
+WEBCONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "d2consoleportal", "webcontent")
+
+
+class Template:
+    """Шаблон с {полета}, компилиран до lambda values: str."""
+    __slots__ = ("source", "fields", "render")
+
+    def __init__(self, source):
+        self.source = source
+        self.fields = []
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if literal:
+                parts.append(repr(literal))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Bad template field {field!r}")
+            self.fields.append(field)
+            value = f"v.get({field!r}, '')"
+            value = f"format({value}, {spec!r})" if spec else f"str({value})"
+            parts.append(value if conversion == "s" else f"escape({value})")
+        code = f"lambda v: ''.join(({', '.join(parts)},))" if parts else "lambda v: ''"
+        self.render = eval(compile(code, f"<template {source[:40]!r}>", "eval"),
+                           {"escape": html.escape, "format": format, "str": str})
+
+    def stream(self, rows):
+        """Генератор от готови редове - за out.writelines(...)."""
+        render = self.render
+        return (render(row) for row in rows)
+
+    def __repr__(self):
+        return f"Template({self.source[:40]!r}...)"
+
+
+PAGE_HEAD = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="{stylesheet}">
+</head>
+<body class="{body_class}">
+""")
+PAGE_END = "</body></html>\n"
+
+
+def page_head(title, body_class, stylesheet=STYLESHEET):
+    return PAGE_HEAD.render({"title": title, "body_class": body_class, "stylesheet": stylesheet})
+
+
+class PageWriter:
+    """
+    with PageWriter(path) as out: out.writelines(...)
+    Буфериран временен файл в същата директория; при успех - publish (os.replace).
+    """
+
+    def __init__(self, path, buffering=BUFFER_SIZE):
+        self.path = str(path)
+        self.buffering = buffering
+        self.tmp_path = None
+        self.out = None
+
+    def __enter__(self):
+        directory, name = os.path.split(self.path)
+        fd, self.tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory or ".")
+        self.out = os.fdopen(fd, "w", encoding="utf-8", buffering=self.buffering)
+        return self.out
+
+    def __exit__(self, exc_type, exc, tb):
+        self.out.close()
+        if exc_type is None:
+            publish(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+        return False
+
+
+def install_static(web_dir, relative, webcontent=WEBCONTENT_DIR):
+    """webcontent/<relative> -> <web_dir>/<relative>, само ако липсва или е различен."""
+    source = os.path.join(webcontent, relative)
+    target = os.path.join(str(web_dir), relative)
+    try:
+        with open(source, encoding="utf-8") as f:
+            content = f.read()
+    except OSError as e:
+        print(f"[HTML] Static file not found: {e}")
+        return False
+    try:
+        with open(target, encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    write_text_atomic(target, content)
+    print(f"[HTML] Installed: {target}")
+    return True
+
+
+def install_stylesheet(page_path):
+    """Слага reports.css до страницата (css/reports.css)."""
+    return install_static(os.path.dirname(os.path.abspath(str(page_path))), STYLESHEET)
+# --- end templates.py ---
@@ -0,0 +1,109 @@
+"""
+Tests for async_console.py against fake_d2gs.py (no D2GS or realm needed).
+
+    python3 -m unittest discover -s newconsoled2      # or: python3 -m pytest newconsoled2
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_console import AsyncD2GSConsole, ConsolePool, snapshot
+from fake_d2gs import FIXTURES_DIR, FakeD2GS, load_fixtures, synthetic_games
+
+HOST = "127.0.0.1"
+
+
+async def start_server(handle):
+    """Сървър на свободен порт; връща (server, port)."""
+    server = await asyncio.start_server(handle, HOST, 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+class FakeServerTest(unittest.TestCase):
+    """Истинска TCP сесия срещу FakeD2GS: login, gl и pipeline-нати cl."""
+
+    def snapshot(self, replies, sessions=1, rtt=0.0):
+        async def main():
+            server, port = await start_server(FakeD2GS(replies, rtt=rtt).handle)
+            try:
+                async with ConsolePool(sessions, host=HOST, port=port) as pool:
+                    return await snapshot(pool)
+            finally:
+                server.close()
+                await server.wait_closed()
+        return asyncio.run(main())
+
+    def test_synthetic_games_in_order(self):
+        games = self.snapshot(synthetic_games(12), rtt=0.01)
+        self.assertEqual([game["GameInfo"]["GameName"] for game in games],
+                         [f"Game{n:03d}" for n in range(1, 13)])
+        # Game005: n % 8 + 1 = 6 играчи (виж fake_d2gs.synthetic_games)
+        self.assertEqual(games[4]["GameInfo"]["UserCount"], 6)
+        self.assertEqual(len(games[4]["Characters"]), 6)
+
+    def test_pool_of_two_sessions(self):
+        games = self.snapshot(synthetic_games(9), sessions=2, rtt=0.01)
+        self.assertEqual([game["GameInfo"]["GameId"] for game in games], [str(100 + n) for n in range(1, 10)])
+
+    def test_recorded_fixtures(self):
+        games = self.snapshot(load_fixtures(FIXTURES_DIR))
+        self.assertEqual(sorted(game["GameInfo"]["GameId"] for game in games), ["25", "36"])
+
+    def test_wrong_password(self):
+        async def main():
+            server, port = await start_server(FakeD2GS({}, password="secret").handle)
+            try:
+                async with AsyncD2GSConsole(HOST, port, password="wrong"):
+                    pass
+            finally:
+                server.close()
+                await server.wait_closed()
+        with self.assertRaises(ConnectionError):
+            asyncio.run(main())
+
+
+class SharedReadTest(unittest.TestCase):
+    """Отговорите идват слепени в едно read, а prompt-ът е разцепен между две."""
+
+    def test_responses_split_by_prompt_in_order(self):
+        replies = synthetic_games(3)
+        commands = ["cl 101", "cl 102", "cl 103"]
+
+        async def handle(reader, writer):
+            writer.write(b"D2GS Console\r\nPassword: ")
+            await reader.readline()
+            writer.write(b"\r\nD2GS> ")
+            received = [(await reader.readline()).strip().decode("ascii") for _ in commands]
+            data = b"".join(command.encode("ascii") + b"\r\n" + replies[command] + b"\r\nD2GS> "
+                            for command in received)
+            # Първото парче: целият първи отговор + част от втория, рязано по средата на "D2GS> "
+            cut = data.index(b"D2GS> ", data.index(b"D2GS> ") + 1) + 3
+            writer.write(data[:cut])
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(data[cut:])
+            await reader.read()
+            writer.close()
+
+        async def main():
+            server, port = await start_server(handle)
+            try:
+                async with AsyncD2GSConsole(HOST, port) as console:
+                    return await asyncio.gather(*(console.run_command(command) for command in commands))
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        outputs = asyncio.run(main())
+        for command, output in zip(commands, outputs):
+            game_id = command.split()[1]
+            self.assertIn(f"[GameId : {game_id}]", output)
+            self.assertNotIn("D2GS>", output)
+            self.assertFalse(output.startswith(command))   # ехото е махнато
+
+
+if __name__ == "__main__":
+    unittest.main()
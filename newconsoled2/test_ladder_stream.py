@@ -0,0 +1,58 @@
+"""
+Tests for ladder_stream.py (webladder.html + ladder_index.json from d2ladder.xml).
+
+    python3 -m unittest discover -s newconsoled2      # or: python3 -m pytest newconsoled2
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ladder_stream import LadderIndex, build_ladder
+
+
+def char(rank, name):
+    return {"rank": rank, "name": name, "level": "90", "experience": "1000", "class": "sor"}
+
+
+class LadderIndexTest(unittest.TestCase):
+
+    def test_tied_ranks_keep_first_seen(self):
+        # to_int() дава 0 за липсващ/повреден <rank> - много равни рангове в един тип
+        index = LadderIndex(top_n=3)
+        for n in range(50):
+            index.add(27, char("", f"Hero{n}"))
+        top = index.payload()["top"][27]
+        self.assertEqual([entry["name"] for entry in top], ["Hero0", "Hero1", "Hero2"])
+
+    def test_top_n_sorted_by_rank(self):
+        index = LadderIndex(top_n=3)
+        for rank, name in [(5, "e"), (1, "a"), (3, "c"), (3, "c2"), (2, "b"), (4, "d")]:
+            index.add(28, char(str(rank), name))
+        top = index.payload()["top"][28]
+        self.assertEqual([(entry["rank"], entry["name"]) for entry in top], [(1, "a"), (2, "b"), (3, "c")])
+        self.assertEqual(index.best_by_name["c2"]["rank"], 3)
+
+    def test_build_ladder_with_missing_ranks(self):
+        chars = "".join(f"<char><rank>garbled</rank><name>Hero{n}</name><level>1</level>"
+                        f"<experience>0</experience><class>ama</class></char>" for n in range(150))
+        with tempfile.TemporaryDirectory() as tmp:
+            xml_file = os.path.join(tmp, "d2ladder.xml")
+            with open(xml_file, "w", encoding="utf-8") as f:
+                f.write(f"<ladders><ladder><type>27</type>{chars}</ladder></ladders>")
+            html_file = os.path.join(tmp, "webladder.html")
+            index_file = os.path.join(tmp, "ladder_index.json")
+            build_ladder(xml_file, html_file, index_file)
+            with open(index_file, encoding="utf-8") as f:
+                payload = json.load(f)
+            self.assertEqual(len(payload["chars"]), 150)
+            self.assertEqual(len(payload["top"]["27"]), 100)
+            with open(html_file, encoding="utf-8") as f:
+                self.assertEqual(f.read().count("<td>Hero"), 150)
+
+
+if __name__ == "__main__":
+    unittest.main()